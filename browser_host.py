@@ -0,0 +1,112 @@
+import asyncio
+import json
+import os
+import threading
+
+from run_metrics import span
+
+# ========= Navigateur gardé chaud entre deux runs =========
+STORAGE_STATE_FILENAME = "browser_state.json"   # cookies + consentement, réutilisés d'un run à l'autre
+
+def write_storage_state(path: str, state: dict):
+    """Écriture atomique (workers sync concurrents : un fichier temporaire par thread)."""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(state, fh)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def usable_storage_state(path: str):
+    """Chemin à passer à new_context(storage_state=...), ou None si absent / illisible."""
+    if not path or not os.path.isfile(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as fh:
+            json.load(fh)
+        return path
+    except (OSError, ValueError):
+        return None
+
+class BrowserHost:
+    """Boucle asyncio + Playwright + Chromium dans un thread de fond, réutilisés par les runs successifs
+    de l'interface (moteur async). Chromium est relancé s'il s'est fermé ou si ses options changent."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._playwright = None
+        self._browser = None
+        self._launch_options = None
+        self._launch_lock = None   # asyncio.Lock, créé sur la boucle du host
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="browser-host", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def run(self, coro):
+        """Exécute `coro` sur la boucle du host ; bloque le thread appelant jusqu'au résultat."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result()
+
+    @property
+    def warm(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    async def get_browser(self, launch_options: dict, metrics=None):
+        """À appeler depuis la boucle du host (coroutines lancées par run()) ; le lancement effectif
+        est mesuré ("browser_launch") dans `metrics`."""
+        if self._launch_lock is None:
+            self._launch_lock = asyncio.Lock()
+        async with self._launch_lock:
+            if self._browser is not None and (not self._browser.is_connected()
+                                              or launch_options != self._launch_options):
+                try:
+                    await self._browser.close()
+                except Exception:
+                    pass
+                self._browser = None
+            if self._browser is None:
+                with span(metrics, "browser_launch"):
+                    if self._playwright is None:
+                        from playwright.async_api import async_playwright   # différé : démarrage rapide
+                        self._playwright = await async_playwright().start()
+                    self._browser = await self._playwright.chromium.launch(**launch_options)
+                self._launch_options = launch_options
+            return self._browser
+
+    def prelaunch(self, launch_options: dict):
+        """Lance Chromium en arrière-plan sans attendre (pendant que l'utilisateur édite la grille) ;
+        renvoie un concurrent.futures.Future (exception si le lancement échoue)."""
+        return asyncio.run_coroutine_threadsafe(self.get_browser(launch_options), self._ensure_loop())
+
+    async def _shutdown(self):
+        try:
+            if self._browser is not None:
+                await self._browser.close()
+        finally:
+            self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    def close(self):
+        """Ferme Chromium, Playwright et la boucle (fermeture de l'interface)."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout=15)
+        except Exception:
+            pass
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
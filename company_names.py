@@ -0,0 +1,68 @@
+import re
+import unicodedata
+
+# ========= Noms d'entreprises =========
+# Clé de regroupement (doublons, shards) : formes juridiques retirées en fin ou début de nom : "ACME SAS",
+# "Acme S.A.R.L.", "SA Acme", "Acme (SASU)". La requête et la correspondance gardent le nom de la cellule.
+LEGAL_FORMS = (
+    "sa", "sas", "sasu", "sarl", "eurl", "snc", "sca", "sci", "scop", "scp", "sem", "gie", "selarl", "selas",
+)
+_LEGAL_FORM_RE = "|".join(sorted(LEGAL_FORMS, key=len, reverse=True)).upper()
+# Majuscules seulement ("Sa Majeste", "Cosa Sa" intacts) ; séparées par une espace, une virgule ou un tiret
+# entouré d'espaces : une marque composée ("SNC-Lavalin") n'est jamais coupée
+_FORM_SEP = r"(?:\s*,\s*|\s+-\s+|\s+)"
+_TRAILING_FORM = re.compile(rf"{_FORM_SEP}\(?\b(?:{_LEGAL_FORM_RE})\b\)?\s*$")
+_LEADING_FORM = re.compile(rf"^\(?(?:{_LEGAL_FORM_RE})\b\)?{_FORM_SEP}(?=\w)")
+# Reste trop vague pour identifier l'entreprise seul : la forme juridique est alors conservée
+MIN_STRIPPED_LENGTH = 4
+GENERIC_WORDS = frozenset((
+    "conseil", "services", "service", "ingenierie", "industrie", "industries", "groupe", "group", "france",
+    "international", "transports", "transport", "construction", "immobilier", "energie", "environnement",
+    "solutions", "distribution", "maintenance", "consulting", "holding", "batiment", "travaux", "logistique",
+))
+
+def normalize_company(name: str) -> str:
+    """NFKC, casse ignorée, espaces compactés (clé stable entre machines)."""
+    name = unicodedata.normalize("NFKC", name or "")
+    return re.sub(r"\s+", " ", name).strip().casefold()
+
+def _undot_legal_forms(name: str) -> str:
+    """"S.A.R.L." -> "SARL" ; les autres sigles pointés ("U.S. Steel") restent tels quels."""
+    def undot(m):
+        token = m.group(0).replace(".", "")
+        return token if token.lower() in LEGAL_FORMS else m.group(0)
+    return re.sub(r"\b[A-Za-z](?:\.[A-Za-z])+\b\.?", undot, name)
+
+def search_name(name: str) -> str:
+    """Nom sans forme juridique (base de company_key) : espaces compactés, casse d'origine.
+    Si le retrait ne laisse qu'un nom trop vague (ou rien), la forme juridique est conservée."""
+    name = re.sub(r"\s+", " ", unicodedata.normalize("NFKC", name or "")).strip()
+    undotted = _undot_legal_forms(name)
+    stripped = previous = None
+    candidate = undotted
+    while candidate != previous:
+        previous = candidate
+        candidate = _LEADING_FORM.sub("", _TRAILING_FORM.sub("", candidate)).strip(" ,")
+        if _too_vague(candidate):
+            break
+        stripped = candidate
+    return stripped or undotted
+
+def _too_vague(name: str) -> bool:
+    """Un seul mot court ("Ti") ou générique ("Ingénierie") : pas un nom d'entreprise à lui seul."""
+    words = name.split()
+    if len(words) != 1:
+        return not words
+    word = unicodedata.normalize("NFKD", words[0]).encode("ascii", "ignore").decode("ascii").casefold()
+    return len(word) < MIN_STRIPPED_LENGTH or word in GENERIC_WORDS
+
+def company_key(name: str) -> str:
+    """Clé de regroupement : deux lignes de même clé donnent la même requête."""
+    return normalize_company(search_name(name))
+
+def group_by_company(jobs):
+    """[(row, entreprise), ...] -> {clé: [(row, entreprise), ...]} dans l'ordre de première apparition."""
+    groups = {}
+    for row, company_name in jobs:
+        groups.setdefault(company_key(company_name), []).append((row, company_name))
+    return groups
@@ -1,320 +1,61 @@
 import os
-import sys
 import shutil
 import threading
 import queue
-import time
-import random
-import urllib.parse
-import re
-from dataclasses import dataclass
-from tkinter import Tk, Text, StringVar, BooleanVar, END, DISABLED, NORMAL, filedialog, messagebox
+from tkinter import Tk, Text, StringVar, BooleanVar, IntVar, END, DISABLED, NORMAL, filedialog, messagebox
 from tkinter import ttk
 
-os.environ.setdefault("PYTHONIOENCODING", "utf-8")
-
-# ========= Playwright / Excel =========
-from playwright.sync_api import sync_playwright, TimeoutError as PWTimeout
-import openpyxl
-from openpyxl import Workbook
-
-# ========= Constantes =========
-EXPECTED_XLSX_NAME = "icpe_details.xlsx"   # fichier de travail à la racine
-DEFAULT_SHEET_NAME = "Feuille1"
-DEFAULT_JOB_TITLE = "Responsable HSE"
-
-# Colonnes Excel : A=1 (entreprise), B=2 (URL)
-COMPANY_COLUMN = 1
-RESULT_COLUMN = 2
-
-# Startpage
-STARTPAGE_SEARCH_URL = "https://www.startpage.com/do/search?q="
-RESULT_BLOCK_SELECTORS = [
-    'div.w-gl__result',
-    'article[data-testid="result"]',
-    'li[class*="result"]',
-    'div[class*="result"]'
-]
-RESULT_LINK_SELECTORS = [
-    'a[data-testid="result-title-a"]',
-    'a.w-gl__result-title',
-    'h3 a',
-    'a'
-]
-RESULT_SNIPPET_SELECTORS = [
-    '.w-gl__description',
-    'p[class*="snippet"]',
-    'div[class*="snippet"] p',
-    'p'
-]
-
-# Dossier app (gère PyInstaller)
-BASE_DIR = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
-APP_DIR = os.path.dirname(sys.executable) if getattr(sys, "frozen", False) else BASE_DIR
-
-MS_PLAYWRIGHT_DIR = os.path.join(APP_DIR, "ms-playwright")
-if os.path.isdir(MS_PLAYWRIGHT_DIR):
-    os.environ["PLAYWRIGHT_BROWSERS_PATH"] = MS_PLAYWRIGHT_DIR
-
-# ========= Utils =========
-def strip_non_bmp(s: str) -> str:
-    """Supprime les caractères > U+FFFF (emoji, etc.) pour éviter TclError sur vieux Tk."""
-    if not isinstance(s, str):
-        s = str(s)
-    return "".join(ch if ord(ch) <= 0xFFFF else "?" for ch in s)
-
-def human_sleep(a=0.8, b=1.8):
-    time.sleep(random.uniform(a, b))
-
-def log_put(log_q: queue.Queue, msg: str):
+from scraper_engine import (
+    APP_DIR, EXPECTED_XLSX_NAME, EXPECTED_SQLITE_NAME, DEFAULT_SHEET_NAME, DEFAULT_JOB_TITLE, DEFAULT_WORKERS,
+    MAX_WORKERS,
+    DEFAULT_ENGINE, ENGINE_ASYNC, ENGINE_SYNC,
+    RunConfig, run_scraper, sanitize_filename, ensure_workbook_exists, BrowserHost, browser_launch_options,
+    read_sheet_header, iter_sheet_rows, write_grid_to_workbook, RunJournal, journal_path_for,
+    JOB_TITLE_SEPARATOR, parse_job_titles, result_column, column_letter, log_put,
+)
+from search_backends import BACKENDS, BACKEND_HTTP
+from resource_blocking import DEFAULT_BLOCKED_TYPES, DEFAULT_BLOCKED_DOMAINS, DEFAULT_ALLOWED_DOMAINS
+from search_cache import CACHE_OFF, CACHE_USE, CACHE_REFRESH_STALE
+from search_engines import ENGINES, DEFAULT_ENGINE_NAME, resolve_engines
+from working_store import STORE_XLSX, STORE_EXTENSIONS, store_kind, convert_store
+
+POLL_MS = 120                 # période de rafraîchissement de l'interface
+LOG_MAX_LINES = 2000          # journal affiché = tampon circulaire des dernières lignes
+MAX_UPDATES_PER_TICK = 5000   # au-delà, le reste des files attend le tick suivant
+GRID_ROWS_PER_TICK = 2000     # lignes insérées par tick pendant le chargement de la feuille
+
+def read_grid_sheet(excel_path: str, sheet: str, default_titles):
+    """Thread de fond : (intitulés, [(entreprise, url...), ...]) ; le journal d'un run interrompu est
+    superposé sans écrire. Les intitulés de l'en-tête priment sur `default_titles`."""
+    ensure_workbook_exists(excel_path, sheet)
+    _, titles = read_sheet_header(excel_path, sheet)
+    titles = titles or tuple(default_titles)
+    journaled = RunJournal(journal_path_for(excel_path)).replay()
+    rows = []
+    for r, a, urls in iter_sheet_rows(excel_path, sheet, result_columns=len(titles)):
+        urls = list(urls)
+        for i in range(len(urls)):
+            entry = journaled.get((r, result_column(i)))
+            if entry and entry[1] and entry[0] == a.strip():
+                urls[i] = entry[1]
+        if a or any(urls):
+            rows.append((a, *urls))
+    return titles, rows
+
+def save_grid_then_run(cfg: RunConfig, rows, stop_event, log_q, update_q, save_request, browser_host):
+    """Thread du run : écrit la grille (instantané pris dans le thread Tk) puis lance les recherches."""
     try:
-        safe = strip_non_bmp(msg)
-        log_q.put(safe + ("\n" if not safe.endswith("\n") else ""))
-    except Exception:
-        pass
-
-def sanitize_filename(name: str) -> str:
-    name = (name or "").strip()
-    name = re.sub(r"[\\/:*?\"<>|]+", "_", name)
-    return name[:120] if len(name) > 120 else name
-
-def ensure_workbook_exists(work_path: str, sheet_name: str):
-    """Crée le xlsx minimal si absent (A1='entreprise')."""
-    if not os.path.isfile(work_path):
-        wb = Workbook()
-        ws = wb.active
-        ws.title = sheet_name
-        ws.cell(row=1, column=COMPANY_COLUMN, value="entreprise")
-        wb.save(work_path)
-        wb.close()
-
-def accept_cookies_if_any(page, log_q):
-    try:
-        candidates_role = [
-            {"role": "button", "name": "Accept"},
-            {"role": "button", "name": "I agree"},
-            {"role": "button", "name": "J'accepte"},
-            {"role": "button", "name": "Agree"},
-            {"role": "button", "name": "OK"},
-        ]
-        css_candidates = [
-            'button#consent-accept', 'button#accept-choices',
-            'button[aria-label*="Agree"]', 'button[aria-label*="accept"]',
-            'button:has-text("Accept")', 'button:has-text("I agree")'
-        ]
-        for c in candidates_role:
-            try:
-                btn = page.get_by_role(c["role"], name=c["name"])
-                if btn.is_visible():
-                    btn.click(timeout=1500)
-                    log_put(log_q, "[cookies] acceptes (role)")
-                    human_sleep(0.3, 0.8)
-                    return
-            except Exception:
-                pass
-        for sel in css_candidates:
-            try:
-                loc = page.locator(sel).first
-                if loc.is_visible():
-                    loc.click(timeout=1500)
-                    log_put(log_q, "[cookies] acceptes (css)")
-                    human_sleep(0.3, 0.8)
-                    return
-            except Exception:
-                pass
-    except Exception:
-        pass
-
-def open_startpage_and_search(page, query, log_q):
-    url = STARTPAGE_SEARCH_URL + urllib.parse.quote_plus(query)
-    page.goto(url, wait_until="domcontentloaded")
-    accept_cookies_if_any(page, log_q)
-    try:
-        page.wait_for_selector(",".join(RESULT_BLOCK_SELECTORS), timeout=4000)
-        return
-    except PWTimeout:
-        pass
-    try:
-        page.fill('input[name="query"], input[name="q"]', query)
-        page.press('input[name="query"], input[name="q"]', "Enter")
-    except Exception:
-        pass
-
-def extract_results(page):
-    for sel in RESULT_BLOCK_SELECTORS:
-        blocks = page.query_selector_all(sel)
-        if blocks:
-            return blocks
-    return []
-
-def get_link_and_snippet(block):
-    url = None
-    title_text = ""
-    snippet_text = ""
-    for lsel in RESULT_LINK_SELECTORS:
-        try:
-            link_elem = block.query_selector(lsel)
-            if link_elem:
-                url = link_elem.get_attribute("href")
-                try:
-                    title_text = (link_elem.inner_text() or "").strip()
-                except Exception:
-                    title_text = ""
-                break
-        except Exception:
-            continue
-    if not snippet_text:
-        for ssel in RESULT_SNIPPET_SELECTORS:
-            try:
-                sn = block.query_selector(ssel)
-                if sn:
-                    snippet_text = (sn.inner_text() or "").strip()
-                    break
-            except Exception:
-                continue
-    return url, snippet_text, title_text
-
-def search_linkedin_profile(page, company_name, job_title, log_q):
-    try:
-        query = f'"{job_title}" site:linkedin.com/in "{company_name}"'
-        log_put(log_q, f"Recherche: {query}")
-
-        open_startpage_and_search(page, query, log_q)
-        try:
-            page.wait_for_selector(",".join(RESULT_BLOCK_SELECTORS), timeout=10000)
-        except PWTimeout:
-            log_put(log_q, "Aucun resultat (timeout)")
-            return None
-
-        blocks = extract_results(page)
-        log_put(log_q, f"Nombre de resultats: {len(blocks)}")
-
-        company_lc = company_name.lower()
-        for block in blocks[:8]:
-            url, snippet, title = get_link_and_snippet(block)
-            if not url:
-                continue
-            if "linkedin.com/in/" not in url:
-                continue
-            snippet_lc = (snippet or "").lower()
-            title_lc = (title or "").lower()
-            if company_lc in snippet_lc or company_lc in title_lc:
-                clean_url = url.split('?')[0]
-                log_put(log_q, f"Profil trouve: {clean_url}")
-                return clean_url
-
-        log_put(log_q, "Aucun profil correspondant")
-        return None
-
+        write_grid_to_workbook(cfg.excel_path, cfg.sheet_name, cfg.job_titles, rows)
     except Exception as e:
-        log_put(log_q, f"Erreur recherche: {e}")
-        return None
-
-# ========= Run =========
-@dataclass
-class RunConfig:
-    excel_path: str
-    sheet_name: str
-    job_title: str
-    headless: bool
-    fast: bool
-    test_mode: bool
-
-def run_scraper(config: RunConfig, stop_event: threading.Event, log_q: queue.Queue, update_q: queue.Queue):
-    companies_processed = 0
-    urls_found = 0
-
-    log_put(log_q, "Demarrage du scraper (Startpage)")
-    log_put(log_q, f"Mode: {'TEST (10 entreprises)' if config.test_mode else 'COMPLET'}")
-    log_put(log_q, f"Navigateur: {'Invisible' if config.headless else 'Visible'}")
-    log_put(log_q, "-" * 60)
-
-    ensure_workbook_exists(config.excel_path, config.sheet_name)
-
-    try:
-        workbook = openpyxl.load_workbook(config.excel_path)
-        ws = workbook[config.sheet_name] if config.sheet_name in workbook.sheetnames else workbook.active
-    except Exception as e:
-        log_put(log_q, f"Erreur ouverture Excel: {e}")
+        log_put(log_q, f"Sauvegarde Excel impossible: {e}")
         return
-
-    # A1 et B1
-    if (ws.cell(row=1, column=COMPANY_COLUMN).value or "").strip().lower() != "entreprise":
-        ws.cell(row=1, column=COMPANY_COLUMN, value="entreprise")
-    ws.cell(row=1, column=RESULT_COLUMN, value=config.job_title)
-
-    max_row = ws.max_row
-    if config.test_mode:
-        max_row = min(11, max_row)
-
-    slow_mo = 0 if (config.fast or config.headless) else 250
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=config.headless,
-            slow_mo=slow_mo,
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--disable-features=IsolateOrigins,site-per-process'
-            ]
-        )
-        page = browser.new_page(
-            viewport={"width": 1400, "height": 900},
-            user_agent=("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                        "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36")
-        )
-
-        try:
-            for row in range(2, max_row + 1):
-                if stop_event.is_set():
-                    log_put(log_q, "Arret demande. Sauvegarde…")
-                    break
-
-                company_name = (ws.cell(row=row, column=COMPANY_COLUMN).value or "").strip()
-                if not company_name:
-                    continue
-
-                companies_processed += 1
-                log_put(log_q, f"[{companies_processed}] Entreprise: {company_name}")
-                log_put(log_q, "-" * 40)
-
-                linkedin_url = search_linkedin_profile(page, company_name, config.job_title, log_q)
-                if linkedin_url:
-                    ws.cell(row=row, column=RESULT_COLUMN, value=linkedin_url)
-                    urls_found += 1
-                    update_q.put({"row": row, "url": linkedin_url})
-                    log_put(log_q, f"URL ecrite en B{row}")
-                else:
-                    log_put(log_q, "Pas de match")
-
-                if companies_processed % 5 == 0:
-                    try:
-                        workbook.save(config.excel_path)
-                        log_put(log_q, f"Sauvegarde intermediaire ({companies_processed})")
-                    except Exception as e:
-                        log_put(log_q, f"Sauvegarde intermediaire: {e}")
-
-                if row < max_row and not config.fast:
-                    base = 1.2 if config.headless else 0.7
-                    time.sleep(base + random.uniform(0.2, 0.9))
-
-        except Exception as e:
-            log_put(log_q, f"Erreur inattendue: {e}")
-        finally:
-            try:
-                workbook.save(config.excel_path)
-                workbook.close()
-            except Exception as e:
-                log_put(log_q, f"Sauvegarde finale: {e}")
-            browser.close()
-
-    log_put(log_q, "\n" + "=" * 60)
-    log_put(log_q, "RESUME")
-    log_put(log_q, "=" * 60)
-    log_put(log_q, f"Entreprises traitees: {companies_processed}")
-    log_put(log_q, f"URLs trouvees: {urls_found}")
+    run_scraper(cfg, stop_event, log_q, update_q, save_request, browser_host)
 
 # ========= Interface (grille) =========
+def split_list(text: str) -> tuple:
+    """"image, font" -> ("image", "font") ; casse ignorée, entrées vides retirées."""
+    return tuple(item.strip().lower() for item in text.split(",") if item.strip())
+
 class App:
     def __init__(self, root: Tk):
         self.root = root
@@ -322,25 +63,45 @@ class App:
         root.geometry("980x640")
 
         # Vars
-        self.excel_path = os.path.join(APP_DIR, EXPECTED_XLSX_NAME)
+        sqlite_path = os.path.join(APP_DIR, EXPECTED_SQLITE_NAME)
+        self.excel_path = sqlite_path if os.path.isfile(sqlite_path) else os.path.join(APP_DIR, EXPECTED_XLSX_NAME)
         self.sheet_name = StringVar(value=DEFAULT_SHEET_NAME)
         self.job_title = StringVar(value=DEFAULT_JOB_TITLE)
         self.headless = BooleanVar(value=False)
         self.fast = BooleanVar(value=False)
         self.test_mode = BooleanVar(value=False)
+        self.workers = IntVar(value=DEFAULT_WORKERS)
+        self.engine = StringVar(value=DEFAULT_ENGINE)
+        self.cache_mode = StringVar(value=CACHE_USE)
+        self.resume = BooleanVar(value=False)
+        self.block_resources = BooleanVar(value=True)
+        # Politique de blocage : listes séparées par des virgules (les domaines autorisés priment)
+        self.block_types = StringVar(value=", ".join(DEFAULT_BLOCKED_TYPES))
+        self.block_domains = StringVar(value=", ".join(DEFAULT_BLOCKED_DOMAINS))
+        self.allow_domains = StringVar(value=", ".join(DEFAULT_ALLOWED_DOMAINS))
+        self.pipeline = BooleanVar(value=False)
+        self.rematch = BooleanVar(value=False)     # correspondance rejouée sur l'archive, sans recherche
+        self.prelaunch = BooleanVar(value=False)   # Chromium lancé pendant l'édition de la grille
+        self.backend = StringVar(value=BACKEND_HTTP)
+        self.search_engines = StringVar(value=DEFAULT_ENGINE_NAME)   # "startpage, duckduckgo" = bascule
+        self.result_titles = ()   # intitulés affichés dans la grille (une colonne chacun)
+        self.row_items = {}       # ligne Excel -> item de la grille, figé au lancement du run
 
         self.log_q = queue.Queue()
         self.update_q = queue.Queue()
         self.worker_thread = None
         self.stop_event = threading.Event()
+        self.save_request = threading.Event()
+        self.browser_host = BrowserHost()   # Chromium gardé ouvert entre deux runs (moteur async)
+        self.sheet_q = queue.Queue()        # résultat du chargement de la feuille (thread de fond)
+        self.grid_backlog = []              # lignes lues, insérées dans la grille par paquets
+        self.loading = False
 
         # dernier dossier d'export (par defaut Home puis fallback APP_DIR)
         self.last_export_dir = os.path.expanduser("~")
         if not os.path.isdir(self.last_export_dir):
             self.last_export_dir = APP_DIR
 
-        ensure_workbook_exists(self.excel_path, self.sheet_name.get())
-
         # Layout
         wrapper = ttk.Frame(root, padding=10)
         wrapper.pack(fill="both", expand=True)
@@ -353,14 +114,47 @@ class App:
         self.entry_sheet = ttk.Entry(top, textvariable=self.sheet_name, width=18)
         self.entry_sheet.pack(side="left", padx=(6,18))
 
-        ttk.Label(top, text="Intitule (B1):").pack(side="left")
-        self.entry_job = ttk.Entry(top, textvariable=self.job_title, width=28)
+        ttk.Label(top, text=f"Intitules (B1, C1... separes par '{JOB_TITLE_SEPARATOR}'):").pack(side="left")
+        self.entry_job = ttk.Entry(top, textvariable=self.job_title, width=36)
         self.entry_job.pack(side="left", padx=(6,18))
 
         ttk.Checkbutton(top, text="Headless", variable=self.headless).pack(side="left", padx=(0,12))
         ttk.Checkbutton(top, text="Rapide (--fast)", variable=self.fast).pack(side="left", padx=(0,12))
         ttk.Checkbutton(top, text="Mode test (10)", variable=self.test_mode).pack(side="left")
 
+        # Options de performance
+        opts = ttk.Frame(wrapper)
+        opts.pack(fill="x", pady=(0,8))
+        ttk.Checkbutton(opts, text="Reprise", variable=self.resume).pack(side="left", padx=(0,12))
+        ttk.Checkbutton(opts, text="Bloquer ressources", variable=self.block_resources).pack(side="left", padx=(0,12))
+        ttk.Checkbutton(opts, text="Pipeline", variable=self.pipeline).pack(side="left", padx=(0,12))
+        ttk.Checkbutton(opts, text="Re-match (archive)", variable=self.rematch).pack(side="left", padx=(0,12))
+        ttk.Checkbutton(opts, text="Pre-lancer Chromium", variable=self.prelaunch,
+                        command=self.on_prelaunch_toggled).pack(side="left", padx=(0,12))
+        ttk.Label(opts, text="Workers:").pack(side="left")
+        ttk.Spinbox(opts, from_=1, to=MAX_WORKERS, textvariable=self.workers, width=3).pack(side="left", padx=(6,12))
+        ttk.Label(opts, text="Moteur:").pack(side="left")
+        ttk.Combobox(opts, textvariable=self.engine, values=(ENGINE_ASYNC, ENGINE_SYNC),
+                     state="readonly", width=6).pack(side="left", padx=(6,12))
+        ttk.Label(opts, text="Backend:").pack(side="left")
+        ttk.Combobox(opts, textvariable=self.backend, values=BACKENDS,
+                     state="readonly", width=8).pack(side="left", padx=(6,12))
+        ttk.Label(opts, text="Cache:").pack(side="left")
+        ttk.Combobox(opts, textvariable=self.cache_mode, values=(CACHE_USE, CACHE_REFRESH_STALE, CACHE_OFF),
+                     state="readonly", width=8).pack(side="left", padx=(6,12))
+        ttk.Label(opts, text="Recherche:").pack(side="left")
+        ttk.Entry(opts, textvariable=self.search_engines, width=22).pack(side="left", padx=(6,0))
+
+        # Blocage des ressources (si "Bloquer ressources" est coché)
+        blocking = ttk.Frame(wrapper)
+        blocking.pack(fill="x", pady=(0,8))
+        ttk.Label(blocking, text="Types bloques:").pack(side="left")
+        ttk.Entry(blocking, textvariable=self.block_types, width=28).pack(side="left", padx=(6,12))
+        ttk.Label(blocking, text="Domaines bloques:").pack(side="left")
+        ttk.Entry(blocking, textvariable=self.block_domains, width=40).pack(side="left", padx=(6,12))
+        ttk.Label(blocking, text="Domaines autorises:").pack(side="left")
+        ttk.Entry(blocking, textvariable=self.allow_domains, width=24).pack(side="left", padx=(6,0))
+
         # Grid controls
         grid_bar = ttk.Frame(wrapper)
         grid_bar.pack(fill="x", pady=(4,6))
@@ -370,11 +164,8 @@ class App:
         ttk.Button(grid_bar, text="Exporter la copie", command=self.export_copy).pack(side="right")
 
         # Treeview (feuille)
-        self.tree = ttk.Treeview(wrapper, columns=("entreprise", "url"), show="headings", selectmode="extended")
-        self.tree.heading("entreprise", text="entreprise (col A)")
-        self.tree.heading("url", text="URL (col B)")
-        self.tree.column("entreprise", width=420, anchor="w")
-        self.tree.column("url", width=480, anchor="w")
+        self.tree = ttk.Treeview(wrapper, columns=("entreprise",), show="headings", selectmode="extended")
+        self.configure_result_columns((DEFAULT_JOB_TITLE,))
         self.tree.pack(fill="both", expand=True)
 
         # Inline edit colonne A
@@ -388,66 +179,114 @@ class App:
         self.btn_start.pack(side="left")
         self.btn_stop = ttk.Button(bottom, text="Arreter", command=self.on_stop, state=DISABLED)
         self.btn_stop.pack(side="left", padx=(6,0))
+        self.btn_save = ttk.Button(bottom, text="Sauvegarder", command=self.on_save_now, state=DISABLED)
+        self.btn_save.pack(side="left", padx=(6,0))
 
         ttk.Label(bottom, text="Journal :").pack(side="left", padx=(18,6))
         self.txt = Text(wrapper, height=10, wrap="word", state=DISABLED)
         self.txt.pack(fill="x", pady=(4,0))
 
-        # Charger la feuille dans la grille
+        # Charger la feuille dans la grille (en fond : la fenêtre s'affiche tout de suite)
         self.load_sheet_to_grid()
 
         # Polling
-        self.root.after(120, self.flush_queues)
+        self.root.after(POLL_MS, self.flush_queues)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
     # --- Grille / Excel ---
-    def load_sheet_to_grid(self):
+    def get_job_titles(self) -> tuple:
+        return parse_job_titles(self.job_title.get()) or (DEFAULT_JOB_TITLE,)
+
+    def configure_result_columns(self, titles):
+        """Une colonne de grille par intitulé ; les URLs déjà affichées suivent leur intitulé."""
+        titles = tuple(titles)
+        if titles == self.result_titles:
+            return
+        old_index = {title: i for i, title in enumerate(self.result_titles)}
+        rows = [(iid, self.tree.item(iid, "values")) for iid in self.tree.get_children()]
+        columns = ("entreprise",) + tuple(f"url{i}" for i in range(len(titles)))
+        self.tree.configure(columns=columns)
+        self.tree.heading("entreprise", text="entreprise (col A)")
+        self.tree.column("entreprise", width=420, anchor="w")
+        for i, title in enumerate(titles):
+            self.tree.heading(f"url{i}", text=f"{title} (col {column_letter(result_column(i))})")
+            self.tree.column(f"url{i}", width=max(200, 480 // len(titles)), anchor="w")
+        for iid, values in rows:
+            values = tuple(values)
+            urls = []
+            for title in titles:
+                j = old_index.get(title)
+                urls.append(values[j + 1] if j is not None and j + 1 < len(values) else "")
+            self.tree.item(iid, values=(values[0] if values else "", *urls))
+        self.result_titles = titles
+
+    def empty_urls(self) -> tuple:
+        return ("",) * len(self.result_titles)
+
+    def load_sheet_to_grid(self, background: bool = True):
+        """Lecture de la feuille dans un thread de fond (Lancer désactivé jusqu'à la fin du remplissage) ;
+        background=False : lecture et remplissage immédiats (mesures, scripts)."""
         self.tree.delete(*self.tree.get_children())
-        ensure_workbook_exists(self.excel_path, self.sheet_name.get().strip() or DEFAULT_SHEET_NAME)
-        try:
-            wb = openpyxl.load_workbook(self.excel_path)
-            ws = wb[self.sheet_name.get()] if self.sheet_name.get() in wb.sheetnames else wb.active
-            if (ws.cell(row=1, column=COMPANY_COLUMN).value or "").strip().lower() != "entreprise":
-                ws.cell(row=1, column=COMPANY_COLUMN, value="entreprise")
-            b1 = (ws.cell(row=1, column=RESULT_COLUMN).value or "").strip()
-            if b1:
-                self.job_title.set(b1)
-            max_row = ws.max_row
-            for r in range(2, max_row + 1):
-                a = (ws.cell(row=r, column=COMPANY_COLUMN).value or "")
-                b = (ws.cell(row=r, column=RESULT_COLUMN).value or "")
-                if a or b:
-                    self.tree.insert("", "end", values=(a, b))
-            wb.save(self.excel_path)
-            wb.close()
-        except Exception as e:
-            messagebox.showerror("Excel", f"Lecture feuille impossible:\n{e}")
+        self.grid_backlog = []
+        self.loading = True
+        self.btn_start.config(state=DISABLED)
+        args = (self.excel_path, self.sheet_name.get().strip() or DEFAULT_SHEET_NAME, self.get_job_titles())
+        if not background:
+            try:
+                self.sheet_q.put(("ok", read_grid_sheet(*args)))
+            except Exception as e:
+                self.sheet_q.put(("error", e))
+            while self.loading:
+                self.fill_grid(limit=None)
+            return
 
-    def save_grid_to_excel(self):
-        ensure_workbook_exists(self.excel_path, self.sheet_name.get().strip() or DEFAULT_SHEET_NAME)
-        wb = openpyxl.load_workbook(self.excel_path)
-        if self.sheet_name.get() in wb.sheetnames:
-            ws = wb[self.sheet_name.get()]
-        else:
-            ws = wb.active
-            ws.title = self.sheet_name.get()
+        def read():
+            try:
+                self.sheet_q.put(("ok", read_grid_sheet(*args)))
+            except Exception as e:
+                self.sheet_q.put(("error", e))
+
+        threading.Thread(target=read, name="sheet-load", daemon=True).start()
+
+    def fill_grid(self, limit=GRID_ROWS_PER_TICK):
+        """Un tick de chargement : résultat du thread de lecture, puis un paquet de lignes dans la grille."""
+        for status, payload in self.drain(self.sheet_q):
+            if status == "error":
+                self.loading = False
+                messagebox.showerror("Excel", f"Lecture feuille impossible:\n{payload}")
+            else:
+                titles, rows = payload
+                self.job_title.set(f"{JOB_TITLE_SEPARATOR} ".join(titles))
+                self.configure_result_columns(self.get_job_titles())
+                self.grid_backlog = rows
+                self.loading = bool(rows)
+        if self.grid_backlog:
+            chunk = self.grid_backlog if limit is None else self.grid_backlog[:limit]
+            for values in chunk:
+                self.tree.insert("", "end", values=values)
+            del self.grid_backlog[:len(chunk)]
+            self.loading = bool(self.grid_backlog)
+        if not self.loading and not (self.worker_thread and self.worker_thread.is_alive()):
+            self.btn_start.config(state=NORMAL)
 
-        ws.cell(row=1, column=COMPANY_COLUMN, value="entreprise")
-        ws.cell(row=1, column=RESULT_COLUMN, value=self.job_title.get().strip() or DEFAULT_JOB_TITLE)
+    def grid_rows(self):
+        self.configure_result_columns(self.get_job_titles())
+        return [self.tree.item(iid, "values") for iid in self.tree.get_children()]
 
-        ws.delete_rows(2, ws.max_row)
-        r = 2
-        for iid in self.tree.get_children():
-            entreprise, url = self.tree.item(iid, "values")
-            ws.cell(row=r, column=COMPANY_COLUMN, value=(entreprise or "").strip())
-            ws.cell(row=r, column=RESULT_COLUMN, value=(url or "").strip())
-            r += 1
+    def save_grid_to_excel(self):
+        rows = self.grid_rows()
+        write_grid_to_workbook(self.excel_path, self.sheet_name.get().strip() or DEFAULT_SHEET_NAME,
+                               self.result_titles, rows)
 
-        wb.save(self.excel_path)
-        wb.close()
+    def sheet_loading(self) -> bool:
+        """Grille incomplète : l'écrire maintenant tronquerait la feuille."""
+        if self.loading:
+            messagebox.showinfo("Chargement", "La feuille est encore en cours de chargement.")
+        return self.loading
 
     # --- Actions UI ---
     def add_row(self):
-        self.tree.insert("", "end", values=("", ""))
+        self.tree.insert("", "end", values=("", *self.empty_urls()))
 
     def delete_selected(self):
         for iid in self.tree.selection():
@@ -463,7 +302,7 @@ class App:
         if not lines:
             return
         for l in lines:
-            self.tree.insert("", "end", values=(l, ""))
+            self.tree.insert("", "end", values=(l, *self.empty_urls()))
 
     def begin_edit_cell(self, event):
         region = self.tree.identify("region", event.x, event.y)
@@ -485,8 +324,8 @@ class App:
 
         def save_edit(e=None):
             new_val = entry.get()
-            url = self.tree.item(rowid, "values")[1]
-            self.tree.item(rowid, values=(new_val, url))
+            urls = tuple(self.tree.item(rowid, "values")[1:])
+            self.tree.item(rowid, values=(new_val, *urls))
             entry.destroy()
 
         entry.bind("<Return>", save_edit)
@@ -495,31 +334,35 @@ class App:
 
     def export_copy(self):
         """Enregistre une copie a l'emplacement choisi (boite 'Enregistrer sous...')."""
+        if self.sheet_loading():
+            return
         try:
             self.save_grid_to_excel()
         except Exception as e:
             messagebox.showerror("Excel", f"Sauvegarde Excel impossible:\n{e}")
             return
 
-        title = self.job_title.get().strip() or DEFAULT_JOB_TITLE
-        default_name = sanitize_filename(title) + ".xlsx"
+        default_name = sanitize_filename(" - ".join(self.result_titles)) + ".xlsx"
 
         path = filedialog.asksaveasfilename(
             title="Enregistrer la copie sous...",
             initialdir=self.last_export_dir,
             initialfile=default_name,
             defaultextension=".xlsx",
-            filetypes=[("Excel (*.xlsx)", "*.xlsx")]
+            filetypes=[("Excel (*.xlsx)", "*.xlsx"), ("CSV (*.csv)", "*.csv"), ("SQLite (*.sqlite3)", "*.sqlite3")]
         )
         if not path:
             return
 
         rootp, ext = os.path.splitext(path)
-        if ext.lower() != ".xlsx":
+        if ext.lower() not in STORE_EXTENSIONS:
             path = rootp + ".xlsx"
 
         try:
-            shutil.copy2(self.excel_path, path)
+            if store_kind(path) == store_kind(self.excel_path) == STORE_XLSX:
+                shutil.copy2(self.excel_path, path)   # mise en forme conservée
+            else:
+                convert_store(self.excel_path, path, self.sheet_name.get().strip() or DEFAULT_SHEET_NAME)
             self.last_export_dir = os.path.dirname(path)
             messagebox.showinfo("Export", f"Copie creee :\n{path}")
         except Exception as e:
@@ -529,25 +372,20 @@ class App:
         if self.worker_thread and self.worker_thread.is_alive():
             messagebox.showinfo("En cours", "Une execution est deja en cours.")
             return
-
+        if self.sheet_loading():
+            return
+        rows = self.grid_rows()   # instantané ; écrit dans le xlsx par le thread du run
         try:
-            self.save_grid_to_excel()
-        except Exception as e:
-            messagebox.showerror("Excel", f"Sauvegarde Excel impossible:\n{e}")
+            cfg = self.build_config()
+        except ValueError as e:
+            messagebox.showerror("Moteurs de recherche", f"{e}\nDisponibles: {', '.join(ENGINES)}")
             return
 
-        cfg = RunConfig(
-            excel_path=self.excel_path,
-            sheet_name=self.sheet_name.get().strip() or DEFAULT_SHEET_NAME,
-            job_title=self.job_title.get().strip() or DEFAULT_JOB_TITLE,
-            headless=self.headless.get(),
-            fast=self.fast.get(),
-            test_mode=self.test_mode.get()
-        )
-
         self.stop_event.clear()
+        self.save_request.clear()
         self.btn_start.config(state=DISABLED)
         self.btn_stop.config(state=NORMAL)
+        self.btn_save.config(state=NORMAL)
 
         try:
             while True:
@@ -560,11 +398,74 @@ class App:
         except queue.Empty:
             pass
 
+        # la grille est écrite telle quelle : ligne Excel = position + 2
+        self.row_items = {i + 2: iid for i, iid in enumerate(self.tree.get_children())}
+
         self.worker_thread = threading.Thread(
-            target=run_scraper, args=(cfg, self.stop_event, self.log_q, self.update_q), daemon=True
+            target=save_grid_then_run,
+            args=(cfg, rows, self.stop_event, self.log_q, self.update_q, self.save_request, self.browser_host),
+            daemon=True,
         )
         self.worker_thread.start()
 
+    def build_config(self) -> RunConfig:
+        """RunConfig depuis les options de l'interface ; ValueError si un moteur de recherche est inconnu."""
+        return RunConfig(
+            excel_path=self.excel_path,
+            sheet_name=self.sheet_name.get().strip() or DEFAULT_SHEET_NAME,
+            job_title=self.result_titles[0],
+            job_titles=self.result_titles,
+            headless=self.headless.get(),
+            fast=self.fast.get(),
+            test_mode=self.test_mode.get(),
+            workers=self.get_workers(),
+            engine=self.engine.get(),
+            cache_mode=self.cache_mode.get(),
+            resume=self.resume.get(),
+            rematch=self.rematch.get(),
+            block_resources=self.block_resources.get(),
+            block_types=split_list(self.block_types.get()),
+            block_domains=split_list(self.block_domains.get()),
+            allow_domains=split_list(self.allow_domains.get()),
+            pipeline=self.pipeline.get(),
+            backend=self.backend.get(),
+            search_engines=self.get_search_engines(),
+        )
+
+    def on_prelaunch_toggled(self):
+        """Chromium démarre en fond sur le navigateur gardé chaud (moteur async) ; Lancer le trouve prêt."""
+        if not self.prelaunch.get():
+            return
+        if self.engine.get() != ENGINE_ASYNC:
+            self.append_log("Pre-lancement: reserve au moteur async.\n")
+            return
+        try:
+            options = browser_launch_options(self.build_config())
+        except ValueError:
+            return
+        self.append_log("Pre-lancement de Chromium...\n")
+        future = self.browser_host.prelaunch(options)
+        future.add_done_callback(
+            lambda f: log_put(self.log_q, f"Pre-lancement: {f.exception()}" if f.exception() else "Chromium pret"))
+
+    def get_search_engines(self) -> tuple:
+        """"startpage, duckduckgo" -> ("startpage", "duckduckgo") ; ValueError si un moteur est inconnu."""
+        specs = tuple(s.strip() for s in self.search_engines.get().split(",") if s.strip())
+        resolve_engines(specs)
+        return specs
+
+    def get_workers(self) -> int:
+        try:
+            return max(1, min(int(self.workers.get()), MAX_WORKERS))
+        except Exception:
+            return DEFAULT_WORKERS
+
+    def on_save_now(self):
+        """Le xlsx est écrit par le run au prochain résultat."""
+        if self.worker_thread and self.worker_thread.is_alive():
+            self.save_request.set()
+            self.append_log("Sauvegarde demandee...\n")
+
     def on_stop(self):
         if self.worker_thread and self.worker_thread.is_alive():
             self.stop_event.set()
@@ -572,40 +473,63 @@ class App:
         else:
             self.append_log("Aucun run en cours.\n")
 
+    def on_close(self):
+        """Arrête le run en cours (le journal permet la reprise) puis ferme le navigateur gardé chaud."""
+        if self.worker_thread and self.worker_thread.is_alive():
+            self.stop_event.set()
+            self.worker_thread.join(timeout=10)
+        self.browser_host.close()
+        self.root.destroy()
+
     # --- Boucle d’UI ---
-    def flush_queues(self):
+    @staticmethod
+    def drain(q: queue.Queue, limit: int = MAX_UPDATES_PER_TICK):
+        items = []
         try:
-            while True:
-                msg = self.log_q.get_nowait()
-                self.append_log(msg)
+            while len(items) < limit:
+                items.append(q.get_nowait())
         except queue.Empty:
             pass
+        return items
 
-        try:
-            while True:
-                up = self.update_q.get_nowait()
-                row = up.get("row", 0)
-                url = up.get("url", "")
-                idx = row - 2
-                if idx >= 0:
-                    children = self.tree.get_children()
-                    if idx < len(children):
-                        iid = children[idx]
-                        entreprise, _ = self.tree.item(iid, "values")
-                        self.tree.item(iid, values=(entreprise, url))
-        except queue.Empty:
-            pass
+    def flush_queues(self):
+        """Un tick = un seul insert dans le journal et une seule mise à jour par ligne de grille."""
+        messages = self.drain(self.log_q)
+        if messages:
+            self.append_log("".join(messages))
+        if self.loading:
+            self.fill_grid()
+
+        pending = {}   # iid -> {position dans values: url} ; la dernière mise à jour d'une cellule l'emporte
+        for up in self.drain(self.update_q):
+            iid = self.row_items.get(up.get("row", 0))
+            if iid is not None:
+                pos = up.get("col", result_column(0)) - result_column(0) + 1
+                pending.setdefault(iid, {})[pos] = up.get("url", "")
+        for iid, cells in pending.items():
+            if not self.tree.exists(iid):   # ligne supprimée pendant le run
+                continue
+            values = list(self.tree.item(iid, "values"))
+            for pos, url in cells.items():
+                if pos < len(values):
+                    values[pos] = url
+            self.tree.item(iid, values=values)
 
         if self.worker_thread and not self.worker_thread.is_alive():
-            self.btn_start.config(state=NORMAL)
+            self.worker_thread = None
+            self.btn_start.config(state=DISABLED if self.loading else NORMAL)
             self.btn_stop.config(state=DISABLED)
+            self.btn_save.config(state=DISABLED)
 
-        self.root.after(120, self.flush_queues)
+        self.root.after(POLL_MS, self.flush_queues)
 
     def append_log(self, msg: str):
-        safe = strip_non_bmp(msg)
+        """Messages déjà nettoyés par log_put (strip_non_bmp) ; seules les LOG_MAX_LINES dernières lignes restent."""
         self.txt.config(state=NORMAL)
-        self.txt.insert(END, safe)
+        self.txt.insert(END, msg)
+        excess = int(self.txt.index("end-1c").split(".")[0]) - LOG_MAX_LINES
+        if excess > 0:
+            self.txt.delete("1.0", f"{excess + 1}.0")
         self.txt.see(END)
         self.txt.config(state=DISABLED)
 
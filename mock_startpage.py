@@ -0,0 +1,200 @@
+"""Faux Startpage local pour les benchmarks et les essais hors ligne.
+
+python mock_startpage.py --port 8765   puis   --search-url http://127.0.0.1:8765/do/search?q=
+(ou SCRAPER_SEARCH_URL=... pour l'interface).
+Autres moteurs : --variant duckduckgo --port 8766  puis  --search-engine duckduckgo=http://127.0.0.1:8766/html/?q=
+--throttle-rate 1 simule un moteur bloqué (429 partout) pour tester les disjoncteurs."""
+import argparse
+import hashlib
+import html
+import http.server
+import os
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
+
+# ========= Pages servies =========
+# Une variante par entrée de STARTPAGE.block_selectors (et par famille de liens / extraits)
+VARIANTS = ("w-gl", "article", "li", "div")
+# Pages des autres moteurs de search_engines.py (jamais tirées au hasard)
+ENGINE_VARIANTS = ("duckduckgo", "bing")
+SEARCH_PATHS = ("/do/search", "/html/", "/search")
+
+BLOCK_TEMPLATES = {
+    "w-gl": ('<div class="w-gl__result"><a class="w-gl__result-title" href="{url}"><h3>{title}</h3></a>'
+             '<p class="w-gl__description">{snippet}</p></div>'),
+    "article": ('<article data-testid="result"><a data-testid="result-title-a" href="{url}">{title}</a>'
+                '<p class="result-snippet">{snippet}</p></article>'),
+    "li": ('<li class="search-result"><h3><a href="{url}">{title}</a></h3>'
+           '<div class="snippet-wrapper"><p>{snippet}</p></div></li>'),
+    "div": '<div class="result-item"><a href="{url}">{title}</a><p>{snippet}</p></div>',
+    "duckduckgo": ('<div class="result results_links web-result"><h2 class="result__title">'
+                   '<a class="result__a" href="{url}">{title}</a></h2>'
+                   '<a class="result__snippet" href="{url}">{snippet}</a></div>'),
+    "bing": ('<li class="b_algo"><h2><a href="{url}">{title}</a></h2>'
+             '<div class="b_caption"><p>{snippet}</p></div></li>'),
+}
+
+PAGE_TEMPLATE = """<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8"><title>{query} - Startpage</title>
+<link rel="stylesheet" href="/static/serp.css"><script src="/static/serp.js"></script></head>
+<body><form action="/do/search"><input name="query" value="{query}"></form>
+{banner}<main>{blocks}</main></body></html>"""
+
+CONSENT_BANNER = """<div id="consent" class="cookie-banner"><p>Nous utilisons des cookies.</p>
+<button id="consent-accept" onclick="document.cookie='consent=1; path=/'; document.getElementById('consent').remove();
+if (document.body.dataset.wall) location.reload();">Accept</button></div>"""
+
+CONSENT_WALL = """<!DOCTYPE html><html><head><meta charset="utf-8"><title>Startpage</title></head>
+<body data-wall="1">{banner}</body></html>"""
+
+@dataclass
+class MockOptions:
+    variant: str = ""            # vide = variante tirée par requête (toutes les familles de sélecteurs)
+    results: int = 10            # blocs par page
+    match_rate: float = 0.7      # part des requêtes dont un profil cite l'entreprise
+    consent_rate: float = 0.1    # part des pages avec bandeau cookies (résultats visibles derrière)
+    consent_wall: bool = False   # sans cookie consent=1 : bandeau seul, aucun résultat
+    latency_ms: float = 0.0      # latence de base
+    slow_rate: float = 0.05      # part des réponses lentes
+    slow_ms: float = 1500.0
+    throttle_rate: float = 0.0   # part des requêtes refusées en 429 (1.0 = moteur bloqué)
+    pages_dir: str = ""          # pages Startpage enregistrées (*.html), servies à tour de rôle
+
+def _unit(seed: str, salt: str) -> float:
+    """Tirage déterministe dans [0, 1) : les mêmes requêtes donnent les mêmes pages d'un run à l'autre."""
+    digest = hashlib.sha1(f"{salt}:{seed}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+def company_from_query(query: str) -> str:
+    """'"intitulé" site:linkedin.com/in "Entreprise"' -> Entreprise."""
+    parts = query.split('"')
+    return parts[3] if len(parts) >= 5 else query
+
+def render_results(query: str, options: MockOptions) -> str:
+    company = company_from_query(query)
+    variant = options.variant or VARIANTS[int(_unit(query, "variant") * len(VARIANTS))]
+    template = BLOCK_TEMPLATES[variant]
+    hit = _unit(query, "match") < options.match_rate
+    slug = hashlib.sha1(company.encode("utf-8")).hexdigest()[:10]
+    blocks = []
+    for i in range(options.results):
+        if i == 2 and hit:
+            url = f"https://fr.linkedin.com/in/{slug}?trk=public_profile"
+            title = f"Jean Dupont - Responsable HSE - {company} | LinkedIn"
+            snippet = f"Responsable HSE chez {company}. Lyon, Auvergne-Rhône-Alpes."
+        elif i % 3 == 1:
+            url = f"https://fr.linkedin.com/in/autre-{slug}-{i}"
+            title = f"Marie Martin - Directrice QHSE - Autre Société {i}"
+            snippet = "Qualité, hygiène, sécurité, environnement."
+        else:
+            url = f"https://www.example.com/{slug}/{i}"
+            title = f"Résultat {i} pour {company}"
+            snippet = "Page sans rapport avec un profil."
+        if variant == "duckduckgo":   # liens enveloppés dans la redirection du moteur
+            url = "//duckduckgo.com/l/?uddg=" + urllib.parse.quote(url, safe="")
+        blocks.append(template.format(url=html.escape(url, quote=True), title=html.escape(title),
+                                      snippet=html.escape(snippet)))
+    banner = CONSENT_BANNER if _unit(query, "consent") < options.consent_rate else ""
+    return PAGE_TEMPLATE.format(query=html.escape(query), banner=banner, blocks="\n".join(blocks))
+
+class MockStartpageHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, comme le vrai site
+    disable_nagle_algorithm = True  # en-têtes et corps écrits séparément : sans ça, ~40 ms d'ACK retardé
+    server_version = "MockStartpage/1.0"
+
+    def do_GET(self):
+        options = self.server.options
+        parts = urllib.parse.urlsplit(self.path)
+        if parts.path.startswith("/static/"):
+            return self._send(200, "/* statique */", "text/css" if parts.path.endswith(".css") else "text/javascript")
+        if parts.path not in SEARCH_PATHS:
+            return self._send(404, "not found")
+        params = urllib.parse.parse_qs(parts.query)
+        query = (params.get("q") or params.get("query") or [""])[0]
+        self.server.count_request()
+        if options.throttle_rate and _unit(f"{query}:{self.server.requests}", "throttle") < options.throttle_rate:
+            return self._send(429, "Too Many Requests")
+
+        delay = options.latency_ms
+        if _unit(query, "slow") < options.slow_rate:
+            delay += options.slow_ms
+        if delay:
+            time.sleep(delay / 1000.0)
+
+        if options.consent_wall and "consent=1" not in (self.headers.get("Cookie") or ""):
+            return self._send(200, CONSENT_WALL.format(banner=CONSENT_BANNER))
+        if self.server.recorded_pages:
+            pages = self.server.recorded_pages
+            return self._send(200, pages[int(_unit(query, "page") * len(pages))])
+        return self._send(200, render_results(query, options))
+
+    def _send(self, status: int, body: str, content_type: str = "text/html"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+class MockStartpageServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, options: MockOptions):
+        super().__init__(address, MockStartpageHandler)
+        self.options = options
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.recorded_pages = []
+        if options.pages_dir:
+            for name in sorted(os.listdir(options.pages_dir)):
+                if name.lower().endswith((".html", ".htm")):
+                    with open(os.path.join(options.pages_dir, name), encoding="utf-8", errors="replace") as fh:
+                        self.recorded_pages.append(fh.read())
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    @property
+    def search_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/do/search?q="
+
+def start_mock_server(options: MockOptions = None, host: str = "127.0.0.1", port: int = 0) -> MockStartpageServer:
+    """Serveur en thread de fond ; port 0 = port libre. server.shutdown() pour l'arrêter."""
+    server = MockStartpageServer((host, port), options or MockOptions())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Faux Startpage local (benchmarks, essais hors ligne).")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--variant", default="", choices=("",) + VARIANTS + ENGINE_VARIANTS)
+    ap.add_argument("--match-rate", type=float, default=MockOptions.match_rate)
+    ap.add_argument("--consent-rate", type=float, default=MockOptions.consent_rate)
+    ap.add_argument("--consent-wall", action="store_true")
+    ap.add_argument("--latency-ms", type=float, default=MockOptions.latency_ms)
+    ap.add_argument("--slow-rate", type=float, default=MockOptions.slow_rate)
+    ap.add_argument("--slow-ms", type=float, default=MockOptions.slow_ms)
+    ap.add_argument("--throttle-rate", type=float, default=MockOptions.throttle_rate)
+    ap.add_argument("--pages-dir", default="", help="dossier de pages Startpage enregistrées (*.html)")
+    args = ap.parse_args(argv)
+    options = MockOptions(variant=args.variant, match_rate=args.match_rate, consent_rate=args.consent_rate,
+                          consent_wall=args.consent_wall, latency_ms=args.latency_ms, slow_rate=args.slow_rate,
+                          slow_ms=args.slow_ms, throttle_rate=args.throttle_rate, pages_dir=args.pages_dir)
+    server = MockStartpageServer((args.host, args.port), options)
+    print(f"Faux Startpage : {server.search_url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+
+# ========= Limiteur de cadence adaptatif (AIMD) =========
+# Un seul budget partagé par tous les workers d'un run (threads ou tâches asyncio).
+DEFAULT_INITIAL_QPM = 30.0
+DEFAULT_MIN_QPM = 4.0
+DEFAULT_MAX_QPM = 240.0
+FAST_INITIAL_QPM = 120.0
+FAST_MAX_QPM = 1200.0
+INCREASE_QPM = 2.0       # gain additif par succès
+BACKOFF_FACTOR = 0.5     # facteur multiplicatif sur signal de blocage
+BACKOFF_COOLDOWN = 5.0   # s : plusieurs signaux rapprochés (workers parallèles) = un seul recul
+SLEEP_SLICE = 0.25       # s : granularité d'attente pour rester réactif à l'arrêt
+
+class AdaptiveRateLimiter:
+    """acquire() avant chaque requête réseau ; on_success() / on_throttle(raison) après."""
+
+    def __init__(self, initial_qpm: float = DEFAULT_INITIAL_QPM, min_qpm: float = DEFAULT_MIN_QPM,
+                 max_qpm: float = DEFAULT_MAX_QPM):
+        self.min_qpm = max(0.1, float(min_qpm))
+        self.max_qpm = max(self.min_qpm, float(max_qpm))
+        self.qpm = min(self.max_qpm, max(self.min_qpm, float(initial_qpm)))
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._last_backoff = 0.0
+        self._started = None
+        self.requests = 0
+        self.successes = 0
+        self.throttles = {}
+
+    def reserve(self) -> float:
+        """Réserve le prochain créneau ; renvoie l'attente (s) avant de l'utiliser."""
+        with self._lock:
+            now = time.monotonic()
+            if self._started is None:
+                self._started = now
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 60.0 / self.qpm
+            self.requests += 1
+            return slot - now
+
+    def acquire(self, stop_event: threading.Event = None) -> bool:
+        """Attend son créneau ; False si l'arrêt est demandé entre-temps."""
+        deadline = time.monotonic() + self.reserve()
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return True
+            time.sleep(min(SLEEP_SLICE, remaining))
+
+    async def acquire_async(self, stop_event: threading.Event = None) -> bool:
+        deadline = time.monotonic() + self.reserve()
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return True
+            await asyncio.sleep(min(SLEEP_SLICE, remaining))
+
+    def on_success(self):
+        with self._lock:
+            self.successes += 1
+            self.qpm = min(self.max_qpm, self.qpm + INCREASE_QPM)
+
+    def on_throttle(self, reason: str):
+        with self._lock:
+            self.throttles[reason] = self.throttles.get(reason, 0) + 1
+            now = time.monotonic()
+            if now - self._last_backoff < BACKOFF_COOLDOWN:
+                return
+            self._last_backoff = now
+            self.qpm = max(self.min_qpm, self.qpm * BACKOFF_FACTOR)
+            # les créneaux déjà réservés au rythme précédent sont repoussés
+            self._next_slot = max(self._next_slot, now + 60.0 / self.qpm)
+
+    def effective_qpm(self) -> float:
+        with self._lock:
+            if self._started is None:
+                return 0.0
+            minutes = max((time.monotonic() - self._started) / 60.0, 1e-6)
+            return self.requests / minutes
+
+    def status(self) -> str:
+        return f"Cadence: {self.effective_qpm():.1f} req/min effectives (cible {self.qpm:.1f})"
+
+    def summary(self) -> str:
+        detail = ", ".join(f"{r}={n}" for r, n in sorted(self.throttles.items()))
+        return self.status() + f", {self.requests} requetes" + (f", reculs: {detail}" if detail else "")
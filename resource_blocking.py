@@ -0,0 +1,86 @@
+import threading
+import urllib.parse
+from dataclasses import dataclass
+
+# ========= Blocage des ressources (routage Playwright) =========
+# Seul le DOM de la page de résultats nous intéresse.
+DEFAULT_BLOCKED_TYPES = ("image", "media", "font", "stylesheet")
+DEFAULT_BLOCKED_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+    "googlesyndication.com", "facebook.net", "hotjar.com", "scorecardresearch.com",
+)
+DEFAULT_ALLOWED_DOMAINS = ()
+
+# Taille moyenne supposée d'une ressource bloquée (octets) : la requête est annulée avant toute réponse, sa taille
+# réelle (Content-Length) n'est jamais connue ; le total affiché est donc une estimation, présentée comme telle
+ESTIMATED_BYTES_BY_TYPE = {
+    "image": 25_000,
+    "media": 250_000,
+    "font": 40_000,
+    "stylesheet": 20_000,
+    "script": 30_000,
+}
+ESTIMATED_BYTES_OTHER = 5_000
+
+def host_matches(host: str, domains) -> bool:
+    host = (host or "").lower()
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+@dataclass(frozen=True)
+class BlockPolicy:
+    blocked_types: tuple = DEFAULT_BLOCKED_TYPES
+    blocked_domains: tuple = DEFAULT_BLOCKED_DOMAINS
+    allowed_domains: tuple = DEFAULT_ALLOWED_DOMAINS   # prioritaire sur les deux listes
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        host = urllib.parse.urlsplit(url).hostname or ""
+        if host_matches(host, self.allowed_domains):
+            return False
+        if host_matches(host, self.blocked_domains):
+            return True
+        return resource_type in self.blocked_types
+
+class BlockStats:
+    """Compteurs partagés entre workers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.bytes_estimated = 0
+        self.by_type = {}
+
+    def record(self, resource_type: str):
+        with self._lock:
+            self.requests += 1
+            self.bytes_estimated += ESTIMATED_BYTES_BY_TYPE.get(resource_type, ESTIMATED_BYTES_OTHER)
+            self.by_type[resource_type] = self.by_type.get(resource_type, 0) + 1
+
+    def summary(self) -> str:
+        detail = ", ".join(f"{t}={n}" for t, n in sorted(self.by_type.items()))
+        return (f"Ressources bloquees: {self.requests} requetes" + (f" ({detail})" if detail else "")
+                + f", ~{self.bytes_estimated / 1_000_000:.1f} Mo economises (estimation par type, non mesure)")
+
+    def counters(self) -> dict:
+        """Pour l'export des mesures ; le volume porte le suffixe _estimated (taille par type, non mesurée)."""
+        with self._lock:
+            return {"blocked_requests": self.requests, "blocked_bytes_estimated": self.bytes_estimated}
+
+def install_blocking(context, policy: BlockPolicy, stats: BlockStats):
+    def handler(route):
+        req = route.request
+        if policy.should_block(req.resource_type, req.url):
+            stats.record(req.resource_type)
+            route.abort()
+        else:
+            route.continue_()
+    context.route("**/*", handler)
+
+async def install_blocking_async(context, policy: BlockPolicy, stats: BlockStats):
+    async def handler(route):
+        req = route.request
+        if policy.should_block(req.resource_type, req.url):
+            stats.record(req.resource_type)
+            await route.abort()
+        else:
+            await route.continue_()
+    await context.route("**/*", handler)
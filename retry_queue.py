@@ -0,0 +1,61 @@
+import heapq
+import itertools
+import time
+
+# ========= Nouveaux essais différés =========
+# Une recherche qui n'aboutit pas (timeout, blocage, erreur) n'est pas un "pas de match" : elle est remise
+# dans une file à échéance et refaite après la passe principale, avec un délai qui double à chaque échec.
+DEFAULT_RETRY_ATTEMPTS = 3    # essais au total, le premier compris (1 = jamais de nouvel essai)
+DEFAULT_RETRY_DELAY = 30.0    # secondes avant le 2e essai ; doublé ensuite
+MAX_RETRY_DELAY = 600.0
+
+class SearchFailed:
+    """Issue d'une recherche sans réponse exploitable (à réessayer), par opposition à None (pas de profil)."""
+
+    def __init__(self, reason: str):
+        self.reason = reason
+
+    def __repr__(self):
+        return f"SearchFailed({self.reason!r})"
+
+class RetryQueue:
+    """File de priorité (échéance) des jobs échoués ; au plus `max_attempts` essais par job."""
+
+    def __init__(self, max_attempts: int = DEFAULT_RETRY_ATTEMPTS, base_delay: float = DEFAULT_RETRY_DELAY,
+                 max_delay: float = MAX_RETRY_DELAY):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = max(0.0, float(base_delay))
+        self.max_delay = max_delay
+        self.failures = {}   # job -> échecs
+        self.scheduled = 0
+        self._heap = []
+        self._seq = itertools.count()   # départage des échéances égales (jobs non comparables)
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule(self, job):
+        """Délai avant le prochain essai, ou None si le job a épuisé ses essais."""
+        failures = self.failures.get(job, 0) + 1
+        self.failures[job] = failures
+        if failures >= self.max_attempts:
+            return None
+        delay = min(self.max_delay, self.base_delay * 2 ** (failures - 1))
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), job))
+        self.scheduled += 1
+        return delay
+
+    def attempts(self, job) -> int:
+        """Essais déjà faits pour ce job (0 s'il n'a jamais échoué)."""
+        return self.failures.get(job, 0)
+
+    def next_due_in(self) -> float:
+        return max(0.0, self._heap[0][0] - time.monotonic()) if self._heap else 0.0
+
+    def pop_due(self) -> list:
+        """Jobs arrivés à échéance, dans l'ordre des échéances."""
+        now = time.monotonic()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[2])
+        return due
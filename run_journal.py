@@ -0,0 +1,92 @@
+import json
+import os
+import time
+
+# ========= Journal de reprise =========
+JOURNAL_SUFFIX = ".journal.jsonl"
+LEGACY_COLUMN = 2   # entrées sans "col" (un seul intitulé) : colonne B
+
+def journal_path_for(excel_path: str) -> str:
+    """icpe_details.xlsx -> icpe_details.journal.jsonl (même dossier)."""
+    root, _ = os.path.splitext(excel_path)
+    return root + JOURNAL_SUFFIX
+
+class RunJournal:
+    """Une ligne JSON par ligne traitée (trouvée ou non), écrite avec fsync."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = None
+
+    def replay(self) -> dict:
+        """{(row, col): (entreprise, url|None)} ; la dernière entrée d'une cellule l'emporte.
+        Une dernière ligne tronquée (crash pendant l'écriture) est ignorée."""
+        done = {}
+        if not os.path.isfile(self.path):
+            return done
+        with open(self.path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                    key = (int(entry["row"]), int(entry.get("col", LEGACY_COLUMN)))
+                    done[key] = (entry.get("company") or "", entry.get("url"))
+                except (ValueError, KeyError, TypeError):
+                    continue
+        return done
+
+    def open(self, reset: bool = False):
+        if not reset:
+            self._drop_partial_line()
+        self._fh = open(self.path, "w" if reset else "a", encoding="utf-8")
+
+    def _drop_partial_line(self):
+        """Tronque une dernière ligne sans fin de ligne (crash pendant l'écriture) : l'entrée suivante
+        serait sinon collée à ce fragment, et perdue au replay avec lui."""
+        try:
+            with open(self.path, "rb+") as fh:
+                size = fh.seek(0, os.SEEK_END)
+                if not size:
+                    return
+                fh.seek(size - 1)
+                if fh.read(1) == b"\n":
+                    return
+                end = size
+                while end > 0:
+                    start = max(0, end - 65536)
+                    fh.seek(start)
+                    chunk = fh.read(end - start)
+                    pos = chunk.rfind(b"\n")
+                    if pos >= 0:
+                        fh.truncate(start + pos + 1)
+                        return
+                    end = start
+                fh.truncate(0)
+        except FileNotFoundError:
+            pass
+
+    def append(self, row: int, company: str, url, col: int = LEGACY_COLUMN):
+        self.extend([(row, company, url, col)])
+
+    def extend(self, entries):
+        """[(row, company, url, col), ...] écrits puis synchronisés en une fois."""
+        if self._fh is None:
+            self.open()
+        now = round(time.time(), 3)
+        for row, company, url, col in entries:
+            entry = {"row": row, "col": col, "company": company, "url": url, "t": now}
+            self._fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def discard(self):
+        """Run terminé : le journal n'a plus d'utilité."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
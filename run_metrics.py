@@ -0,0 +1,107 @@
+import contextlib
+import json
+import math
+import os
+import threading
+import time
+
+# ========= Mesures par phase =========
+METRICS_JSON_SUFFIX = ".metrics.json"
+METRICS_PROM_SUFFIX = ".metrics.prom"
+PROM_PREFIX = "scraper"
+QUANTILES = (0.5, 0.95)
+
+def metrics_paths_for(results_path: str):
+    """icpe_details.xlsx -> (icpe_details.metrics.json, icpe_details.metrics.prom)."""
+    root, _ = os.path.splitext(results_path)
+    return root + METRICS_JSON_SUFFIX, root + METRICS_PROM_SUFFIX
+
+def percentile(sorted_values, q: float) -> float:
+    """Rang le plus proche sur une liste déjà triée (0.0 si vide)."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+class RunMetrics:
+    """Durées par phase (partagées entre workers, threads ou tâches asyncio) + compteurs de fin de run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}   # phase -> [secondes, ...] dans l'ordre d'enregistrement
+        self.counters = {}
+
+    def record(self, phase: str, seconds: float):
+        with self._lock:
+            self.samples.setdefault(phase, []).append(seconds)
+
+    @contextlib.contextmanager
+    def span(self, phase: str):
+        """with metrics.span("goto"): ... ; utilisable autour d'un await."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start)
+
+    def set_counter(self, name: str, value):
+        with self._lock:
+            self.counters[name] = value
+
+    def stats(self) -> dict:
+        """{phase: {count, total, p50, p95, max}} en secondes."""
+        with self._lock:
+            samples = {phase: sorted(values) for phase, values in self.samples.items()}
+        out = {}
+        for phase, values in samples.items():
+            out[phase] = {
+                "count": len(values),
+                "total": sum(values),
+                "p50": percentile(values, 0.5),
+                "p95": percentile(values, 0.95),
+                "max": values[-1] if values else 0.0,
+            }
+        return out
+
+    def summary_lines(self):
+        lines = []
+        for phase, s in self.stats().items():
+            lines.append(f"  {phase:<16} n={s['count']:<6} p50={s['p50'] * 1000:8.1f} ms  "
+                         f"p95={s['p95'] * 1000:8.1f} ms  max={s['max'] * 1000:8.1f} ms  "
+                         f"total={s['total']:.1f} s")
+        return lines
+
+    def to_json(self) -> dict:
+        return {"generated_at": round(time.time(), 3), "phases": self.stats(), "counters": dict(self.counters)}
+
+    def to_prometheus(self) -> str:
+        """Format texte Prometheus (exposition) : un summary par phase + une jauge max + les compteurs."""
+        stats = self.stats()
+        name = f"{PROM_PREFIX}_phase_seconds"
+        lines = [f"# HELP {name} Duree des phases du scraper (dernier run).", f"# TYPE {name} summary"]
+        for phase, s in stats.items():
+            for q in QUANTILES:
+                lines.append(f'{name}{{phase="{phase}",quantile="{q}"}} {s[f"p{round(q * 100)}"]:.6f}')
+            lines.append(f'{name}_sum{{phase="{phase}"}} {s["total"]:.6f}')
+            lines.append(f'{name}_count{{phase="{phase}"}} {s["count"]}')
+        max_name = f"{PROM_PREFIX}_phase_max_seconds"
+        lines += [f"# HELP {max_name} Duree maximale par phase (dernier run).", f"# TYPE {max_name} gauge"]
+        for phase, s in stats.items():
+            lines.append(f'{max_name}{{phase="{phase}"}} {s["max"]:.6f}')
+        for counter, value in sorted(self.counters.items()):
+            metric = f"{PROM_PREFIX}_{counter}"
+            lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def export(self, json_path: str, prom_path: str):
+        """Écriture atomique (fichier temporaire + rename) : un scrape ne lit jamais un fichier à moitié écrit."""
+        for path, text in ((json_path, json.dumps(self.to_json(), indent=2, ensure_ascii=False)),
+                           (prom_path, self.to_prometheus())):
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                fh.write(text)
+            os.replace(tmp, path)
+
+def span(metrics, phase: str):
+    """metrics.span(phase), ou rien si les mesures sont désactivées (metrics=None)."""
+    return metrics.span(phase) if metrics is not None else contextlib.nullcontext()
@@ -0,0 +1,333 @@
+"""Benchmark hors ligne : python scraper_bench.py [--sizes 100,10000,100000] [--cases scrape,grid,startup]
+
+Chaque mesure tourne dans un sous-process (RSS max propre à la mesure) contre le faux Startpage
+(mock_startpage.py). Les résultats sont ajoutés à bench_results.jsonl avec le commit courant ;
+python scraper_bench.py --compare affiche l'écart entre les deux derniers runs (ou deux commits)."""
+import argparse
+import json
+import os
+import platform
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import openpyxl
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUTS_DIR = os.path.join(BENCH_DIR, "bench_inputs")
+RESULTS_FILE = os.path.join(BENCH_DIR, "bench_results.jsonl")
+DEFAULT_SIZES = (100, 10_000, 100_000)
+CASES = ("scrape", "grid", "startup")
+BENCH_QPM = 10_000_000.0   # limiteur de cadence neutralisé : on mesure la boucle, pas la politesse
+LEGAL_FORMS = ("SAS", "SA", "SARL", "", "", "")
+
+# ========= Entrées =========
+def input_path(rows: int) -> str:
+    return os.path.join(INPUTS_DIR, f"bench_{rows}.xlsx")
+
+def generate_input(rows: int, sheet_name: str, job_title: str) -> str:
+    """bench_inputs/bench_<rows>.xlsx (mode write_only), généré une fois puis réutilisé."""
+    path = input_path(rows)
+    if os.path.isfile(path):
+        return path
+    os.makedirs(INPUTS_DIR, exist_ok=True)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    ws.append(["entreprise", job_title])
+    for i in range(rows):
+        ws.append([f"Entreprise {i:06d} {LEGAL_FORMS[i % len(LEGAL_FORMS)]}".strip(), None])
+    tmp = path + ".tmp.xlsx"
+    wb.save(tmp)
+    os.replace(tmp, path)
+    return path
+
+# ========= Mesures (sous-process) =========
+def peak_rss_bytes():
+    try:
+        import resource
+    except ImportError:   # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+def bench_scrape(work: str, args) -> dict:
+    from scraper_engine import RunConfig, run_scraper
+    from run_metrics import metrics_paths_for
+    cfg = RunConfig(
+        excel_path=work, sheet_name=args.sheet, job_title=args.job_title, headless=True, fast=False,
+        test_mode=False, workers=args.workers, engine=args.engine, cache_mode="off", backend=args.backend,
+        search_url=args.search_url, rate_initial_qpm=BENCH_QPM, rate_min_qpm=BENCH_QPM, rate_max_qpm=BENCH_QPM,
+    )
+    log_q, update_q = queue.Queue(), queue.Queue()
+    start = time.perf_counter()
+    run_scraper(cfg, threading.Event(), log_q, update_q)
+    elapsed = time.perf_counter() - start
+    with open(metrics_paths_for(work)[0], encoding="utf-8") as fh:
+        metrics = json.load(fh)
+    phases, counters = metrics["phases"], metrics["counters"]
+    fetch = phases.get("fetch", {})
+    processed = counters.get("companies_processed", 0)
+    return {
+        "seconds": elapsed,
+        "companies": processed,
+        "companies_per_s": processed / elapsed if elapsed else 0.0,
+        "urls_found": counters.get("urls_found", 0),
+        "latency_p50_ms": fetch.get("p50", 0.0) * 1000,
+        "latency_p95_ms": fetch.get("p95", 0.0) * 1000,
+        "latency_max_ms": fetch.get("max", 0.0) * 1000,
+        "read_sheet_s": phases.get("read_sheet", {}).get("total", 0.0),
+        "save_xlsx_s": phases.get("save_xlsx", {}).get("total", 0.0),
+        "journal_s": phases.get("journal_append", {}).get("total", 0.0),
+    }
+
+def bench_grid(work: str, args) -> dict:
+    """load_sheet_to_grid / save_grid_to_excel de l'interface ; sans affichage, leurs équivalents moteur."""
+    try:
+        from tkinter import Tk
+        root = Tk()
+    except Exception:
+        root = None
+    if root is None:
+        from scraper_engine import iter_sheet_rows, write_grid_to_workbook, RunJournal, journal_path_for
+        start = time.perf_counter()
+        RunJournal(journal_path_for(work)).replay()
+        rows = [(company, *urls) for _, company, urls in iter_sheet_rows(work, args.sheet)]
+        load = time.perf_counter() - start
+        start = time.perf_counter()
+        write_grid_to_workbook(work, args.sheet, args.job_title, rows)
+        save = time.perf_counter() - start
+        return {"mode": "headless", "rows": len(rows), "load_s": load, "save_s": save}
+
+    from gui_scraper import App
+    root.withdraw()
+    app = App(root)
+    app.excel_path = work
+    app.sheet_name.set(args.sheet)
+    start = time.perf_counter()
+    app.load_sheet_to_grid(background=False)
+    root.update_idletasks()
+    load = time.perf_counter() - start
+    start = time.perf_counter()
+    app.save_grid_to_excel()
+    save = time.perf_counter() - start
+    rows = len(app.tree.get_children())
+    root.destroy()
+    return {"mode": "tk", "rows": rows, "load_s": load, "save_s": save}
+
+# Interpréteur neuf : import de l'interface, fenêtre affichée, grille remplie (ces deux-là seulement avec écran)
+STARTUP_SCRIPT = """
+import json, os, sys, time
+t0 = time.perf_counter()
+import gui_scraper
+out = {"import_s": time.perf_counter() - t0}
+try:
+    from tkinter import Tk
+    root = Tk()
+except Exception:
+    root = None
+if root is not None:
+    gui_scraper.APP_DIR, gui_scraper.EXPECTED_XLSX_NAME = os.path.split(sys.argv[1])
+    app = gui_scraper.App(root)
+    root.update()
+    out["window_s"] = time.perf_counter() - t0
+    while app.loading:
+        root.update()
+        time.sleep(0.005)
+    out["ready_s"] = time.perf_counter() - t0
+    root.destroy()
+print(json.dumps(out))
+"""
+STARTUP_RUNS = 3   # meilleure de N mesures (cache disque chaud)
+
+def bench_startup(work: str, args) -> dict:
+    best = {}
+    for _ in range(STARTUP_RUNS):
+        proc = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, work], cwd=BENCH_DIR, capture_output=True,
+                              text=True, check=True)
+        for key, value in json.loads(proc.stdout.strip().splitlines()[-1]).items():
+            best[key] = min(value, best.get(key, value))
+    best["mode"] = "tk" if "window_s" in best else "headless"
+    return best
+
+def run_child(args) -> int:
+    """Une mesure sur une copie de l'entrée ; une ligne JSON sur stdout."""
+    tmpdir = tempfile.mkdtemp(prefix="scraper_bench_")
+    try:
+        from working_store import DEFAULT_STORE_EXTENSION, STORE_XLSX, convert_store
+        work = os.path.join(tmpdir, "work" + DEFAULT_STORE_EXTENSION[args.store])
+        if args.store == STORE_XLSX:
+            shutil.copyfile(args.input, work)
+        else:
+            convert_store(args.input, work, args.sheet)   # conversion hors mesure
+        bench = {"scrape": bench_scrape, "grid": bench_grid, "startup": bench_startup}[args.child]
+        result = bench(work, args)
+        result["peak_rss_mb"] = (peak_rss_bytes() or 0) / 2 ** 20 or None
+        sys.stdout.write(json.dumps(result) + "\n")
+        return 0
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+# ========= Orchestration =========
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True,
+                             text=True, timeout=10)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BENCH_DIR,
+                               capture_output=True, text=True, timeout=30)
+        return out.stdout.strip() or None, bool(dirty.stdout.strip())
+    except Exception:
+        return None, None
+
+def child_argv(args, case: str, path: str, search_url: str):
+    return [sys.executable, os.path.abspath(__file__), "--child", case, "--input", path,
+            "--search-url", search_url, "--sheet", args.sheet, "--job-title", args.job_title,
+            "--workers", str(args.workers), "--engine", args.engine, "--backend", args.backend,
+            "--store", args.store]
+
+def run_benchmarks(args) -> dict:
+    from mock_startpage import MockOptions, start_mock_server
+
+    options = MockOptions(variant=args.variant, consent_rate=args.consent_rate, latency_ms=args.latency_ms,
+                          slow_rate=args.slow_rate, slow_ms=args.slow_ms)
+    server = start_mock_server(options)
+    commit, dirty = git_commit()
+    record = {
+        "commit": commit, "dirty": dirty, "t": round(time.time(), 3),
+        "python": platform.python_version(), "platform": platform.platform(),
+        "options": {"workers": args.workers, "engine": args.engine, "backend": args.backend, "store": args.store,
+                    "variant": args.variant or "mix", "consent_rate": args.consent_rate,
+                    "latency_ms": args.latency_ms, "slow_rate": args.slow_rate, "slow_ms": args.slow_ms},
+        "results": [],
+    }
+    try:
+        for rows in args.sizes:
+            path = generate_input(rows, args.sheet, args.job_title)
+            for case in args.cases:
+                print(f"[bench] {case} {rows} lignes...", file=sys.stderr, flush=True)
+                before = server.requests
+                proc = subprocess.run(child_argv(args, case, path, server.search_url), capture_output=True,
+                                      text=True)
+                entry = {"case": case, "rows": rows}
+                if proc.returncode == 0 and proc.stdout.strip():
+                    entry.update(json.loads(proc.stdout.strip().splitlines()[-1]))
+                    if case == "scrape":
+                        entry["server_requests"] = server.requests - before
+                else:
+                    entry["error"] = (proc.stderr or "").strip()[-500:]
+                record["results"].append(entry)
+    finally:
+        server.shutdown()
+        server.server_close()
+    return record
+
+# ========= Rapport =========
+def fmt(value, spec=".2f"):
+    return "-" if value is None else format(value, spec)
+
+def print_record(record):
+    label = f"{record.get('commit') or '?'}{'+' if record.get('dirty') else ''}"
+    print(f"Commit {label}  •  {record['options']}")
+    for r in record["results"]:
+        if "error" in r:
+            print(f"  {r['case']:<7}{r['rows']:>8}  ERREUR {r['error']}")
+        elif r["case"] == "scrape":
+            print(f"  scrape {r['rows']:>8}  {fmt(r['companies_per_s'], '.1f'):>9} ent/s  "
+                  f"p50 {fmt(r['latency_p50_ms'], '.1f')} ms  p95 {fmt(r['latency_p95_ms'], '.1f')} ms  "
+                  f"max {fmt(r['latency_max_ms'], '.1f')} ms  lecture {fmt(r['read_sheet_s'])} s  "
+                  f"sauvegarde {fmt(r['save_xlsx_s'])} s  RSS {fmt(r['peak_rss_mb'], '.0f')} Mo")
+        elif r["case"] == "startup":
+            print(f"  startup{r['rows']:>8}  ({r['mode']})  import {fmt(r['import_s'])} s  "
+                  f"fenetre {fmt(r.get('window_s'))} s  grille prete {fmt(r.get('ready_s'))} s  "
+                  f"RSS {fmt(r['peak_rss_mb'], '.0f')} Mo")
+        else:
+            print(f"  grid   {r['rows']:>8}  ({r['mode']})  chargement {fmt(r['load_s'])} s  "
+                  f"sauvegarde {fmt(r['save_s'])} s  RSS {fmt(r['peak_rss_mb'], '.0f')} Mo")
+
+def load_records(path: str):
+    records = []
+    if os.path.isfile(path):
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    return records
+
+COMPARED = {"scrape": ("companies_per_s", "latency_p95_ms", "read_sheet_s", "save_xlsx_s", "peak_rss_mb"),
+            "grid": ("load_s", "save_s", "peak_rss_mb"),
+            "startup": ("import_s", "window_s", "ready_s")}
+
+def compare(records, base_ref=None, new_ref=None):
+    """Écart (%) entre deux runs : les deux derniers, ou les derniers runs des commits donnés."""
+    def pick(ref, exclude=None):
+        for rec in reversed(records):
+            if rec is not exclude and (ref is None or (rec.get("commit") or "").startswith(ref)):
+                return rec
+        return None
+    new = pick(new_ref)
+    base = pick(base_ref, exclude=new)
+    if base is None or new is None:
+        print("Pas assez de runs enregistres pour comparer.")
+        return
+    print(f"{base.get('commit')} -> {new.get('commit')}")
+    base_results = {(r["case"], r["rows"]): r for r in base["results"]}
+    for r in new["results"]:
+        b = base_results.get((r["case"], r["rows"]))
+        if b is None or "error" in r or "error" in b:
+            continue
+        parts = []
+        for key in COMPARED[r["case"]]:
+            old, cur = b.get(key), r.get(key)
+            if old and cur is not None:
+                parts.append(f"{key} {old:.2f} -> {cur:.2f} ({(cur - old) / old * 100:+.1f}%)")
+        print(f"  {r['case']:<7}{r['rows']:>8}  " + "  ".join(parts))
+
+def build_parser():
+    from scraper_engine import DEFAULT_SHEET_NAME, DEFAULT_JOB_TITLE, MAX_WORKERS, DEFAULT_ENGINE, BACKEND_HTTP
+    from working_store import STORE_XLSX, WORKING_STORES
+    ap = argparse.ArgumentParser(description="Benchmark hors ligne du scraper (faux Startpage local).")
+    ap.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                    type=lambda s: [int(x) for x in s.split(",") if x.strip()])
+    ap.add_argument("--cases", default=",".join(CASES),
+                    type=lambda s: [x.strip() for x in s.split(",") if x.strip() in CASES])
+    ap.add_argument("--workers", type=int, default=4, choices=range(1, MAX_WORKERS + 1), metavar=f"1..{MAX_WORKERS}")
+    ap.add_argument("--engine", default=DEFAULT_ENGINE)
+    ap.add_argument("--backend", default=BACKEND_HTTP)
+    ap.add_argument("--store", default=STORE_XLSX, choices=WORKING_STORES,
+                    help="fichier de travail mesuré (l'entrée xlsx est convertie hors mesure)")
+    ap.add_argument("--sheet", default=DEFAULT_SHEET_NAME)
+    ap.add_argument("--job-title", default=DEFAULT_JOB_TITLE)
+    ap.add_argument("--variant", default="", help="famille de sélecteurs imposée (défaut : mélange)")
+    ap.add_argument("--consent-rate", type=float, default=0.1)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--slow-rate", type=float, default=0.01)
+    ap.add_argument("--slow-ms", type=float, default=300.0)
+    ap.add_argument("--results", default=RESULTS_FILE, help="fichier JSONL des runs (comparaison entre commits)")
+    ap.add_argument("--compare", nargs="*", metavar="COMMIT",
+                    help="compare deux runs enregistrés (défaut : les deux derniers) et quitte")
+    ap.add_argument("--child", choices=CASES, help=argparse.SUPPRESS)
+    ap.add_argument("--input", help=argparse.SUPPRESS)
+    ap.add_argument("--search-url", help=argparse.SUPPRESS)
+    return ap
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.child:
+        return run_child(args)
+    if args.compare is not None:
+        refs = list(args.compare) + [None, None]
+        compare(load_records(args.results), refs[0], refs[1])
+        return 0
+    record = run_benchmarks(args)
+    with open(args.results, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+    print_record(record)
+    return 1 if any("error" in r for r in record["results"]) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
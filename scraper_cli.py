@@ -0,0 +1,372 @@
+"""Mode batch sans interface : python scraper_cli.py --input entreprises.csv --output resultats.csv
+
+N'importe jamais tkinter (serveurs Linux, conteneurs minimaux, planificateurs)."""
+import argparse
+import csv
+import json
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from scraper_engine import (
+    DEFAULT_SHEET_NAME, DEFAULT_JOB_TITLE, DEFAULT_WORKERS, MAX_WORKERS,
+    ENGINE_ASYNC, ENGINE_SYNC, DEFAULT_ENGINE,
+    STARTPAGE_SEARCH_URL, RunConfig, run_scraper, iter_sheet_rows, merge_shards_into_workbook,
+    merge_journal_into_workbook, journal_path_for, build_query,
+    parse_job_titles, result_column, DEFAULT_RECYCLE_QUERIES, DEFAULT_RECYCLE_MEMORY_MB,
+)
+from run_metrics import RunMetrics, metrics_paths_for
+from sharding import shard_results_path
+from serp_archive import ARCHIVE_FILENAME, SerpArchive
+from retry_queue import DEFAULT_RETRY_ATTEMPTS, DEFAULT_RETRY_DELAY
+from search_backends import BACKENDS, BACKEND_HTTP
+from resource_blocking import DEFAULT_BLOCKED_TYPES, DEFAULT_BLOCKED_DOMAINS, DEFAULT_ALLOWED_DOMAINS
+from search_cache import CACHE_OFF, CACHE_USE, CACHE_REFRESH_STALE
+from search_engines import ENGINES, resolve_engines
+from working_store import (
+    STORE_XLSX, WORKING_STORES, WORKING_EXTENSIONS, DEFAULT_STORE_EXTENSION, STORE_EXTENSIONS, create_store,
+    convert_store,
+)
+
+# ========= Entrées =========
+def read_companies_csv(fh):
+    """Première colonne de chaque ligne ; un en-tête 'entreprise' est ignoré."""
+    for i, rec in enumerate(csv.reader(fh)):
+        name = (rec[0] if rec else "").strip()
+        if i == 0 and name.lower() == "entreprise":
+            continue
+        if name:
+            yield name
+
+def companies_to_store(companies, path: str, sheet_name: str, job_titles):
+    """Fichier de travail (xlsx en mode write_only, ou SQLite) pour les entrées CSV / stdin, écrit en streaming :
+    une colonne par intitulé."""
+    create_store(path, sheet_name, job_titles, ((name,) for name in companies))
+
+def prepare_workbook(args) -> str:
+    """Chemin du fichier de travail (xlsx ou SQLite) sur lequel tourne le run."""
+    if args.input != "-" and args.input.lower().endswith(WORKING_EXTENSIONS):
+        return args.input
+    suffix = DEFAULT_STORE_EXTENSION[args.store]
+    if args.input == "-":
+        work = args.work
+        companies_to_store(read_companies_csv(sys.stdin), work, args.sheet, job_titles_of(args))
+    else:
+        work = args.work or os.path.splitext(args.input)[0] + suffix
+        with open(args.input, newline="", encoding="utf-8-sig") as fh:
+            companies_to_store(read_companies_csv(fh), work, args.sheet, job_titles_of(args))
+    return work
+
+def export_store(args, excel_path: str):
+    """--export : copie du fichier de travail en xlsx, SQLite ou CSV (streaming)."""
+    if args.export:
+        rows = convert_store(excel_path, args.export, args.sheet)
+        emit("export", path=args.export, rows=rows)
+
+def split_list(text: str) -> tuple:
+    return tuple(item.strip().lower() for item in (text or "").split(",") if item.strip())
+
+def job_titles_of(args) -> tuple:
+    """--job-title répétable, et/ou "A; B" dans une seule valeur."""
+    titles = parse_job_titles(t for value in (args.job_title or ()) for t in parse_job_titles(value))
+    return titles or (DEFAULT_JOB_TITLE,)
+
+# ========= Sortie =========
+def emit(event: str, **fields):
+    line = {"t": round(time.time(), 3), "event": event}
+    line.update(fields)
+    sys.stdout.write(json.dumps(line, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+def build_parser():
+    ap = argparse.ArgumentParser(description="Scraper LinkedIn (Startpage) en mode batch.")
+    ap.add_argument("--input", "-i", required=True,
+                    help="xlsx, sqlite3, csv, ou '-' pour stdin (une entreprise par ligne)")
+    ap.add_argument("--output", "-o",
+                    help="CSV de résultats écrit au fil de l'eau (row, entreprise, [intitule,] url)")
+    ap.add_argument("--work", help="fichier de travail (.xlsx ou .sqlite3) pour les entrées csv/stdin ; sans --work, "
+                                   "stdin tourne dans un dossier temporaire supprimé en fin de run (cache compris)")
+    ap.add_argument("--store", default=STORE_XLSX, choices=WORKING_STORES,
+                    help="type du fichier de travail créé pour les entrées csv/stdin sans --work "
+                         "(sqlite : lecture / écriture par ligne, pour les gros volumes)")
+    ap.add_argument("--export", metavar="FICHIER",
+                    help="en fin de run, copie le fichier de travail vers un .xlsx, .sqlite3 ou .csv")
+    ap.add_argument("--sheet", default=DEFAULT_SHEET_NAME)
+    ap.add_argument("--job-title", action="append",
+                    help=f"intitulé recherché, répétable : une colonne de résultats par intitulé "
+                         f"(défaut : {DEFAULT_JOB_TITLE})")
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS, choices=range(1, MAX_WORKERS + 1),
+                    metavar=f"1..{MAX_WORKERS}")
+    ap.add_argument("--engine", default=DEFAULT_ENGINE, choices=(ENGINE_ASYNC, ENGINE_SYNC))
+    ap.add_argument("--backend", default=BACKEND_HTTP, choices=BACKENDS)
+    ap.add_argument("--search-url", default=STARTPAGE_SEARCH_URL,
+                    help="URL de recherche Startpage (ex. serveur local de test)")
+    ap.add_argument("--search-engine", action="append", metavar="MOTEUR[=URL]",
+                    help=f"moteur de recherche, répétable, par priorité ({', '.join(ENGINES)}) ; "
+                         f"plusieurs moteurs = bascule automatique quand l'un est bloqué (défaut : startpage)")
+    ap.add_argument("--cache", default=CACHE_USE, choices=(CACHE_USE, CACHE_REFRESH_STALE, CACHE_OFF))
+    ap.add_argument("--resume", action="store_true")
+    ap.add_argument("--headed", action="store_true", help="navigateur visible")
+    ap.add_argument("--fast", action="store_true")
+    ap.add_argument("--test", action="store_true", help="10 premières entreprises")
+    ap.add_argument("--no-block", action="store_true", help="ne pas bloquer images/CSS/trackers")
+    ap.add_argument("--block-types", default=",".join(DEFAULT_BLOCKED_TYPES),
+                    help="types de ressources bloqués, séparés par des virgules (image, media, font, stylesheet...)")
+    ap.add_argument("--block-domains", default=",".join(DEFAULT_BLOCKED_DOMAINS),
+                    help="domaines bloqués (sous-domaines compris), séparés par des virgules")
+    ap.add_argument("--allow-domains", default=",".join(DEFAULT_ALLOWED_DOMAINS),
+                    help="domaines jamais bloqués, prioritaires sur les deux listes précédentes")
+    ap.add_argument("--pipeline", action="store_true",
+                    help="2 pages par worker : la recherche suivante charge pendant le traitement de la courante "
+                         "(backend browser)")
+    ap.add_argument("--no-archive", action="store_true",
+                    help="ne pas archiver les pages de résultats (serp_archive.sqlite3, utilisée par --rematch)")
+    ap.add_argument("--archive-path", default="", help="archive des pages de résultats ; défaut : à côté du xlsx")
+    ap.add_argument("--rematch", action="store_true",
+                    help="aucune recherche : rejoue la correspondance entreprise / profil sur l'archive "
+                         "et met à jour le fichier de travail")
+    ap.add_argument("--rematch-clear", action="store_true",
+                    help="avec --rematch : efface les URLs que la page archivée ne justifie plus")
+    ap.add_argument("--retry-attempts", type=int, default=DEFAULT_RETRY_ATTEMPTS,
+                    help="essais par recherche en échec (timeout, blocage, erreur), refaits après la passe "
+                         "principale ; 1 = aucun nouvel essai")
+    ap.add_argument("--retry-delay", type=float, default=DEFAULT_RETRY_DELAY,
+                    help="secondes avant le 2e essai, doublées à chaque échec")
+    ap.add_argument("--no-persist-storage", action="store_true",
+                    help="ne pas réutiliser / sauvegarder cookies et consentement (browser_state.json)")
+    ap.add_argument("--recycle-queries", type=int, default=DEFAULT_RECYCLE_QUERIES,
+                    help="recrée contexte et page après N requêtes (0 = jamais)")
+    ap.add_argument("--recycle-memory-mb", type=float, default=DEFAULT_RECYCLE_MEMORY_MB,
+                    help="... ou quand le tas JS de la page dépasse cette taille (0 = pas de contrôle)")
+    ap.add_argument("--metrics-path", default="",
+                    help="base des fichiers de mesures (.metrics.json / .metrics.prom) ; défaut : à côté du xlsx")
+    ap.add_argument("--no-metrics", action="store_true", help="ne pas exporter les mesures par phase")
+    ap.add_argument("--shard-index", type=int, default=0, help="shard traité par ce process (0..N-1)")
+    ap.add_argument("--shard-count", type=int, default=1, help="nombre total de shards")
+    ap.add_argument("--processes", type=int, default=0,
+                    help="lance N shards en sous-process sur cette machine puis fusionne")
+    ap.add_argument("--show-archive", metavar="ENTREPRISE",
+                    help="affiche les pages archivées (rang, url, titre, extrait, moteur, date) de cette entreprise "
+                         "pour chaque intitulé, sans recherche, et quitte")
+    ap.add_argument("--merge-journal", action="store_true",
+                    help="reporte le journal d'un run interrompu (*.journal.jsonl) dans le fichier d'entrée et quitte")
+    ap.add_argument("--merge-shards", action="store_true",
+                    help="fusionne les fichiers *.shard-*-of-N.jsonl dans le fichier d'entrée et quitte "
+                         "(N = --shard-count, sinon le découpage le plus récent)")
+    return ap
+
+def show_archive(args) -> int:
+    """--show-archive : un événement "archive" par intitulé, avec les blocs archivés de la requête du run."""
+    path = args.archive_path or os.path.join(os.path.dirname(os.path.abspath(args.input)), ARCHIVE_FILENAME)
+    if not os.path.isfile(path):
+        emit("log", message=f"Archive introuvable: {path}")
+        return 1
+    archive = SerpArchive(path)
+    try:
+        for title in job_titles_of(args):
+            query = build_query(args.show_archive.strip(), title)
+            emit("archive", company=args.show_archive, job_title=title, query=query, blocks=archive.records(query))
+    finally:
+        archive.close()
+    return 0
+
+def run_local_shards(args, argv, excel_path: str) -> int:
+    """Un sous-process par shard (même ligne de commande + --shard-index), puis fusion.
+    Pas de --output, --export ni --metrics-path dans les shards : chacun écrit ses propres fichiers
+    (résultats, mesures à côté du fichier de shard) ; export et mesures globales une seule fois, après fusion."""
+    base = argv_without(argv, ("--processes", "--input", "-i", "--work", "--output", "-o",
+                               "--shard-index", "--shard-count", "--export", "--metrics-path"))
+    metrics = RunMetrics()
+    procs = []
+    with metrics.span("shards_total"):
+        for i in range(args.processes):
+            cmd = [sys.executable, os.path.abspath(__file__), "--input", excel_path,
+                   "--shard-index", str(i), "--shard-count", str(args.processes)] + base
+            procs.append(subprocess.Popen(cmd))
+        codes = [p.wait() for p in procs]
+    with metrics.span("merge"):
+        rows, urls = merge_shards_into_workbook(excel_path, args.sheet, job_titles_of(args),
+                                                shard_count=args.processes)
+    emit("merge", excel=excel_path, rows=rows, urls=urls, exit_codes=codes)
+    export_store(args, excel_path)
+    if not args.no_metrics:
+        export_merged_metrics(args, excel_path, metrics, merged_cells=rows, merged_urls=urls,
+                              shards=args.processes, shards_failed=sum(1 for c in codes if c))
+    return max(codes) if codes else 0
+
+def export_merged_metrics(args, excel_path: str, metrics: RunMetrics, **counters):
+    """Compteurs des shards additionnés (fichiers .metrics.json de chaque shard) + ceux de la fusion."""
+    totals = {}
+    for i in range(args.processes):
+        json_path, _ = metrics_paths_for(shard_results_path(excel_path, i, args.processes))
+        try:
+            with open(json_path, encoding="utf-8") as fh:
+                shard_counters = json.load(fh).get("counters", {})
+        except (OSError, ValueError):
+            continue
+        for name, value in shard_counters.items():
+            if isinstance(value, (int, float)) and name != "completed":
+                totals[name] = totals.get(name, 0) + value
+    totals.update(counters)
+    for name, value in totals.items():
+        metrics.set_counter(name, value)
+    json_path, prom_path = metrics_paths_for(args.metrics_path or excel_path)
+    metrics.export(json_path, prom_path)
+    emit("metrics", json=json_path, prom=prom_path)
+
+def argv_without(argv, options):
+    """Retire des options (et leur valeur) d'une ligne de commande."""
+    out, skip = [], False
+    for a in argv:
+        if skip:
+            skip = False
+            continue
+        if a in options:
+            skip = True
+            continue
+        if any(a.startswith(o + "=") for o in options if o.startswith("--")):
+            continue
+        out.append(a)
+    return out
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    ap = build_parser()
+    args = ap.parse_args(argv)
+    try:
+        resolve_engines(args.search_engine, args.search_url)
+    except ValueError as e:
+        ap.error(str(e))
+    if args.work and not args.work.lower().endswith(WORKING_EXTENSIONS):
+        ap.error(f"--work: extension attendue parmi {', '.join(WORKING_EXTENSIONS)}")
+    if args.export and not args.export.lower().endswith(tuple(STORE_EXTENSIONS)):
+        ap.error(f"--export: extension attendue parmi {', '.join(STORE_EXTENSIONS)}")
+    if args.show_archive:
+        return show_archive(args)
+    if args.merge_journal:
+        applied = merge_journal_into_workbook(args.input, args.sheet)
+        emit("merge-journal", excel=args.input, journal=journal_path_for(args.input), urls=applied)
+        export_store(args, args.input)
+        return 0
+    if args.merge_shards:
+        rows, urls = merge_shards_into_workbook(args.input, args.sheet, args.job_title and job_titles_of(args),
+                                                shard_count=args.shard_count if args.shard_count > 1 else None)
+        emit("merge", excel=args.input, rows=rows, urls=urls)
+        export_store(args, args.input)
+        return 0
+    tmpdir = None
+    if args.input == "-" and not args.work:
+        # stdin sans --work : fichier de travail, cache, archive, journal et mesures dans un dossier temporaire
+        # supprimé en fin de run (résultats sur stdout, --output ou --export)
+        tmpdir = tempfile.TemporaryDirectory(prefix="scraper_stdin_")
+        args.work = os.path.join(tmpdir.name, "stdin" + DEFAULT_STORE_EXTENSION[args.store])
+    try:
+        return run_cli(args, argv)
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+def run_cli(args, argv) -> int:
+    excel_path = prepare_workbook(args)
+    if args.processes > 1:
+        return run_local_shards(args, argv, excel_path)
+    companies = {row: company for row, company, _ in iter_sheet_rows(excel_path, args.sheet)}
+    job_titles = job_titles_of(args)
+    title_of_column = {result_column(i): title for i, title in enumerate(job_titles)}
+    multi = len(job_titles) > 1
+
+    cfg = RunConfig(
+        excel_path=excel_path,
+        sheet_name=args.sheet,
+        job_title=job_titles[0],
+        job_titles=job_titles,
+        headless=not args.headed,
+        fast=args.fast,
+        test_mode=args.test,
+        workers=args.workers,
+        engine=args.engine,
+        cache_mode=args.cache,
+        resume=args.resume,
+        block_resources=not args.no_block,
+        block_types=split_list(args.block_types),
+        block_domains=split_list(args.block_domains),
+        allow_domains=split_list(args.allow_domains),
+        backend=args.backend,
+        search_url=args.search_url,
+        search_engines=tuple(args.search_engine or ()),
+        shard_index=args.shard_index,
+        shard_count=args.shard_count,
+        persist_storage=not args.no_persist_storage,
+        pipeline=args.pipeline,
+        archive=not args.no_archive,
+        archive_path=args.archive_path,
+        rematch=args.rematch,
+        rematch_clear=args.rematch_clear,
+        retry_attempts=args.retry_attempts,
+        retry_delay=args.retry_delay,
+        recycle_queries=args.recycle_queries,
+        recycle_memory_mb=args.recycle_memory_mb,
+        metrics_export=not args.no_metrics,
+        metrics_path=args.metrics_path,
+    )
+    emit("start", excel=excel_path, companies=len(companies))
+
+    stop_event = threading.Event()
+    log_q = queue.Queue()
+    update_q = queue.Queue()
+    worker = threading.Thread(target=run_scraper, args=(cfg, stop_event, log_q, update_q), daemon=True)
+
+    out_fh = open(args.output, "w", newline="", encoding="utf-8") if args.output else None
+    out = csv.writer(out_fh) if out_fh else None
+    if out:
+        out.writerow(["row", "entreprise", "intitule", "url"] if multi else ["row", "entreprise", "url"])
+
+    def drain():
+        while True:
+            try:
+                msg = log_q.get_nowait()
+            except queue.Empty:
+                break
+            msg = msg.rstrip("\n")
+            if msg:
+                emit("log", message=msg)
+        while True:
+            try:
+                up = update_q.get_nowait()
+            except queue.Empty:
+                break
+            row, url = up.get("row"), up.get("url")
+            title = title_of_column.get(up.get("col", result_column(0)), "")
+            emit("result", row=row, company=companies.get(row, ""), job_title=title, url=url)
+            if out:
+                out.writerow([row, companies.get(row, ""), title, url] if multi else [row, companies.get(row, ""), url])
+                out_fh.flush()
+
+    interrupted = False
+    worker.start()
+    try:
+        while worker.is_alive():
+            worker.join(0.2)
+            drain()
+    except KeyboardInterrupt:
+        interrupted = True
+        stop_event.set()
+        emit("log", message="Arret demande (Ctrl+C)")
+        while worker.is_alive():
+            worker.join(0.2)
+            drain()
+    finally:
+        drain()
+        if out_fh:
+            out_fh.close()
+    if not interrupted:
+        export_store(args, excel_path)
+    emit("end", interrupted=interrupted)
+    return 130 if interrupted else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1508 @@
+import os
+import sys
+import asyncio
+import threading
+import queue
+import time
+import re
+from dataclasses import dataclass
+
+os.environ.setdefault("PYTHONIOENCODING", "utf-8")
+
+from browser_host import BrowserHost, STORAGE_STATE_FILENAME, write_storage_state, usable_storage_state
+from company_names import company_key, group_by_company
+from rate_limiter import (
+    AdaptiveRateLimiter, DEFAULT_INITIAL_QPM, DEFAULT_MIN_QPM, DEFAULT_MAX_QPM, FAST_INITIAL_QPM, FAST_MAX_QPM,
+)
+from resource_blocking import (
+    BlockPolicy, BlockStats, install_blocking, install_blocking_async,
+    DEFAULT_BLOCKED_TYPES, DEFAULT_BLOCKED_DOMAINS, DEFAULT_ALLOWED_DOMAINS,
+)
+from run_journal import RunJournal, journal_path_for
+from retry_queue import RetryQueue, SearchFailed, DEFAULT_RETRY_ATTEMPTS, DEFAULT_RETRY_DELAY
+from run_metrics import RunMetrics, metrics_paths_for, span
+from sharding import shard_of, shard_results_path, find_shard_results, collect_shard_results
+from search_backends import (
+    AsyncSearchBackend, SearchBackend, FallbackBackend, HttpSearchBackend, BackendStats, BACKEND_HTTP,
+    BACKEND_BROWSER,
+)
+from search_engines import SearchEngine, EngineBoard, MultiEngineBackend, STARTPAGE, resolve_engines
+from search_cache import (
+    SearchCache, CACHE_FILENAME, CACHE_OFF, CACHE_USE,
+    DEFAULT_CACHE_TTL_HOURS, DEFAULT_CACHE_MAX_ENTRIES, SKIPPED, normalize_query,
+)
+from serp_archive import SerpArchive, ARCHIVE_FILENAME
+from working_store import RESULT_COLUMN, WORKING_STORES, open_store, store_kind
+
+# ========= Constantes =========
+EXPECTED_XLSX_NAME = "icpe_details.xlsx"   # fichier de travail à la racine
+EXPECTED_SQLITE_NAME = "icpe_details.sqlite3"   # s'il existe, remplace le xlsx (gros volumes, accès par ligne)
+DEFAULT_SHEET_NAME = "Feuille1"
+DEFAULT_JOB_TITLE = "Responsable HSE"
+DEFAULT_WORKERS = 1
+MAX_WORKERS = 8
+RATE_LOG_EVERY = 25   # lignes entre deux logs de cadence
+
+# Moteurs : "async" (playwright.async_api, un seul thread) ou "sync" (repli, un thread par worker)
+ENGINE_ASYNC = "async"
+ENGINE_SYNC = "sync"
+DEFAULT_ENGINE = ENGINE_ASYNC
+
+# Colonnes (working_store.py) : A=1 (entreprise), B=2 (URL du 1er intitulé), C=3 (2e intitulé)...
+JOB_TITLE_SEPARATOR = ";"   # plusieurs intitulés dans un seul champ : "Responsable HSE; Directeur QHSE"
+
+# Moteurs de recherche (URL + sélecteurs, disjoncteurs) : search_engines.py ; Startpage par défaut
+STARTPAGE_SEARCH_URL = STARTPAGE.search_url   # SCRAPER_SEARCH_URL : autre point d'entrée (faux Startpage local)
+MAX_RESULTS_CHECKED = 8   # blocs examinés par recherche
+
+# Recyclage des pages sur les longs runs (mémoire stable)
+DEFAULT_RECYCLE_QUERIES = 500
+DEFAULT_RECYCLE_MEMORY_MB = 256
+MEMORY_CHECK_EVERY = 25   # requêtes entre deux mesures du tas JS de la page
+PAGE_MEMORY_JS = "() => (performance.memory ? performance.memory.usedJSHeapSize : 0)"
+
+# Dossier app (gère PyInstaller)
+BASE_DIR = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.dirname(sys.executable) if getattr(sys, "frozen", False) else BASE_DIR
+
+MS_PLAYWRIGHT_DIR = os.path.join(APP_DIR, "ms-playwright")
+if os.path.isdir(MS_PLAYWRIGHT_DIR):
+    os.environ["PLAYWRIGHT_BROWSERS_PATH"] = MS_PLAYWRIGHT_DIR
+
+# ========= Playwright / Excel =========
+# Importés à la première utilisation (pas au chargement du module) : l'interface s'affiche sans les attendre
+def sync_playwright():
+    from playwright.sync_api import sync_playwright as start
+    return start()
+
+def async_playwright():
+    from playwright.async_api import async_playwright as start
+    return start()
+
+def playwright_timeout():
+    """TimeoutError de Playwright (la même pour les API sync et async), pour `except playwright_timeout():`."""
+    from playwright.sync_api import TimeoutError as PWTimeout
+    return PWTimeout
+
+def column_letter(col: int) -> str:
+    """1 -> A, 2 -> B, 27 -> AA (comme openpyxl.utils.get_column_letter, sans importer openpyxl)."""
+    letters = ""
+    while col > 0:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+# ========= Utils =========
+def strip_non_bmp(s: str) -> str:
+    """Supprime les caractères > U+FFFF (emoji, etc.) pour éviter TclError sur vieux Tk."""
+    if not isinstance(s, str):
+        s = str(s)
+    return "".join(ch if ord(ch) <= 0xFFFF else "?" for ch in s)
+
+def log_put(log_q: queue.Queue, msg: str):
+    try:
+        safe = strip_non_bmp(msg)
+        log_q.put(safe + ("\n" if not safe.endswith("\n") else ""))
+    except Exception:
+        pass
+
+def parse_job_titles(text) -> tuple:
+    """"A; B; A" ou ["A", "B"] -> ("A", "B") : vides et doublons retirés, ordre conservé."""
+    parts = text.split(JOB_TITLE_SEPARATOR) if isinstance(text, str) else list(text or ())
+    titles = []
+    for part in parts:
+        part = str(part or "").strip()
+        if part and part not in titles:
+            titles.append(part)
+    return tuple(titles)
+
+def result_column(title_index: int) -> int:
+    """Colonne Excel du n-ième intitulé (0 -> B)."""
+    return RESULT_COLUMN + title_index
+
+def sanitize_filename(name: str) -> str:
+    name = (name or "").strip()
+    name = re.sub(r"[\\/:*?\"<>|]+", "_", name)
+    return name[:120] if len(name) > 120 else name
+
+def ensure_workbook_exists(work_path: str, sheet_name: str):
+    """Crée le stockage minimal si absent (xlsx : A1='entreprise' ; SQLite : tables vides)."""
+    with open_store(work_path, sheet_name) as store:
+        store.ensure_exists()
+
+def wait_after_consent(page):
+    """Attend que la page se recharge après le clic (au lieu d'une pause fixe)."""
+    try:
+        page.wait_for_load_state("domcontentloaded", timeout=3000)
+    except Exception:
+        pass
+
+def accept_cookies_if_any(page, log_q):
+    try:
+        candidates_role = [
+            {"role": "button", "name": "Accept"},
+            {"role": "button", "name": "I agree"},
+            {"role": "button", "name": "J'accepte"},
+            {"role": "button", "name": "Agree"},
+            {"role": "button", "name": "OK"},
+        ]
+        css_candidates = [
+            'button#consent-accept', 'button#accept-choices',
+            'button[aria-label*="Agree"]', 'button[aria-label*="accept"]',
+            'button:has-text("Accept")', 'button:has-text("I agree")'
+        ]
+        for c in candidates_role:
+            try:
+                btn = page.get_by_role(c["role"], name=c["name"])
+                if btn.is_visible():
+                    btn.click(timeout=1500)
+                    log_put(log_q, "[cookies] acceptes (role)")
+                    wait_after_consent(page)
+                    return
+            except Exception:
+                pass
+        for sel in css_candidates:
+            try:
+                loc = page.locator(sel).first
+                if loc.is_visible():
+                    loc.click(timeout=1500)
+                    log_put(log_q, "[cookies] acceptes (css)")
+                    wait_after_consent(page)
+                    return
+            except Exception:
+                pass
+    except Exception:
+        pass
+
+# Pipeline : la page de réserve vide son document (aucun ancien résultat ne peut matcher) puis navigue
+START_NAVIGATION_JS = "url => { document.documentElement.innerHTML = ''; window.location.href = url; }"
+
+class PrefetchedNavigation:
+    """Navigation lancée par start_navigation : `loaded` passe à True au domcontentloaded du nouveau document.
+    Attendre l'événement et non un changement d'URL : une requête refaite sur la même page (vague de nouveaux
+    essais, requête partagée) recharge la même URL."""
+
+    def __init__(self):
+        self.loaded = False
+
+    def on_loaded(self, _page=None):
+        self.loaded = True
+
+def start_navigation(page, url):
+    """Lance la navigation sans l'attendre ; PrefetchedNavigation, ou None si le lancement a échoué."""
+    nav = PrefetchedNavigation()
+    try:
+        page.once("domcontentloaded", nav.on_loaded)
+        page.evaluate(START_NAVIGATION_JS, url)
+        return nav
+    except Exception:
+        return None
+
+def open_engine_and_search(page, query, log_q, engine: SearchEngine = STARTPAGE, metrics=None,
+                           check_consent=True, prefetched=None):
+    """`prefetched` : navigation déjà lancée par start_navigation (on attend seulement la nouvelle page)."""
+    if prefetched is None:
+        with span(metrics, "goto"):
+            page.goto(engine.query_url(query), wait_until="domcontentloaded")
+    else:
+        with span(metrics, "prefetch_wait"):
+            if not prefetched.loaded:
+                page.wait_for_event("domcontentloaded")
+    if check_consent:
+        with span(metrics, "consent"):
+            accept_cookies_if_any(page, log_q)
+    try:
+        with span(metrics, "wait_results_initial"):
+            page.wait_for_selector(",".join(engine.block_selectors), timeout=4000)
+        return
+    except playwright_timeout():
+        pass
+    try:
+        page.fill('input[name="query"], input[name="q"]', query)
+        page.press('input[name="query"], input[name="q"]', "Enter")
+    except Exception:
+        pass
+
+# Extraction en un seul aller-retour : la cascade de sélecteurs tourne dans la page
+SERP_EXTRACT_JS = """
+({blockSelectors, linkSelectors, snippetSelectors, limit}) => {
+    for (const bsel of blockSelectors) {
+        const blocks = document.querySelectorAll(bsel);
+        if (!blocks.length) continue;
+        const results = [];
+        for (const block of Array.from(blocks).slice(0, limit)) {
+            let url = null, title = "", snippet = "";
+            for (const lsel of linkSelectors) {
+                const a = block.querySelector(lsel);
+                if (a) { url = a.getAttribute("href"); title = (a.innerText || "").trim(); break; }
+            }
+            for (const ssel of snippetSelectors) {
+                const sn = block.querySelector(ssel);
+                if (sn) { snippet = (sn.innerText || "").trim(); break; }
+            }
+            results.push([url, title, snippet]);
+        }
+        return {selector: bsel, count: blocks.length, results: results};
+    }
+    return {selector: null, count: 0, results: []};
+}
+"""
+
+_last_block_selector = {}   # moteur -> sélecteur de bloc qui a matché en dernier, essayé en premier
+
+def serp_extract_args(engine: SearchEngine = STARTPAGE) -> dict:
+    blocks = list(engine.block_selectors)
+    last = _last_block_selector.get(engine.name)
+    if last in blocks:
+        blocks.remove(last)
+        blocks.insert(0, last)
+    return {
+        "blockSelectors": blocks,
+        "linkSelectors": list(engine.link_selectors),
+        "snippetSelectors": list(engine.snippet_selectors),
+        "limit": MAX_RESULTS_CHECKED,
+    }
+
+def parse_serp_extract(data, engine: SearchEngine = STARTPAGE):
+    """(nb de blocs, [(url, titre, extrait), ...]) depuis le retour de SERP_EXTRACT_JS."""
+    if data.get("selector"):
+        _last_block_selector[engine.name] = data["selector"]
+    return data.get("count", 0), engine.clean_results([tuple(r) for r in data.get("results", [])])
+
+def extract_results(page, engine: SearchEngine = STARTPAGE):
+    return parse_serp_extract(page.evaluate(SERP_EXTRACT_JS, serp_extract_args(engine)), engine)
+
+def build_query(company_name, job_title):
+    return f'"{job_title}" site:linkedin.com/in "{company_name}"'
+
+def match_linkedin_profile(results, company_name):
+    """Premier profil linkedin.com/in/ dont le titre ou l'extrait cite l'entreprise."""
+    company_lc = company_name.lower()
+    for url, title, snippet in results[:MAX_RESULTS_CHECKED]:
+        if not url:
+            continue
+        if "linkedin.com/in/" not in url:
+            continue
+        snippet_lc = (snippet or "").lower()
+        title_lc = (title or "").lower()
+        if company_lc in snippet_lc or company_lc in title_lc:
+            return url.split('?')[0]
+    return None
+
+def fetch_serp(page, query, log_q, engine: SearchEngine = STARTPAGE, metrics=None, check_consent=True,
+               prefetched=None):
+    """Résultats (url, titre, extrait) de la page du moteur, None si timeout.
+    check_consent=False saute les sondes du bandeau cookies (consentement déjà donné dans ce contexte)."""
+    open_engine_and_search(page, query, log_q, engine, metrics, check_consent, prefetched)
+    try:
+        with span(metrics, "wait_results"):
+            page.wait_for_selector(",".join(engine.block_selectors), timeout=10000)
+    except playwright_timeout():
+        log_put(log_q, f"Aucun resultat (timeout {engine.name})")
+        return None
+
+    with span(metrics, "extract"):
+        count, results = extract_results(page, engine)
+    log_put(log_q, f"Nombre de resultats: {count}")
+    return results
+
+def report_to_limiter(limiter, backend, results, error: bool = False):
+    """Signal de cadence : succès, ou recul sur timeout / page vide / captcha / exception du backend (`error`)."""
+    if limiter is None:
+        return
+    reason = backend.throttle_reason or ("erreur" if error else None)
+    if reason is None and results is not None and not results:
+        reason = "vide"
+    if reason:
+        limiter.on_throttle(reason)
+    elif results is not None:
+        limiter.on_success()
+
+def archive_results(archive, query, results, engine, log_q, metrics=None, replace=True):
+    """Archive la page (tous ses blocs) ; une erreur d'archive ne fait jamais perdre le résultat."""
+    if archive is None:
+        return
+    try:
+        with span(metrics, "archive_put"):
+            archive.put(query, results, engine, replace)
+    except Exception as e:
+        log_put(log_q, f"Archive: {e}")
+
+def prefetch_search(backend, company_name, job_title, log_q, cache=None, limiter=None, stop_event=None,
+                    metrics=None) -> bool:
+    """Pipeline : réserve le créneau de la recherche suivante et lance son chargement.
+    True = créneau pris (à passer en `acquired` à search_linkedin_profile) ; False = rien de lancé."""
+    try:
+        query = build_query(company_name, job_title)
+        if cache and cache.peek(query):
+            return False
+        if limiter and not limiter.acquire(stop_event):
+            return False
+        with span(metrics, "prefetch"):
+            backend.prefetch(query, log_q)
+        return True
+    except Exception as e:
+        log_put(log_q, f"Erreur prechargement: {e}")
+        return False
+
+def search_linkedin_profile(backend, company_name, job_title, log_q, cache=None, limiter=None,
+                            stop_event=None, metrics=None, acquired=False, archive=None):
+    """URL du profil, None si la page ne contient aucun profil correspondant, SearchFailed si la recherche
+    n'a pas abouti (timeout, blocage, erreur, arrêt) : à réessayer plus tard, pas un "pas de match" ;
+    SKIPPED si le cache (mode "refresh") ignore la requête.
+    `acquired` : créneau du limiteur déjà pris par prefetch_search. `archive` : SerpArchive (re-matching)."""
+    try:
+        query = build_query(company_name, job_title)
+        log_put(log_q, f"Recherche: {query}")
+
+        results = None
+        if cache:
+            with span(metrics, "cache_get"):
+                results = cache.get(query)
+        if results is SKIPPED:
+            log_put(log_q, "[cache] requete ignoree (absente du cache)")
+            return SKIPPED
+        if results is not None:
+            log_put(log_q, f"[cache] {len(results)} resultats")
+            if results:   # page recherchée avant l'archive : archivée une fois, sans moteur connu
+                archive_results(archive, query, results, None, log_q, metrics, replace=False)
+        else:
+            if limiter and not acquired:
+                with span(metrics, "rate_wait"):
+                    acquired = limiter.acquire(stop_event)
+                if not acquired:
+                    return SearchFailed("arret")
+            try:
+                with span(metrics, "fetch"):
+                    results = backend.fetch(query, log_q)
+            except Exception:
+                report_to_limiter(limiter, backend, None, error=True)
+                raise
+            report_to_limiter(limiter, backend, results)
+            if results is None:
+                return SearchFailed(backend.throttle_reason or "sans resultat")
+            archive_results(archive, query, results, backend.served_by, log_q, metrics)
+            if cache:
+                with span(metrics, "cache_put"):
+                    cache.put(query, results)
+
+        clean_url = match_linkedin_profile(results, company_name)
+        if clean_url:
+            log_put(log_q, f"Profil trouve: {clean_url}")
+            return clean_url
+
+        log_put(log_q, "Aucun profil correspondant")
+        return None
+
+    except Exception as e:
+        log_put(log_q, f"Erreur recherche: {e}")
+        return SearchFailed("erreur: " + (str(e).strip().splitlines() or [type(e).__name__])[0])
+
+# ========= Moteur async =========
+async def wait_after_consent_async(page):
+    try:
+        await page.wait_for_load_state("domcontentloaded", timeout=3000)
+    except Exception:
+        pass
+
+async def accept_cookies_if_any_async(page, log_q):
+    try:
+        candidates_role = [
+            {"role": "button", "name": "Accept"},
+            {"role": "button", "name": "I agree"},
+            {"role": "button", "name": "J'accepte"},
+            {"role": "button", "name": "Agree"},
+            {"role": "button", "name": "OK"},
+        ]
+        css_candidates = [
+            'button#consent-accept', 'button#accept-choices',
+            'button[aria-label*="Agree"]', 'button[aria-label*="accept"]',
+            'button:has-text("Accept")', 'button:has-text("I agree")'
+        ]
+        for c in candidates_role:
+            try:
+                btn = page.get_by_role(c["role"], name=c["name"])
+                if await btn.is_visible():
+                    await btn.click(timeout=1500)
+                    log_put(log_q, "[cookies] acceptes (role)")
+                    await wait_after_consent_async(page)
+                    return
+            except Exception:
+                pass
+        for sel in css_candidates:
+            try:
+                loc = page.locator(sel).first
+                if await loc.is_visible():
+                    await loc.click(timeout=1500)
+                    log_put(log_q, "[cookies] acceptes (css)")
+                    await wait_after_consent_async(page)
+                    return
+            except Exception:
+                pass
+    except Exception:
+        pass
+
+async def start_navigation_async(page, url):
+    nav = PrefetchedNavigation()
+    try:
+        page.once("domcontentloaded", nav.on_loaded)
+        await page.evaluate(START_NAVIGATION_JS, url)
+        return nav
+    except Exception:
+        return None
+
+async def open_engine_and_search_async(page, query, log_q, engine: SearchEngine = STARTPAGE, metrics=None,
+                                       check_consent=True, prefetched=None):
+    if prefetched is None:
+        with span(metrics, "goto"):
+            await page.goto(engine.query_url(query), wait_until="domcontentloaded")
+    else:
+        with span(metrics, "prefetch_wait"):
+            if not prefetched.loaded:
+                await page.wait_for_event("domcontentloaded")
+    if check_consent:
+        with span(metrics, "consent"):
+            await accept_cookies_if_any_async(page, log_q)
+    try:
+        with span(metrics, "wait_results_initial"):
+            await page.wait_for_selector(",".join(engine.block_selectors), timeout=4000)
+        return
+    except playwright_timeout():
+        pass
+    try:
+        await page.fill('input[name="query"], input[name="q"]', query)
+        await page.press('input[name="query"], input[name="q"]', "Enter")
+    except Exception:
+        pass
+
+async def extract_results_async(page, engine: SearchEngine = STARTPAGE):
+    return parse_serp_extract(await page.evaluate(SERP_EXTRACT_JS, serp_extract_args(engine)), engine)
+
+async def fetch_serp_async(page, query, log_q, engine: SearchEngine = STARTPAGE, metrics=None, check_consent=True,
+                           prefetched=None):
+    await open_engine_and_search_async(page, query, log_q, engine, metrics, check_consent, prefetched)
+    try:
+        with span(metrics, "wait_results"):
+            await page.wait_for_selector(",".join(engine.block_selectors), timeout=10000)
+    except playwright_timeout():
+        log_put(log_q, f"Aucun resultat (timeout {engine.name})")
+        return None
+
+    with span(metrics, "extract"):
+        count, results = await extract_results_async(page, engine)
+    log_put(log_q, f"Nombre de resultats: {count}")
+    return results
+
+async def prefetch_search_async(backend, company_name, job_title, log_q, cache=None, limiter=None,
+                                stop_event=None, metrics=None) -> bool:
+    try:
+        query = build_query(company_name, job_title)
+        if cache and cache.peek(query):
+            return False
+        if limiter and not await limiter.acquire_async(stop_event):
+            return False
+        with span(metrics, "prefetch"):
+            await backend.prefetch_async(query, log_q)
+        return True
+    except Exception as e:
+        log_put(log_q, f"Erreur prechargement: {e}")
+        return False
+
+async def search_linkedin_profile_async(backend, company_name, job_title, log_q, cache=None, limiter=None,
+                                        stop_event=None, metrics=None, acquired=False, archive=None):
+    try:
+        query = build_query(company_name, job_title)
+        log_put(log_q, f"Recherche: {query}")
+
+        results = None
+        if cache:
+            with span(metrics, "cache_get"):
+                results = cache.get(query)
+        if results is SKIPPED:
+            log_put(log_q, "[cache] requete ignoree (absente du cache)")
+            return SKIPPED
+        if results is not None:
+            log_put(log_q, f"[cache] {len(results)} resultats")
+            if results:   # page recherchée avant l'archive : archivée une fois, sans moteur connu
+                archive_results(archive, query, results, None, log_q, metrics, replace=False)
+        else:
+            if limiter and not acquired:
+                with span(metrics, "rate_wait"):
+                    acquired = await limiter.acquire_async(stop_event)
+                if not acquired:
+                    return SearchFailed("arret")
+            try:
+                with span(metrics, "fetch"):
+                    results = await backend.fetch_async(query, log_q)
+            except Exception:
+                report_to_limiter(limiter, backend, None, error=True)
+                raise
+            report_to_limiter(limiter, backend, results)
+            if results is None:
+                return SearchFailed(backend.throttle_reason or "sans resultat")
+            archive_results(archive, query, results, backend.served_by, log_q, metrics)
+            if cache:
+                with span(metrics, "cache_put"):
+                    cache.put(query, results)
+
+        clean_url = match_linkedin_profile(results, company_name)
+        if clean_url:
+            log_put(log_q, f"Profil trouve: {clean_url}")
+            return clean_url
+
+        log_put(log_q, "Aucun profil correspondant")
+        return None
+
+    except Exception as e:
+        log_put(log_q, f"Erreur recherche: {e}")
+        return SearchFailed("erreur: " + (str(e).strip().splitlines() or [type(e).__name__])[0])
+
+# ========= Run =========
+@dataclass
+class RunConfig:
+    excel_path: str
+    sheet_name: str
+    job_title: str
+    headless: bool
+    fast: bool
+    test_mode: bool
+    workers: int = DEFAULT_WORKERS
+    engine: str = DEFAULT_ENGINE
+    cache_mode: str = CACHE_USE
+    cache_ttl_hours: float = DEFAULT_CACHE_TTL_HOURS
+    cache_max_entries: int = DEFAULT_CACHE_MAX_ENTRIES
+    cache_path: str = ""   # vide = à côté du xlsx
+    resume: bool = False   # saute les lignes déjà remplies / déjà journalisées
+    block_resources: bool = True
+    block_types: tuple = DEFAULT_BLOCKED_TYPES
+    block_domains: tuple = DEFAULT_BLOCKED_DOMAINS
+    allow_domains: tuple = DEFAULT_ALLOWED_DOMAINS
+    backend: str = BACKEND_HTTP   # "http" = HTTP + parseur, repli navigateur ; "browser" = Playwright seul
+    search_url: str = STARTPAGE_SEARCH_URL   # point d'entrée de Startpage
+    search_engines: tuple = ()   # "startpage", "duckduckgo=http://..." par priorité ; vide = Startpage seul
+    shard_index: int = 0   # avec shard_count > 1 : ne traite que son shard, résultats dans un fichier dédié
+    shard_count: int = 1
+    rate_initial_qpm: float = DEFAULT_INITIAL_QPM   # requêtes/min, tous workers confondus
+    rate_min_qpm: float = DEFAULT_MIN_QPM
+    rate_max_qpm: float = DEFAULT_MAX_QPM
+    persist_storage: bool = True   # cookies / consentement sauvegardés et réutilisés entre runs
+    storage_state_path: str = ""   # vide = browser_state.json à côté du xlsx
+    recycle_queries: int = DEFAULT_RECYCLE_QUERIES       # contexte + page recréés après N requêtes (0 = jamais)
+    recycle_memory_mb: float = DEFAULT_RECYCLE_MEMORY_MB  # ... ou au-delà de ce tas JS (0 = pas de contrôle)
+    pipeline: bool = False   # 2 pages par worker : la requête suivante charge pendant l'extraction de la courante
+    metrics_export: bool = True   # <xlsx>.metrics.json / .metrics.prom en fin de run
+    metrics_path: str = ""        # vide = à côté du xlsx (ou du fichier de shard)
+    job_titles: tuple = ()   # plusieurs intitulés, un par colonne (B, C...) ; vide = job_title ("A; B" accepté)
+    archive: bool = True     # toutes les pages de résultats gardées (serp_archive.sqlite3) pour le re-matching
+    archive_path: str = ""   # vide = à côté du fichier de travail
+    rematch: bool = False    # pas de recherche : correspondance rejouée sur l'archive, fichier mis à jour
+    rematch_clear: bool = False   # ... et URLs dont la page archivée ne correspond plus effacées
+    retry_attempts: int = DEFAULT_RETRY_ATTEMPTS   # essais par recherche en échec (timeout, blocage, erreur)
+    retry_delay: float = DEFAULT_RETRY_DELAY       # avant le 2e essai, puis doublé ; après la passe principale
+
+    def titles(self) -> tuple:
+        """Intitulés du run dans l'ordre des colonnes de résultats."""
+        return parse_job_titles(self.job_titles) or parse_job_titles(self.job_title) or (DEFAULT_JOB_TITLE,)
+
+@dataclass
+class RunServices:
+    """Objets partagés par tous les workers d'un run."""
+    cache: SearchCache = None
+    block_policy: BlockPolicy = None
+    block_stats: BlockStats = None
+    backend_stats: BackendStats = None
+    limiter: AdaptiveRateLimiter = None
+    metrics: RunMetrics = None
+    storage_state_path: str = ""        # vide = pas de persistance des cookies
+    browser_host: BrowserHost = None    # navigateur gardé chaud entre runs (moteur async)
+    engines: list = None                # moteurs de recherche du run (None = Startpage seul)
+    engine_board: EngineBoard = None    # santé / disjoncteurs partagés, avec plusieurs moteurs
+    archive: SerpArchive = None         # pages de résultats complètes (re-matching hors ligne)
+
+SEARCH_CONTEXT_OPTIONS = {
+    "viewport": {"width": 1400, "height": 900},
+    "user_agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"),
+}
+
+def browser_launch_options(config: RunConfig) -> dict:
+    slow_mo = 0 if (config.fast or config.headless) else 250
+    return {
+        "headless": config.headless,
+        "slow_mo": slow_mo,
+        "args": [
+            '--disable-blink-features=AutomationControlled',
+            '--disable-features=IsolateOrigins,site-per-process'
+        ],
+    }
+
+def launch_browser(p, config: RunConfig):
+    return p.chromium.launch(**browser_launch_options(config))
+
+def engine_storage_state_path(services: RunServices, engine: SearchEngine) -> str:
+    """browser_state.json pour Startpage, browser_state.<moteur>.json pour les autres (un contexte par moteur)."""
+    path = services.storage_state_path
+    if not path or engine.name == STARTPAGE.name:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{engine.name}{ext}"
+
+def search_context_options(services: RunServices, engine: SearchEngine = STARTPAGE) -> dict:
+    """Options du contexte ; reprend les cookies / le consentement sauvegardés s'il y en a."""
+    options = dict(SEARCH_CONTEXT_OPTIONS)
+    state = usable_storage_state(engine_storage_state_path(services, engine))
+    if state:
+        options["storage_state"] = state
+    return options
+
+def new_search_page(browser, services: RunServices, engine: SearchEngine = STARTPAGE):
+    """Contexte isolé (cookies propres au worker et au moteur) + une page."""
+    context = browser.new_context(**search_context_options(services, engine))
+    if services.block_policy:
+        install_blocking(context, services.block_policy, services.block_stats)
+    return context, context.new_page()
+
+async def new_search_page_async(browser, services: RunServices, engine: SearchEngine = STARTPAGE):
+    context = await browser.new_context(**search_context_options(services, engine))
+    if services.block_policy:
+        await install_blocking_async(context, services.block_policy, services.block_stats)
+    return context, await context.new_page()
+
+def save_storage_state(context, services: RunServices, log_q, engine: SearchEngine = STARTPAGE):
+    path = engine_storage_state_path(services, engine)
+    if context is None or not path:
+        return
+    try:
+        write_storage_state(path, context.storage_state())
+    except Exception as e:
+        log_put(log_q, f"[browser] etat non sauvegarde: {e}")
+
+async def save_storage_state_async(context, services: RunServices, log_q, engine: SearchEngine = STARTPAGE):
+    path = engine_storage_state_path(services, engine)
+    if context is None or not path:
+        return
+    try:
+        write_storage_state(path, await context.storage_state())
+    except Exception as e:
+        log_put(log_q, f"[browser] etat non sauvegarde: {e}")
+
+def recycle_reason(config: RunConfig, queries: int, heap_bytes: float):
+    """Motif de recyclage du contexte courant, ou None."""
+    if config.recycle_queries and queries >= config.recycle_queries:
+        return f"{queries} requetes"
+    if config.recycle_memory_mb and heap_bytes >= config.recycle_memory_mb * 2 ** 20:
+        return f"tas JS {heap_bytes / 2 ** 20:.0f} Mo"
+    return None
+
+def should_measure_heap(config: RunConfig, queries: int) -> bool:
+    return bool(config.recycle_memory_mb) and queries % MEMORY_CHECK_EVERY == 0
+
+def idle_page(pages, pending):
+    """Page sans navigation préchargée en cours (pipeline), ou None."""
+    busy = [page for page, _ in pending.values()]
+    return next((page for page in pages if all(page is not b for b in busy)), None)
+
+def take_page(pages, pending):
+    """Page pour une requête non préchargée ; à défaut de page libre, la 1re (son préchargement est abandonné)."""
+    page = idle_page(pages, pending)
+    if page is None:
+        page = pages[0]
+        for query in [q for q, (p, _) in pending.items() if p is page]:
+            del pending[query]
+    return page
+
+class PlaywrightBackend(SearchBackend):
+    """Backend navigateur (API sync) sur un moteur ; `get_browser()` lance Chromium à la première requête
+    (navigateur partagé par les moteurs du worker, un contexte chacun). Avec config.pipeline, deux pages dans
+    le même contexte : l'une charge la requête suivante (prefetch) pendant que l'autre est traitée."""
+    name = BACKEND_BROWSER
+
+    def __init__(self, get_browser, config: RunConfig, services: RunServices, engine: SearchEngine = STARTPAGE):
+        self.get_browser = get_browser
+        self.config = config
+        self.services = services
+        self.engine = engine
+        self.can_prefetch = config.pipeline
+        self.context = None
+        self.pages = []            # 1 page, 2 en pipeline (même contexte)
+        self.pending = {}          # requête -> (page, PrefetchedNavigation) : navigation lancée par prefetch
+        self.queries = 0           # requêtes servies par le contexte courant
+        self.consent_ok = False    # résultats déjà obtenus dans ce contexte : plus de sondes cookies
+
+    def open_pages(self):
+        if not self.pages:
+            browser = self.get_browser()
+            with span(self.services.metrics, "context_open"):
+                self.context, page = new_search_page(browser, self.services, self.engine)
+                self.pages = [page, self.context.new_page()] if self.can_prefetch else [page]
+
+    def prefetch(self, query, log_q):
+        self.open_pages()
+        page = idle_page(self.pages, self.pending)
+        if page is not None:
+            prefetched = start_navigation(page, self.engine.query_url(query))
+            if prefetched is not None:
+                self.pending[query] = (page, prefetched)
+
+    def fetch(self, query, log_q):
+        self.open_pages()
+        page, prefetched = self.pending.pop(query, (None, None))
+        if page is None:
+            page = take_page(self.pages, self.pending)
+        results = fetch_serp(page, query, log_q, self.engine, self.services.metrics,
+                             check_consent=not self.consent_ok, prefetched=prefetched)
+        self.consent_ok = results is not None
+        self.throttle_reason = "timeout" if results is None else None
+        self.served_by = self.engine.name
+        self.queries += 1
+        heap = 0
+        if should_measure_heap(self.config, self.queries):
+            try:
+                heap = page.evaluate(PAGE_MEMORY_JS) or 0
+            except Exception:
+                pass
+        reason = recycle_reason(self.config, self.queries, heap)
+        if reason:
+            log_put(log_q, f"[browser {self.engine.name}] contexte recycle ({reason})")
+            self.close_context(log_q)
+        return results
+
+    def close_context(self, log_q=None):
+        """Sauvegarde cookies / consentement puis ferme contexte et pages (la suivante repart à neuf ;
+        une requête préchargée sera rechargée normalement)."""
+        if self.context is not None:
+            save_storage_state(self.context, self.services, log_q, self.engine)
+            try:
+                self.context.close()
+            except Exception:
+                pass
+        self.context = None
+        self.pages = []
+        self.pending = {}
+        self.queries = 0
+
+    def close(self):
+        self.close_context()
+
+class PlaywrightBackendAsync(AsyncSearchBackend):
+    """Backend navigateur (API async) : un contexte par slot sur un navigateur partagé lancé à la demande
+    (deux pages avec config.pipeline, comme PlaywrightBackend)."""
+    name = BACKEND_BROWSER
+
+    def __init__(self, get_browser, config: RunConfig, services: RunServices, engine: SearchEngine = STARTPAGE):
+        self.get_browser = get_browser
+        self.config = config
+        self.services = services
+        self.engine = engine
+        self.can_prefetch = config.pipeline
+        self.context = None
+        self.pages = []
+        self.pending = {}
+        self.queries = 0
+        self.consent_ok = False
+
+    async def open_pages(self):
+        if not self.pages:
+            browser = await self.get_browser()
+            with span(self.services.metrics, "context_open"):
+                self.context, page = await new_search_page_async(browser, self.services, self.engine)
+                self.pages = [page, await self.context.new_page()] if self.can_prefetch else [page]
+
+    async def prefetch_async(self, query, log_q):
+        await self.open_pages()
+        page = idle_page(self.pages, self.pending)
+        if page is not None:
+            prefetched = await start_navigation_async(page, self.engine.query_url(query))
+            if prefetched is not None:
+                self.pending[query] = (page, prefetched)
+
+    async def fetch_async(self, query, log_q):
+        await self.open_pages()
+        page, prefetched = self.pending.pop(query, (None, None))
+        if page is None:
+            page = take_page(self.pages, self.pending)
+        results = await fetch_serp_async(page, query, log_q, self.engine, self.services.metrics,
+                                         check_consent=not self.consent_ok, prefetched=prefetched)
+        self.consent_ok = results is not None
+        self.throttle_reason = "timeout" if results is None else None
+        self.served_by = self.engine.name
+        self.queries += 1
+        heap = 0
+        if should_measure_heap(self.config, self.queries):
+            try:
+                heap = await page.evaluate(PAGE_MEMORY_JS) or 0
+            except Exception:
+                pass
+        reason = recycle_reason(self.config, self.queries, heap)
+        if reason:
+            log_put(log_q, f"[browser {self.engine.name}] contexte recycle ({reason})")
+            await self.close_async(log_q)
+        return results
+
+    async def close_async(self, log_q=None):
+        if self.context is not None:
+            await save_storage_state_async(self.context, self.services, log_q, self.engine)
+            try:
+                await self.context.close()
+            except Exception:
+                pass
+        self.context = None
+        self.pages = []
+        self.pending = {}
+        self.queries = 0
+
+def make_http_backend(engine: SearchEngine, metrics: RunMetrics = None) -> HttpSearchBackend:
+    return HttpSearchBackend(engine, MAX_RESULTS_CHECKED, SEARCH_CONTEXT_OPTIONS["user_agent"], metrics=metrics)
+
+def run_engines(config: RunConfig, services: RunServices) -> list:
+    return services.engines or resolve_engines(config.search_engines, config.search_url)
+
+def make_search_backend(make_browser_backend, config: RunConfig, services: RunServices) -> SearchBackend:
+    """Backend d'un worker : par moteur, HTTP avec repli navigateur (ou navigateur seul) ; avec plusieurs
+    moteurs, routage par services.engine_board. `make_browser_backend(engine)` crée le backend navigateur."""
+    backends = {}
+    for engine in run_engines(config, services):
+        backend = make_browser_backend(engine)
+        if config.backend == BACKEND_HTTP:
+            backend = FallbackBackend(make_http_backend(engine, services.metrics), backend, services.backend_stats)
+        backends[engine.name] = backend
+    if len(backends) == 1 or services.engine_board is None:
+        return next(iter(backends.values()))
+    return MultiEngineBackend(backends, services.engine_board)
+
+def make_rate_limiter(config: RunConfig) -> AdaptiveRateLimiter:
+    """Budget partagé par tous les workers ; --fast démarre plus haut au lieu de supprimer la cadence."""
+    if config.fast:
+        return AdaptiveRateLimiter(FAST_INITIAL_QPM, config.rate_min_qpm, FAST_MAX_QPM)
+    return AdaptiveRateLimiter(config.rate_initial_qpm, config.rate_min_qpm, config.rate_max_qpm)
+
+def search_worker(worker_id: int, config: RunConfig, jobs: queue.Queue, results: queue.Queue,
+                  stop_event: threading.Event, log_q: queue.Queue, services: RunServices):
+    """Un worker = son propre Playwright (API sync liée au thread), backend, navigateur et pages.
+    Consomme (row, entreprise, intitulé) dans `jobs`, pousse (row, entreprise, intitulé, url) dans `results`,
+    puis None quand il a terminé. En pipeline, le job suivant est pris d'avance et sa page lancée avant de
+    traiter le courant ; à l'arrêt, ce job n'est pas écrit (la reprise le refera)."""
+    try:
+        with sync_playwright() as p:
+            browser = None
+
+            def get_browser():
+                nonlocal browser
+                if browser is None:
+                    with span(services.metrics, "browser_launch"):
+                        browser = launch_browser(p, config)
+                return browser
+
+            backend = make_search_backend(lambda engine: PlaywrightBackend(get_browser, config, services, engine),
+                                          config, services)
+            try:
+                cache = services.cache
+                pipelined = backend.can_prefetch
+                job, acquired = jobs.get(), False
+                while job is not None and not stop_event.is_set():
+                    next_job = jobs.get() if pipelined else None
+                    next_acquired = next_job is not None and prefetch_search(
+                        backend, next_job[1], next_job[2], log_q, cache, services.limiter, stop_event,
+                        services.metrics)
+                    row, company_name, job_title = job
+                    log_put(log_q, f"[w{worker_id}] Entreprise: {company_name} • {job_title} (ligne {row})")
+                    linkedin_url = search_linkedin_profile(backend, company_name, job_title, log_q, cache,
+                                                           services.limiter, stop_event, services.metrics,
+                                                           acquired, services.archive)
+                    if isinstance(linkedin_url, SearchFailed) and stop_event.is_set():
+                        break   # recherche interrompue : la ligne reste à traiter (reprise)
+                    results.put((row, company_name, job_title, linkedin_url))
+                    job, acquired = (next_job, next_acquired) if pipelined else (jobs.get(), False)
+            finally:
+                try:
+                    backend.close()
+                finally:
+                    if browser is not None:
+                        browser.close()
+    except Exception as e:
+        log_put(log_q, f"[w{worker_id}] Erreur worker: {e}")
+    finally:
+        results.put(None)
+
+def run_sync_searches(config: RunConfig, jobs_list, n_workers: int, stop_event: threading.Event,
+                      log_q: queue.Queue, on_result, services: RunServices):
+    """Moteur sync (repli) : un thread par worker, résultats remontés au thread appelant."""
+    jobs = queue.Queue()
+    for job in jobs_list:
+        jobs.put(job)
+    for _ in range(n_workers):
+        jobs.put(None)
+
+    results = queue.Queue()
+    threads = [
+        threading.Thread(target=search_worker, args=(i + 1, config, jobs, results, stop_event, log_q, services),
+                         daemon=True)
+        for i in range(n_workers)
+    ]
+    for t in threads:
+        t.start()
+
+    finished = 0
+    stop_logged = False
+    try:
+        while finished < n_workers:
+            if stop_event.is_set() and not stop_logged:
+                log_put(log_q, "Arret demande. Fin des recherches en cours puis sauvegarde…")
+                stop_logged = True
+            try:
+                item = results.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if item is None:
+                finished += 1
+                continue
+            on_result(*item)
+    except Exception:
+        stop_event.set()
+        raise
+    finally:
+        for t in threads:
+            t.join()
+
+async def run_async_searches(config: RunConfig, jobs_list, concurrency: int, stop_event: threading.Event,
+                             log_q: queue.Queue, on_result, services: RunServices):
+    """Moteur async : un navigateur, `concurrency` slots (contexte isolé chacun) qui tirent les jobs à tour
+    de rôle ; en pipeline, chaque slot lance la page de son job suivant avant de traiter le courant.
+    Tourne dans le thread du run, ou sur la boucle de services.browser_host (navigateur déjà chaud, laissé
+    ouvert à la fin) ; `on_result` est appelé depuis la boucle (écrivain unique)."""
+    jobs = iter(jobs_list)   # partagé par les slots (une seule boucle : pas de verrou)
+    cache = services.cache
+    browser = None
+    browser_lock = asyncio.Lock()
+    stop_logged = False
+
+    async def slot_worker(slot, backend):
+        nonlocal stop_logged
+        pipelined = backend.can_prefetch
+        job, acquired = next(jobs, None), False
+        while job is not None:
+            if stop_event.is_set():
+                if not stop_logged:
+                    log_put(log_q, "Arret demande. Fin des recherches en cours puis sauvegarde…")
+                    stop_logged = True
+                return
+            next_job = next(jobs, None) if pipelined else None
+            next_acquired = next_job is not None and await prefetch_search_async(
+                backend, next_job[1], next_job[2], log_q, cache, services.limiter, stop_event, services.metrics)
+            row, company_name, job_title = job
+            log_put(log_q, f"[w{slot}] Entreprise: {company_name} • {job_title} (ligne {row})")
+            linkedin_url = await search_linkedin_profile_async(backend, company_name, job_title, log_q,
+                                                              cache, services.limiter, stop_event,
+                                                              services.metrics, acquired, services.archive)
+            if isinstance(linkedin_url, SearchFailed) and stop_event.is_set():
+                return   # recherche interrompue : la ligne reste à traiter (reprise)
+            on_result(row, company_name, job_title, linkedin_url)
+            job, acquired = (next_job, next_acquired) if pipelined else (next(jobs, None), False)
+
+    async def run_slots(get_browser):
+        slots = [make_search_backend(lambda engine: PlaywrightBackendAsync(get_browser, config, services, engine),
+                                     config, services)
+                 for _ in range(concurrency)]
+        try:
+            await asyncio.gather(*(slot_worker(i + 1, backend) for i, backend in enumerate(slots)))
+        finally:
+            for backend in slots:
+                try:
+                    await backend.close_async()
+                except Exception:
+                    pass
+
+    host = services.browser_host
+    if host is not None:
+        launch_options = browser_launch_options(config)
+        await run_slots(lambda: host.get_browser(launch_options, services.metrics))
+        return
+
+    async with async_playwright() as p:
+        async def get_browser():
+            nonlocal browser
+            async with browser_lock:
+                if browser is None:
+                    with span(services.metrics, "browser_launch"):
+                        browser = await p.chromium.launch(**browser_launch_options(config))
+            return browser
+
+        try:
+            await run_slots(get_browser)
+        finally:
+            if browser is not None:
+                await browser.close()
+
+def storage_state_path_for(config: RunConfig) -> str:
+    if not config.persist_storage:
+        return ""
+    return config.storage_state_path or os.path.join(os.path.dirname(os.path.abspath(config.excel_path)),
+                                                     STORAGE_STATE_FILENAME)
+
+def open_search_cache(config: RunConfig, log_q: queue.Queue):
+    if config.cache_mode == CACHE_OFF:
+        return None
+    path = config.cache_path or os.path.join(os.path.dirname(os.path.abspath(config.excel_path)), CACHE_FILENAME)
+    try:
+        return SearchCache(path, config.cache_mode, config.cache_ttl_hours, config.cache_max_entries)
+    except Exception as e:
+        log_put(log_q, f"Cache indisponible: {e}")
+        return None
+
+def archive_path_for(config: RunConfig) -> str:
+    return config.archive_path or os.path.join(os.path.dirname(os.path.abspath(config.excel_path)), ARCHIVE_FILENAME)
+
+def open_serp_archive(config: RunConfig, log_q: queue.Queue):
+    if not config.archive:
+        return None
+    try:
+        return SerpArchive(archive_path_for(config))
+    except Exception as e:
+        log_put(log_q, f"Archive indisponible: {e}")
+        return None
+
+# Fichier de travail : xlsx ou SQLite selon l'extension (working_store.py), mêmes numéros de ligne
+def read_sheet_header(excel_path: str, sheet_name: str):
+    """(A1, (B1, C1, ...)) en lecture seule ; les intitulés s'arrêtent à la première cellule vide."""
+    with open_store(excel_path, sheet_name) as store:
+        return store.header()
+
+def iter_sheet_rows(excel_path: str, sheet_name: str, max_row: int = None, result_columns: int = 1):
+    """Génère (row, entreprise, (url B, url C, ...)) à partir de la ligne 2, en lecture seule (streaming),
+    sans jamais écrire ; `result_columns` = nombre de colonnes de résultats (une par intitulé)."""
+    with open_store(excel_path, sheet_name) as store:
+        yield from store.iter_rows(max_row, result_columns)
+
+def write_results_to_workbook(excel_path: str, sheet_name: str, job_titles, found: dict):
+    """Seule écriture du run : en-têtes (A1, intitulés en B1, C1...) + URLs trouvées ({(row, col): url})."""
+    with open_store(excel_path, sheet_name) as store:
+        store.write_results(parse_job_titles(job_titles), found)
+
+def merge_journal_into_workbook(excel_path: str, sheet_name: str) -> int:
+    """Fusion hors run (ex. après un crash) : journal -> fichier de travail, une seule écriture.
+    Reporte chaque URL dans sa cellule (même ligne, même entreprise). Idempotent."""
+    journaled = RunJournal(journal_path_for(excel_path)).replay()
+    if not journaled or not os.path.isfile(excel_path):
+        return 0
+    with open_store(excel_path, sheet_name) as store:
+        return store.apply_journal(journaled)
+
+def merge_shards_into_workbook(excel_path: str, sheet_name: str, job_titles=None, shard_paths=None,
+                               shard_count: int = None):
+    """Fusionne les fichiers de shards dans le xlsx, dans l'ordre des lignes d'origine.
+    `shard_count` : nombre de shards du run (sinon celui des fichiers les plus récents).
+    Renvoie (cellules fusionnées, URLs écrites)."""
+    paths = shard_paths if shard_paths is not None else find_shard_results(excel_path, shard_count)
+    merged = collect_shard_results(paths)
+    companies = {row: company.strip() for row, company, _ in iter_sheet_rows(excel_path, sheet_name)}
+    found = {}
+    for cell in sorted(merged):
+        company, url = merged[cell]
+        if url and companies.get(cell[0]) == company:
+            found[cell] = url
+    if not job_titles:
+        _, job_titles = read_sheet_header(excel_path, sheet_name)
+    write_results_to_workbook(excel_path, sheet_name, job_titles or (DEFAULT_JOB_TITLE,), found)
+    return len(merged), len(found)
+
+def run_scraper(config: RunConfig, stop_event: threading.Event, log_q: queue.Queue, update_q: queue.Queue,
+                save_request: threading.Event = None, browser_host: BrowserHost = None):
+    """Les résultats sont journalisés ligne à ligne ; le xlsx n'est écrit qu'à la fin
+    (ou quand `save_request` est levé). En mode shard, le xlsx n'est jamais écrit :
+    les résultats restent dans le fichier du shard, à fusionner avec merge_shards_into_workbook.
+    `browser_host` (interface) garde Chromium ouvert d'un run à l'autre avec le moteur async."""
+    if config.rematch:
+        rematch_from_archive(config, stop_event, log_q, update_q)
+        return
+    companies_processed = 0
+    searches_done = 0
+    sharded = config.shard_count > 1
+    urls_found = 0
+    titles = config.titles()
+    columns = {title: result_column(i) for i, title in enumerate(titles)}
+    urls_by_title = dict.fromkeys(titles, 0)
+    try:
+        engines = resolve_engines(config.search_engines, config.search_url)
+    except ValueError as e:
+        log_put(log_q, f"Moteurs de recherche: {e}")
+        return
+
+    log_put(log_q, f"Demarrage du scraper ({', '.join(e.name for e in engines)})")
+    log_put(log_q, f"Mode: {'TEST (10 entreprises)' if config.test_mode else 'COMPLET'}")
+    log_put(log_q, f"Navigateur: {'Invisible' if config.headless else 'Visible'}")
+    if len(titles) > 1:
+        log_put(log_q, "Intitules: " + ", ".join(f"{t} ({column_letter(columns[t])})" for t in titles))
+    if sharded:
+        log_put(log_q, f"Shard: {config.shard_index + 1}/{config.shard_count}")
+    log_put(log_q, "-" * 60)
+
+    try:
+        if store_kind(config.excel_path) not in WORKING_STORES:
+            raise ValueError("CSV: import / export seulement (convertir en .xlsx ou .sqlite3 pour un run)")
+        ensure_workbook_exists(config.excel_path, config.sheet_name)
+    except Exception as e:
+        log_put(log_q, f"Fichier de travail: {e}")
+        return
+    metrics = RunMetrics()
+
+    max_row = 11 if config.test_mode else None
+    found = {}   # (row, col) -> url, écrit dans le xlsx en une fois à la fin
+
+    # Le journal d'un run précédent interrompu (ou le fichier du shard) est toujours relu : ses URLs sont
+    # reprises, et recopiées dans le nouveau journal s'il est remis à zéro ; la reprise saute en plus ses cellules
+    if sharded:
+        journal = RunJournal(shard_results_path(config.excel_path, config.shard_index, config.shard_count))
+    else:
+        journal = RunJournal(journal_path_for(config.excel_path))
+    journaled = journal.replay()
+    merged = 0
+    carried = []   # URLs du journal précédent, réécrites si le journal repart de zéro
+    skipped_filled = 0
+    replayed = 0
+
+    # Lecture unique de la feuille pour tous les intitulés ; une cellule (ligne, intitulé) = une recherche
+    pending_rows = []
+    pending_titles = {}   # row -> intitulés restant à chercher
+    try:
+        with metrics.span("read_sheet"):
+            for row, company_name, urls in iter_sheet_rows(config.excel_path, config.sheet_name, max_row,
+                                                           len(titles)):
+                company_name = company_name.strip()
+                if not company_name:
+                    continue
+                if sharded and shard_of(company_name, config.shard_count) != config.shard_index:
+                    continue
+                pending = []
+                for title, url in zip(titles, urls):
+                    col = columns[title]
+                    entry = journaled.get((row, col))
+                    if entry and entry[0] == company_name:
+                        if entry[1]:
+                            carried.append((row, company_name, entry[1], col))
+                        if entry[1] and entry[1] != url:
+                            found[(row, col)] = url = entry[1]
+                            update_q.put({"row": row, "col": col, "url": url})
+                            merged += 1
+                        if config.resume:
+                            replayed += 1
+                            continue
+                    if config.resume and url.strip():
+                        skipped_filled += 1
+                        continue
+                    pending.append(title)
+                if pending:
+                    pending_rows.append((row, company_name))
+                    pending_titles[row] = pending
+    except Exception as e:
+        log_put(log_q, f"Erreur ouverture du fichier de travail: {e}")
+        return
+
+    # Pré-passe : une recherche par nom normalisé ("ACME", "Acme SAS"...) et par intitulé, résultat recopié
+    # sur tout le groupe ; les intitulés d'une même entreprise se suivent (session navigateur partagée)
+    cells_to_search = sum(len(pending) for pending in pending_titles.values())
+    groups = {}   # (1re ligne, intitulé) -> [(row, entreprise), ...]
+    for members in group_by_company(pending_rows).values():
+        for title in titles:
+            cell_members = [(row, name) for row, name in members if title in pending_titles[row]]
+            if cell_members:
+                groups[(cell_members[0][0], title)] = cell_members
+    # Requête et correspondance sur le nom de la cellule (1re ligne du groupe) : la clé sans forme juridique
+    # ne sert qu'au regroupement, un reste court ("Ti") ferait correspondre des profils sans rapport
+    jobs_list = [(row, members[0][1], title) for (row, title), members in groups.items()]
+    searches_saved = cells_to_search - len(jobs_list)
+
+    if merged:
+        log_put(log_q, f"Journal precedent: {merged} URLs recuperees")
+    if config.resume:
+        log_put(log_q, f"Reprise: {replayed} lignes rejouees depuis le journal, {skipped_filled} deja remplies")
+    try:
+        journal.open(reset=not config.resume)
+        if carried and not config.resume:
+            journal.extend(carried)
+    except Exception as e:
+        log_put(log_q, f"Journal indisponible: {e}")
+
+    n_workers = max(1, min(int(config.workers or 1), MAX_WORKERS, len(jobs_list) or 1))
+    engine = config.engine if config.engine in (ENGINE_ASYNC, ENGINE_SYNC) else DEFAULT_ENGINE
+    log_put(log_q, f"Moteur: {engine}  •  Backend: {config.backend}  •  Workers: {n_workers}")
+    if searches_saved:
+        log_put(log_q, f"Doublons: {cells_to_search} cellules -> {len(jobs_list)} recherches")
+    if config.pipeline:
+        if config.backend == BACKEND_BROWSER and len(engines) == 1:
+            log_put(log_q, "Pipeline: 2 pages par worker (requete suivante prechargee)")
+        else:
+            log_put(log_q, "Pipeline: sans effet avec le backend http ou plusieurs moteurs")
+
+    def handle_result(row, company_name, job_title, linkedin_url):
+        """Un résultat de recherche, recopié sur chaque ligne du groupe (journal, grille, xlsx).
+        Une recherche en échec repart dans `retries` ; à court d'essais, rien n'est journalisé
+        (une reprise la refera). Une requête ignorée par le cache n'est ni journalisée ni comptée en
+        "pas de match"."""
+        nonlocal companies_processed, searches_done, urls_found
+        job = (row, company_name, job_title)
+        members = groups[(row, job_title)]
+        if linkedin_url is SKIPPED:
+            searches_done += 1
+            outcomes["skipped"] += 1
+            for member_row, member_name in members:
+                companies_processed += 1
+                log_put(log_q, f"[{companies_processed}] {member_name}: ignoree (absente du cache), "
+                               f"ligne {member_row} laissee telle quelle")
+        elif isinstance(linkedin_url, SearchFailed):
+            delay = retries.schedule(job)
+            if delay is not None:
+                log_put(log_q, f"[essais] {company_name} • {job_title}: echec ({linkedin_url.reason}), "
+                               f"nouvel essai dans {delay:.0f} s ({retries.attempts(job)}/{retries.max_attempts})")
+            else:
+                searches_done += 1
+                outcomes["failed"] += 1
+                for member_row, member_name in members:
+                    companies_processed += 1
+                    log_put(log_q, f"[{companies_processed}] {member_name}: Echec ({linkedin_url.reason}) apres "
+                                   f"{retries.attempts(job)} essai(s), ligne {member_row} laissee vide")
+        else:
+            searches_done += 1
+            outcomes["found" if linkedin_url else "no_match"] += 1
+            if retries.attempts(job):
+                outcomes["recovered"] += 1
+            col = columns[job_title]
+            for member_row, member_name in members:
+                companies_processed += 1
+                try:
+                    with metrics.span("journal_append"):
+                        journal.append(member_row, member_name, linkedin_url, col)
+                except Exception as e:
+                    log_put(log_q, f"Journal: {e}")
+                if linkedin_url:
+                    found[(member_row, col)] = linkedin_url
+                    urls_found += 1
+                    urls_by_title[job_title] += 1
+                    update_q.put({"row": member_row, "col": col, "url": linkedin_url})
+                    log_put(log_q, f"[{companies_processed}] {member_name}: URL ecrite en "
+                                   f"{column_letter(col)}{member_row}")
+                else:
+                    log_put(log_q, f"[{companies_processed}] {member_name}: Pas de match")
+            if searches_done % RATE_LOG_EVERY == 0:
+                log_put(log_q, services.limiter.status())
+
+        if save_request is not None and save_request.is_set() and not sharded:
+            save_request.clear()
+            try:
+                with metrics.span("save_xlsx"):
+                    write_results_to_workbook(config.excel_path, config.sheet_name, titles, found)
+                log_put(log_q, f"Sauvegarde demandee ({companies_processed})")
+            except Exception as e:
+                log_put(log_q, f"Sauvegarde demandee: {e}")
+
+    retries = RetryQueue(config.retry_attempts, config.retry_delay)
+    outcomes = dict.fromkeys(("found", "no_match", "failed", "skipped", "recovered"), 0)   # par recherche
+
+    def run_searches(jobs):
+        if engine == ENGINE_ASYNC:
+            searches = run_async_searches(config, jobs, n_workers, stop_event, log_q, handle_result, services)
+            if services.browser_host is not None:
+                services.browser_host.run(searches)
+            else:
+                asyncio.run(searches)
+        else:
+            run_sync_searches(config, jobs, n_workers, stop_event, log_q, handle_result, services)
+
+    cache = open_search_cache(config, log_q)
+    services = RunServices(cache=cache, backend_stats=BackendStats(), limiter=make_rate_limiter(config),
+                           metrics=metrics, storage_state_path=storage_state_path_for(config), engines=engines,
+                           archive=open_serp_archive(config, log_q))
+    if len(engines) > 1:
+        services.engine_board = EngineBoard(engines)
+    if engine == ENGINE_ASYNC and browser_host is not None:
+        services.browser_host = browser_host
+        if browser_host.warm:
+            log_put(log_q, "Navigateur deja ouvert (run precedent)")
+    if config.block_resources:
+        services.block_policy = BlockPolicy(tuple(config.block_types), tuple(config.block_domains),
+                                            tuple(config.allow_domains))
+        services.block_stats = BlockStats()
+    completed = False
+    try:
+        with metrics.span("searches_total"):
+            run_searches(jobs_list)
+            # Échecs refaits après la passe principale, par vagues, quand leur délai est écoulé
+            while len(retries) and not stop_event.is_set():
+                wait = retries.next_due_in()
+                if wait > 0:
+                    log_put(log_q, f"Nouveaux essais: {len(retries)} recherche(s) dans {wait:.0f} s")
+                    if stop_event.wait(wait):
+                        break
+                batch = retries.pop_due()
+                log_put(log_q, f"Nouvel essai de {len(batch)} recherche(s)")
+                run_searches(batch)
+        completed = not stop_event.is_set() and searches_done >= len(jobs_list)
+    except Exception as e:
+        log_put(log_q, f"Erreur inattendue: {e}")
+    finally:
+        saved = False
+        if not sharded:
+            try:
+                with metrics.span("save_xlsx"):
+                    write_results_to_workbook(config.excel_path, config.sheet_name, titles, found)
+                saved = True
+            except Exception as e:
+                log_put(log_q, f"Sauvegarde finale: {e}")
+        if cache:
+            cache.close()
+        if services.archive:
+            archive_summary = services.archive.summary()
+            services.archive.close()
+        # Journal conservé tant que le run n'est pas allé au bout (reprise possible) ; fichier de shard toujours
+        if completed and saved:
+            journal.discard()
+        else:
+            journal.close()
+        if sharded:
+            log_put(log_q, f"Resultats du shard: {journal.path}")
+
+    log_put(log_q, "\n" + "=" * 60)
+    log_put(log_q, "RESUME")
+    log_put(log_q, "=" * 60)
+    log_put(log_q, f"Entreprises traitees: {companies_processed}")
+    log_put(log_q, f"URLs trouvees: {urls_found}")
+    if len(titles) > 1:
+        for title in titles:
+            log_put(log_q, f"  {title} ({column_letter(columns[title])}): {urls_by_title[title]}")
+    log_put(log_q, f"Recherches: {searches_done} (evitees par dedoublonnage: {searches_saved})")
+    log_put(log_q, f"Issues: profil {outcomes['found']}, pas de match {outcomes['no_match']}, "
+                   f"echec {outcomes['failed']}, ignorees (cache) {outcomes['skipped']}, "
+                   f"non traitees {len(jobs_list) - searches_done}")
+    if retries.scheduled:
+        log_put(log_q, f"Nouveaux essais: {retries.scheduled} (recherches recuperees: {outcomes['recovered']})")
+    if cache:
+        log_put(log_q, cache.summary())
+    if services.archive:
+        log_put(log_q, archive_summary)
+    if services.block_stats:
+        log_put(log_q, services.block_stats.summary())
+    if config.backend == BACKEND_HTTP:
+        log_put(log_q, services.backend_stats.summary())
+    if services.engine_board:
+        log_put(log_q, services.engine_board.summary())
+    log_put(log_q, services.limiter.summary())
+    log_put(log_q, "Temps par phase:")
+    for line in metrics.summary_lines():
+        log_put(log_q, line)
+    if config.metrics_export:
+        export_run_metrics(config, metrics, journal.path if sharded else config.excel_path, log_q,
+                           companies_processed=companies_processed, urls_found=urls_found,
+                           searches=searches_done, searches_saved=searches_saved,
+                           searches_found=outcomes["found"], searches_no_match=outcomes["no_match"],
+                           searches_failed=outcomes["failed"], searches_skipped=outcomes["skipped"],
+                           retries=retries.scheduled,
+                           retries_recovered=outcomes["recovered"],
+                           effective_qpm=round(services.limiter.effective_qpm(), 2),
+                           completed=int(completed),
+                           **(services.engine_board.counters() if services.engine_board else {}),
+                           **(services.block_stats.counters() if services.block_stats else {}))
+
+def rematch_from_archive(config: RunConfig, stop_event: threading.Event, log_q: queue.Queue, update_q: queue.Queue):
+    """Rejoue match_linkedin_profile sur les pages archivées (même requête que le run : nom de la cellule, ou
+    à défaut celui de la 1re ligne de même company_key, + intitulé), sans navigateur ni réseau, puis une seule
+    écriture du fichier de travail. Les cellules sans page archivée restent telles quelles ; avec `rematch_clear`,
+    une URL que la page archivée ne justifie plus est effacée (sinon conservée et comptée). Tout le fichier est
+    traité, shards compris."""
+    titles = config.titles()
+    columns = {title: result_column(i) for i, title in enumerate(titles)}
+    path = archive_path_for(config)
+    if not os.path.isfile(path):
+        log_put(log_q, f"Archive introuvable: {path}")
+        return
+    log_put(log_q, f"Re-matching depuis l'archive ({os.path.basename(path)}), sans recherche")
+
+    # Un journal de run interrompu rejouerait ses anciennes URLs par-dessus au prochain run
+    journal = RunJournal(journal_path_for(config.excel_path))
+    if os.path.isfile(journal.path):
+        applied = merge_journal_into_workbook(config.excel_path, config.sheet_name)
+        journal.discard()
+        log_put(log_q, f"Journal precedent fusionne ({applied} URLs) puis retire")
+
+    metrics = RunMetrics()
+    archive = SerpArchive(path)
+    matched_by_query = {}   # requête normalisée -> URL, "" (pas de profil) ou None (pas archivée)
+    first_names = {}        # company_key -> nom de la 1re ligne (nom cherché pour tout le groupe)
+    found = {}
+    cells = matched = changed = missing = stale = 0
+    start = time.perf_counter()
+    try:
+        with metrics.span("rematch"):
+            for row, company_name, urls in iter_sheet_rows(config.excel_path, config.sheet_name,
+                                                           11 if config.test_mode else None, len(titles)):
+                if stop_event.is_set():
+                    break
+                company_name = company_name.strip()
+                if not company_name:
+                    continue
+                names = [company_name]
+                first_name = first_names.setdefault(company_key(company_name), company_name)
+                if first_name != company_name:
+                    names.append(first_name)   # doublon cherché au run sous le nom de la 1re ligne du groupe
+                for title, url in zip(titles, urls):
+                    cells += 1
+                    for name in names:
+                        key = normalize_query(build_query(name, title))
+                        if key not in matched_by_query:
+                            results = archive.get(build_query(name, title))
+                            matched_by_query[key] = None if results is None else (
+                                match_linkedin_profile(results, name) or "")
+                        if matched_by_query[key] is not None:
+                            break
+                    new_url, url = matched_by_query[key], url.strip()
+                    if new_url is None:
+                        missing += 1
+                        continue
+                    if new_url:
+                        matched += 1
+                    elif url:
+                        stale += 1
+                        if not config.rematch_clear:
+                            continue
+                    if new_url != url:
+                        col = columns[title]
+                        found[(row, col)] = new_url
+                        update_q.put({"row": row, "col": col, "url": new_url})
+                        changed += 1
+        if found and not stop_event.is_set():
+            with metrics.span("save_xlsx"):
+                write_results_to_workbook(config.excel_path, config.sheet_name, titles, found)
+    except Exception as e:
+        log_put(log_q, f"Re-matching: {e}")
+        return
+    finally:
+        archive.close()
+
+    log_put(log_q, "\n" + "=" * 60)
+    log_put(log_q, "RESUME (re-matching)")
+    log_put(log_q, "=" * 60)
+    if stop_event.is_set():
+        log_put(log_q, "Arret demande : fichier de travail inchange")
+    used = sum(v is not None for v in matched_by_query.values())
+    log_put(log_q, f"Cellules: {cells} ({used} pages archivees utilisees)")
+    log_put(log_q, f"Profils trouves: {matched}  •  cellules modifiees: {changed}")
+    log_put(log_q, f"Sans page archivee (a rechercher): {missing}")
+    if stale:
+        log_put(log_q, f"URLs que l'archive ne justifie plus: {stale} "
+                       f"({'effacees' if config.rematch_clear else 'conservees'})")
+    log_put(log_q, f"Duree: {time.perf_counter() - start:.1f} s")
+
+def export_run_metrics(config: RunConfig, metrics: RunMetrics, results_path: str, log_q: queue.Queue, **counters):
+    """<résultats>.metrics.json + <résultats>.metrics.prom (format texte Prometheus), réécrits à chaque run."""
+    for name, value in counters.items():
+        metrics.set_counter(name, value)
+    json_path, prom_path = metrics_paths_for(config.metrics_path or results_path)
+    try:
+        metrics.export(json_path, prom_path)
+        log_put(log_q, f"Mesures: {json_path}, {prom_path}")
+    except Exception as e:
+        log_put(log_q, f"Export des mesures: {e}")
+
+def write_grid_to_workbook(excel_path: str, sheet_name: str, job_titles, rows):
+    """Réécrit A et les colonnes de résultats depuis la grille : rows = [(entreprise, url B, url C...), ...]."""
+    ensure_workbook_exists(excel_path, sheet_name)
+    with open_store(excel_path, sheet_name) as store:
+        store.write_grid(parse_job_titles(job_titles) or (DEFAULT_JOB_TITLE,), rows)
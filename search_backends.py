@@ -0,0 +1,245 @@
+import asyncio
+import gzip
+import http.client
+import socket
+import threading
+import urllib.parse
+import zlib
+
+from run_metrics import span
+from serp_html import extract_serp_html
+
+# ========= Backends de recherche =========
+# "browser" : Playwright uniquement ; "http" : client HTTP + parseur, repli navigateur si besoin
+BACKEND_BROWSER = "browser"
+BACKEND_HTTP = "http"
+BACKENDS = (BACKEND_HTTP, BACKEND_BROWSER)
+
+HTTP_TIMEOUT = 15
+MAX_REDIRECTS = 3
+CONSENT_MARKERS = ("consent", "cookie-banner", "accept-choices")
+CAPTCHA_MARKERS = ("captcha", "are you a robot", "unusual traffic")
+THROTTLE_STATUSES = (403, 429, 503)
+
+def log(log_q, msg):
+    if log_q is not None:
+        log_q.put(msg + "\n")
+
+class AsyncSearchBackend:
+    """fetch_async(query) -> [(url, titre, extrait), ...], ou None si pas de résultats exploitables.
+    `throttle_reason` : signal de blocage de la dernière requête (timeout, captcha, http-429...), sinon None.
+    `can_prefetch` : prefetch(query) lance le chargement de la requête suivante sans l'attendre (pipeline).
+    `served_by` : moteur de recherche qui a produit les derniers résultats (archive).
+    `wants_fallback` : page reçue mais inexploitable sans navigateur (consentement, aucun bloc) ; un blocage
+    (throttle_reason) n'en fait jamais partie : il est laissé au limiteur et aux nouveaux essais."""
+    name = "base"
+    throttle_reason = None
+    wants_fallback = False
+    can_prefetch = False
+    served_by = None
+
+    async def fetch_async(self, query, log_q):
+        raise NotImplementedError
+
+    async def prefetch_async(self, query, log_q):
+        pass
+
+    async def close_async(self):
+        pass
+
+class SearchBackend(AsyncSearchBackend):
+    """Backend sync : fetch(query) ; la version async tourne dans un thread (asyncio.to_thread).
+    Les composites (repli, moteurs multiples) passent par l'une ou l'autre API selon le moteur d'exécution."""
+
+    def fetch(self, query, log_q):
+        raise NotImplementedError
+
+    async def fetch_async(self, query, log_q):
+        return await asyncio.to_thread(self.fetch, query, log_q)
+
+    def prefetch(self, query, log_q):
+        pass
+
+    async def prefetch_async(self, query, log_q):
+        self.prefetch(query, log_q)
+
+    def close(self):
+        pass
+
+    async def close_async(self):
+        self.close()
+
+class BackendStats:
+    """Nombre de requêtes servies par backend (partagé entre workers)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.served = {}
+        self.fallbacks = 0
+
+    def record(self, name: str):
+        with self._lock:
+            self.served[name] = self.served.get(name, 0) + 1
+
+    def record_fallback(self):
+        with self._lock:
+            self.fallbacks += 1
+
+    def summary(self) -> str:
+        detail = ", ".join(f"{n}={c}" for n, c in sorted(self.served.items()))
+        return f"Backends: {detail or '-'} (replis navigateur: {self.fallbacks})"
+
+class FallbackBackend(SearchBackend):
+    """Essaie `primary` ; ne passe à `fallback` que si `primary` demande le repli (wants_fallback).
+    Sur un blocage (http-429, captcha...), None avec la raison de `primary`."""
+
+    def __init__(self, primary: SearchBackend, fallback: SearchBackend, stats: BackendStats = None):
+        self.primary = primary
+        self.fallback = fallback
+        self.stats = stats or BackendStats()
+        self.name = f"{primary.name}+{fallback.name}"
+
+    def fetch(self, query, log_q):
+        results = self.primary.fetch(query, log_q)
+        self.throttle_reason = self.primary.throttle_reason
+        if results is not None:
+            self.stats.record(self.primary.name)
+            self.served_by = self.primary.served_by
+            return results
+        if self.throttle_reason or not self.primary.wants_fallback:
+            return None
+        self.stats.record_fallback()
+        log(log_q, f"[{self.primary.name}] repli {self.fallback.name}")
+        results = self.fallback.fetch(query, log_q)
+        self.throttle_reason = self.throttle_reason or self.fallback.throttle_reason
+        if results is not None:
+            self.stats.record(self.fallback.name)
+            self.served_by = self.fallback.served_by
+        return results
+
+    async def fetch_async(self, query, log_q):
+        results = await self.primary.fetch_async(query, log_q)
+        self.throttle_reason = self.primary.throttle_reason
+        if results is not None:
+            self.stats.record(self.primary.name)
+            self.served_by = self.primary.served_by
+            return results
+        if self.throttle_reason or not self.primary.wants_fallback:
+            return None
+        self.stats.record_fallback()
+        log(log_q, f"[{self.primary.name}] repli {self.fallback.name}")
+        results = await self.fallback.fetch_async(query, log_q)
+        self.throttle_reason = self.throttle_reason or self.fallback.throttle_reason
+        if results is not None:
+            self.stats.record(self.fallback.name)
+            self.served_by = self.fallback.served_by
+        return results
+
+    def close(self):
+        try:
+            self.primary.close()
+        finally:
+            self.fallback.close()
+
+    async def close_async(self):
+        try:
+            await self.primary.close_async()
+        finally:
+            await self.fallback.close_async()
+
+class HttpSearchBackend(SearchBackend):
+    """GET de la page de résultats d'un moteur (search_engines.SearchEngine) sur une connexion keep-alive,
+    parsée avec la même cascade de sélecteurs que dans le navigateur."""
+    name = "http"
+
+    def __init__(self, engine, limit: int, user_agent: str, timeout: float = HTTP_TIMEOUT, metrics=None):
+        self.engine = engine
+        self.metrics = metrics
+        self.limit = limit
+        self.timeout = timeout
+        self.headers = {
+            "User-Agent": user_agent,
+            "Accept": "text/html,application/xhtml+xml",
+            "Accept-Language": "fr-FR,fr;q=0.9,en;q=0.8",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        }
+        self._conns = {}   # (scheme, netloc) -> connexion réutilisée
+
+    def _connection(self, scheme, netloc):
+        conn = self._conns.get((scheme, netloc))
+        if conn is None:
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = cls(netloc, timeout=self.timeout)
+            self._conns[(scheme, netloc)] = conn
+        return conn
+
+    def _get(self, url):
+        """(status, corps décodé) en suivant les redirections ; une reconnexion si le keep-alive a expiré."""
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            path = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+            for attempt in (1, 2):
+                conn = self._connection(parts.scheme, parts.netloc)
+                try:
+                    conn.request("GET", path, headers=self.headers)
+                    resp = conn.getresponse()
+                    body = resp.read()
+                    break
+                except (http.client.HTTPException, OSError) as e:
+                    conn.close()
+                    self._conns.pop((parts.scheme, parts.netloc), None)
+                    if attempt == 2 or isinstance(e, socket.timeout):   # moteur lent : pas un 2e délai complet
+                        raise
+            if resp.status in (301, 302, 303, 307, 308) and resp.getheader("Location"):
+                url = urllib.parse.urljoin(url, resp.getheader("Location"))
+                continue
+            encoding = (resp.getheader("Content-Encoding") or "").lower()
+            if encoding == "gzip":
+                body = gzip.decompress(body)
+            elif encoding == "deflate":
+                body = zlib.decompress(body)
+            charset = resp.headers.get_content_charset() or "utf-8"
+            return resp.status, body.decode(charset, errors="replace")
+        raise http.client.HTTPException("trop de redirections")
+
+    def fetch(self, query, log_q):
+        self.throttle_reason = None
+        self.wants_fallback = False
+        url = self.engine.query_url(query)
+        tag = f"[http {self.engine.name}]"
+        try:
+            with span(self.metrics, "http_get"):
+                status, html = self._get(url)
+        except Exception as e:
+            # Moteur lent ou injoignable : recul du limiteur comme pour un blocage
+            self.throttle_reason = "timeout" if isinstance(e, socket.timeout) else "erreur"
+            log(log_q, f"{tag} erreur: {e}")
+            return None
+        if status >= 400:
+            log(log_q, f"{tag} statut {status}")
+            if status in THROTTLE_STATUSES:
+                self.throttle_reason = f"http-{status}"
+            return None
+        with span(self.metrics, "http_parse"):
+            _, count, results = extract_serp_html(html, self.engine.block_selectors, self.engine.link_selectors,
+                                                  self.engine.snippet_selectors, self.limit)
+        if not count:
+            lowered = html.lower()
+            if any(m in lowered for m in CAPTCHA_MARKERS):
+                reason = self.throttle_reason = "captcha"
+            elif any(m in lowered for m in CONSENT_MARKERS):
+                reason = "consentement"   # normal sans cookies : le navigateur prend le relais
+            else:
+                reason = "aucun bloc"
+            self.wants_fallback = self.throttle_reason is None
+            log(log_q, f"{tag} page inexploitable ({reason})")
+            return None
+        log(log_q, f"Nombre de resultats: {count}")
+        self.served_by = self.engine.name
+        return self.engine.clean_results(results)
+
+    def close(self):
+        for conn in self._conns.values():
+            conn.close()
+        self._conns.clear()
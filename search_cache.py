@@ -0,0 +1,128 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+# ========= Cache des recherches (SQLite) =========
+CACHE_FILENAME = "search_cache.sqlite3"
+
+# Modes : "off" (pas de cache), "use" (cache frais servi, le reste interrogé),
+# "refresh" (seules les entrées périmées sont ré-interrogées ; les requêtes jamais vues sont ignorées)
+CACHE_OFF = "off"
+CACHE_USE = "use"
+CACHE_REFRESH_STALE = "refresh"
+CACHE_MODES = (CACHE_OFF, CACHE_USE, CACHE_REFRESH_STALE)
+
+class SkippedQuery:
+    """get() en mode "refresh" pour une requête jamais vue : ni recherchée, ni "pas de match"."""
+    __slots__ = ()
+
+    def __repr__(self):
+        return "SKIPPED"
+
+SKIPPED = SkippedQuery()
+
+DEFAULT_CACHE_TTL_HOURS = 24 * 7
+DEFAULT_CACHE_MAX_ENTRIES = 200_000
+EVICT_EVERY = 200   # nb d'écritures entre deux passes d'éviction
+
+def normalize_query(query: str) -> str:
+    """Clé de cache : NFKC, casse ignorée, espaces compactés."""
+    q = unicodedata.normalize("NFKC", query or "")
+    return re.sub(r"\s+", " ", q).strip().casefold()
+
+class SearchCache:
+    """Résultats extraits (url, titre, extrait) par requête normalisée, partagé entre workers."""
+
+    def __init__(self, path: str, mode: str = CACHE_USE,
+                 ttl_hours: float = DEFAULT_CACHE_TTL_HOURS,
+                 max_entries: int = DEFAULT_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.mode = mode if mode in CACHE_MODES else CACHE_USE
+        self.ttl_seconds = max(0.0, float(ttl_hours)) * 3600
+        self.max_entries = max(1, int(max_entries))
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS serp_cache ("
+            " query TEXT PRIMARY KEY,"
+            " results TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS serp_cache_fetched ON serp_cache(fetched_at)")
+        self._conn.commit()
+
+    def _lookup(self, key: str):
+        """("hit" | "stale" | "absent", résultats)."""
+        row = self._conn.execute(
+            "SELECT results, fetched_at FROM serp_cache WHERE query = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return "absent", None
+        results, fetched_at = row
+        if self.ttl_seconds and time.time() - fetched_at > self.ttl_seconds:
+            return "stale", None
+        return "hit", [tuple(r) for r in json.loads(results)]
+
+    def get(self, query: str):
+        """Liste de (url, titre, extrait) à utiliser, ou None s'il faut interroger le moteur.
+        En mode "refresh", une requête absente du cache renvoie SKIPPED (ignorée, à ne pas journaliser)."""
+        with self._lock:
+            status, results = self._lookup(normalize_query(query))
+            if status == "hit":
+                self.hits += 1
+                return results
+            if status == "absent" and self.mode == CACHE_REFRESH_STALE:
+                self.skipped += 1
+                return SKIPPED
+            self.misses += 1
+            return None
+
+    def peek(self, query: str) -> bool:
+        """True si get() répondra sans interroger le moteur (compteurs inchangés)."""
+        with self._lock:
+            status, _ = self._lookup(normalize_query(query))
+            return status == "hit" or (status == "absent" and self.mode == CACHE_REFRESH_STALE)
+
+    def put(self, query: str, results):
+        key = normalize_query(query)
+        payload = json.dumps([list(r) for r in results], ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO serp_cache(query, results, fetched_at) VALUES (?, ?, ?)",
+                (key, payload, time.time())
+            )
+            self._conn.commit()
+            self._writes += 1
+            if self._writes % EVICT_EVERY == 0:
+                self._evict()
+
+    def _evict(self):
+        """Garde les `max_entries` entrées les plus récentes."""
+        self._conn.execute(
+            "DELETE FROM serp_cache WHERE query NOT IN "
+            "(SELECT query FROM serp_cache ORDER BY fetched_at DESC LIMIT ?)",
+            (self.max_entries,)
+        )
+        self._conn.commit()
+
+    def summary(self) -> str:
+        s = f"Cache: {self.hits} hits, {self.misses} misses"
+        if self.mode == CACHE_REFRESH_STALE:
+            s += f", {self.skipped} ignorees (absentes)"
+        return s
+
+    def close(self):
+        with self._lock:
+            try:
+                self._evict()
+            finally:
+                self._conn.close()
@@ -0,0 +1,310 @@
+import os
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass, replace
+
+from search_backends import SearchBackend, log
+
+# ========= Moteurs de recherche =========
+# Un moteur = URL de recherche (requête ajoutée encodée) + cascades de sélecteurs des blocs de résultats,
+# limitées au sous-ensemble CSS de serp_html (descendant seulement) pour servir aussi au backend HTTP.
+# SCRAPER_SEARCH_URL : autre point d'entrée pour Startpage (ex. faux Startpage local de mock_startpage.py)
+
+@dataclass(frozen=True)
+class SearchEngine:
+    name: str
+    search_url: str
+    block_selectors: tuple
+    link_selectors: tuple
+    snippet_selectors: tuple
+    redirect_param: str = ""   # liens de résultats enveloppés (/l/?uddg=<url>) : paramètre qui porte la vraie URL
+
+    def query_url(self, query: str) -> str:
+        return self.search_url + urllib.parse.quote_plus(query)
+
+    def unwrap_url(self, url):
+        """URL réelle d'un lien de résultat (les redirections du moteur sont déroulées)."""
+        if not url or not self.redirect_param or self.redirect_param + "=" not in url:
+            return url
+        params = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)
+        return (params.get(self.redirect_param) or [url])[0]
+
+    def clean_results(self, results):
+        if not self.redirect_param:
+            return results
+        return [(self.unwrap_url(url), title, snippet) for url, title, snippet in results]
+
+STARTPAGE = SearchEngine(
+    "startpage",
+    os.environ.get("SCRAPER_SEARCH_URL") or "https://www.startpage.com/do/search?q=",
+    block_selectors=(
+        'div.w-gl__result',
+        'article[data-testid="result"]',
+        'li[class*="result"]',
+        'div[class*="result"]',
+    ),
+    link_selectors=(
+        'a[data-testid="result-title-a"]',
+        'a.w-gl__result-title',
+        'h3 a',
+        'a',
+    ),
+    snippet_selectors=(
+        '.w-gl__description',
+        'p[class*="snippet"]',
+        'div[class*="snippet"] p',
+        'p',
+    ),
+)
+
+# Version HTML sans JavaScript : exploitable aussi bien par le backend HTTP que par le navigateur
+DUCKDUCKGO = SearchEngine(
+    "duckduckgo",
+    "https://html.duckduckgo.com/html/?q=",
+    block_selectors=('div.result.web-result', 'div.result', 'div[class*="result"]'),
+    link_selectors=('a.result__a', 'h2 a', 'a'),
+    snippet_selectors=('.result__snippet', 'p'),
+    redirect_param="uddg",
+)
+
+BING = SearchEngine(
+    "bing",
+    "https://www.bing.com/search?q=",
+    block_selectors=('li.b_algo', 'li[class*="algo"]'),
+    link_selectors=('h2 a', 'a'),
+    snippet_selectors=('.b_caption p', 'p'),
+)
+
+ENGINES = {engine.name: engine for engine in (STARTPAGE, DUCKDUCKGO, BING)}
+DEFAULT_ENGINE_NAME = STARTPAGE.name
+
+def parse_engine_spec(spec: str, default_url: str = "") -> SearchEngine:
+    """"duckduckgo" ou "duckduckgo=http://127.0.0.1:8766/html/?q=" (même moteur, autre point d'entrée).
+    `default_url` remplace l'URL de Startpage quand la spécification n'en donne pas (--search-url)."""
+    name, _, url = spec.partition("=")
+    name = name.strip().lower()
+    if name not in ENGINES:
+        raise ValueError(f"moteur inconnu: {name!r} (disponibles: {', '.join(ENGINES)})")
+    engine = ENGINES[name]
+    url = url.strip() or (default_url if name == STARTPAGE.name else "")
+    return replace(engine, search_url=url) if url else engine
+
+def resolve_engines(specs, default_url: str = "") -> list:
+    """Moteurs du run, par ordre de priorité (doublons ignorés) ; aucun = Startpage seul."""
+    engines = []
+    for spec in specs or (DEFAULT_ENGINE_NAME,):
+        engine = parse_engine_spec(spec, default_url)
+        if all(e.name != engine.name for e in engines):
+            engines.append(engine)
+    return engines
+
+# ========= Santé des moteurs (disjoncteurs) =========
+BREAKER_FAILURES = 3          # échecs consécutifs avant ouverture du circuit
+BREAKER_OPEN_SECONDS = 60.0   # 1re mise à l'écart ; doublée à chaque rechute
+BREAKER_MAX_OPEN_SECONDS = 600.0
+LATENCY_EWMA = 0.2            # poids de la dernière mesure dans la latence moyenne
+
+CLOSED = "ferme"
+OPEN = "ouvert"
+HALF_OPEN = "essai"
+
+class CircuitBreaker:
+    """Fermé : requêtes normales. Ouvert : moteur écarté jusqu'à `reopen_at`. Essai : une seule requête
+    de test ; succès = refermé, échec = rouvert pour deux fois plus longtemps."""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, open_seconds: float = BREAKER_OPEN_SECONDS,
+                 max_open_seconds: float = BREAKER_MAX_OPEN_SECONDS):
+        self.failures_to_open = max(1, int(failures))
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0         # ouvertures depuis le dernier succès
+        self.total_trips = 0
+        self.reopen_at = 0.0
+        self.trial_running = False
+
+    def allow(self, now: float) -> bool:
+        if self.state == OPEN and now >= self.reopen_at:
+            self.state = HALF_OPEN
+            self.trial_running = False
+        if self.state == HALF_OPEN:
+            return not self.trial_running
+        return self.state == CLOSED
+
+    def on_start(self):
+        if self.state == HALF_OPEN:
+            self.trial_running = True
+
+    def on_success(self) -> bool:
+        """True si le circuit vient de se refermer."""
+        recovered = self.state != CLOSED
+        self.state = CLOSED
+        self.failures = self.trips = 0
+        self.trial_running = False
+        return recovered
+
+    def on_failure(self, now: float) -> float:
+        """Durée de mise à l'écart si le circuit vient de s'ouvrir, sinon 0."""
+        self.failures += 1
+        self.trial_running = False
+        if self.state == HALF_OPEN or self.failures >= self.failures_to_open:
+            seconds = min(self.max_open_seconds, self.open_seconds * 2 ** self.trips)
+            self.state = OPEN
+            self.reopen_at = now + seconds
+            self.trips += 1
+            self.total_trips += 1
+            self.failures = 0
+            return seconds
+        return 0.0
+
+class EngineHealth:
+    def __init__(self, engine: SearchEngine, priority: int, breaker: CircuitBreaker):
+        self.engine = engine
+        self.priority = priority
+        self.breaker = breaker
+        self.in_flight = 0
+        self.served = 0
+        self.failed = 0
+        self.latency = None   # moyenne glissante (s) des requêtes réussies
+        self.last_reason = None
+
+class EngineBoard:
+    """État partagé par tous les workers : chaque requête va au moteur disponible le moins chargé
+    (puis par ordre de priorité) ; un moteur dégradé est contourné jusqu'à ce que son essai réussisse."""
+
+    def __init__(self, engines, failures: int = BREAKER_FAILURES, open_seconds: float = BREAKER_OPEN_SECONDS):
+        self._lock = threading.Lock()
+        self.health = {e.name: EngineHealth(e, i, CircuitBreaker(failures, open_seconds))
+                       for i, e in enumerate(engines)}
+
+    def acquire(self, exclude=()):
+        """Réserve un moteur (requête en cours) ; None si aucun n'est disponible."""
+        with self._lock:
+            now = time.monotonic()
+            candidates = [h for name, h in self.health.items() if name not in exclude and h.breaker.allow(now)]
+            if not candidates:
+                return None
+            chosen = min(candidates, key=lambda h: (h.in_flight, h.priority))
+            chosen.breaker.on_start()
+            chosen.in_flight += 1
+            return chosen.engine
+
+    def release(self, name: str, ok: bool, seconds: float, reason: str, log_q=None):
+        with self._lock:
+            h = self.health[name]
+            h.in_flight -= 1
+            if ok:
+                h.served += 1
+                h.latency = seconds if h.latency is None else (1 - LATENCY_EWMA) * h.latency + LATENCY_EWMA * seconds
+                if h.breaker.on_success():
+                    log(log_q, f"[moteurs] {name}: retabli")
+                return
+            h.failed += 1
+            h.last_reason = reason
+            opened_for = h.breaker.on_failure(time.monotonic())
+        if opened_for:
+            log(log_q, f"[moteurs] {name}: ecarte {opened_for:.0f} s ({reason})")
+
+    def summary(self) -> str:
+        with self._lock:
+            parts = []
+            for name, h in self.health.items():
+                detail = f"{name}={h.served}"
+                if h.failed:
+                    detail += f" (echecs {h.failed}, ecarte x{h.breaker.total_trips})"
+                if h.latency is not None:
+                    detail += f" ~{h.latency * 1000:.0f} ms"
+                parts.append(detail)
+        return "Moteurs: " + ", ".join(parts)
+
+    def counters(self) -> dict:
+        with self._lock:
+            out = {}
+            for name, h in self.health.items():
+                out[f"engine_{name}_served"] = h.served
+                out[f"engine_{name}_failed"] = h.failed
+                out[f"engine_{name}_trips"] = h.breaker.total_trips
+            return out
+
+class MultiEngineBackend(SearchBackend):
+    """Une requête = un moteur choisi par le tableau de santé ; sur échec, bascule sur le moteur suivant.
+    `backends` : {nom du moteur: backend dédié (HTTP, navigateur ou repli HTTP -> navigateur)}."""
+    name = "moteurs"
+
+    def __init__(self, backends: dict, board: EngineBoard):
+        self.backends = backends
+        self.board = board
+
+    def fetch(self, query, log_q):
+        tried = set()
+        reason = None
+        while True:
+            engine = self.board.acquire(tried)
+            if engine is None:
+                break
+            tried.add(engine.name)
+            backend = self.backends[engine.name]
+            start = time.perf_counter()
+            results = None
+            try:
+                results = backend.fetch(query, log_q)
+            except Exception as e:
+                log(log_q, f"[moteurs] {engine.name}: erreur {e}")
+            finally:
+                ok = results is not None
+                self.board.release(engine.name, ok, time.perf_counter() - start,
+                                   backend.throttle_reason or "sans resultat", log_q)
+            if ok:
+                self.throttle_reason = backend.throttle_reason
+                self.served_by = backend.served_by
+                return results
+            reason = backend.throttle_reason or reason
+        self.throttle_reason = reason or "moteurs-indisponibles"
+        if not tried:
+            log(log_q, "[moteurs] aucun moteur disponible")
+        return None
+
+    async def fetch_async(self, query, log_q):
+        tried = set()
+        reason = None
+        while True:
+            engine = self.board.acquire(tried)
+            if engine is None:
+                break
+            tried.add(engine.name)
+            backend = self.backends[engine.name]
+            start = time.perf_counter()
+            results = None
+            try:
+                results = await backend.fetch_async(query, log_q)
+            except Exception as e:
+                log(log_q, f"[moteurs] {engine.name}: erreur {e}")
+            finally:
+                ok = results is not None
+                self.board.release(engine.name, ok, time.perf_counter() - start,
+                                   backend.throttle_reason or "sans resultat", log_q)
+            if ok:
+                self.throttle_reason = backend.throttle_reason
+                self.served_by = backend.served_by
+                return results
+            reason = backend.throttle_reason or reason
+        self.throttle_reason = reason or "moteurs-indisponibles"
+        if not tried:
+            log(log_q, "[moteurs] aucun moteur disponible")
+        return None
+
+    def close(self):
+        for backend in self.backends.values():
+            try:
+                backend.close()
+            except Exception:
+                pass
+
+    async def close_async(self):
+        for backend in self.backends.values():
+            try:
+                await backend.close_async()
+            except Exception:
+                pass
@@ -0,0 +1,99 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+from search_cache import normalize_query
+
+# ========= Archive des pages de résultats =========
+# Tous les blocs extraits (url, titre, extrait ; rang = position) de chaque requête, avec le moteur et l'heure :
+# de quoi rejouer la correspondance entreprise / profil hors ligne quand ses règles changent.
+# Contrairement au cache (TTL, éviction), rien n'expire ; une requête refaite remplace sa version précédente.
+ARCHIVE_FILENAME = "serp_archive.sqlite3"
+ARCHIVE_LEVEL = 9
+ARCHIVE_FORMAT = b"\x01"   # 1er octet du blob : format de compression (zlib + dictionnaire ci-dessous)
+# Dictionnaire zlib : chaînes communes à presque tous les blocs, les pages de ~1 Ko compressent bien mieux
+ARCHIVE_ZDICT = (
+    '[["https://fr.linkedin.com/in/", " | LinkedIn", "", "https://www.linkedin.com/in/", " - LinkedIn", '
+    '"Responsable HSE", "Directeur QHSE", "Voir le profil de ", " sur LinkedIn, le plus grand réseau '
+    'professionnel mondial. ", "Expérience : ", "Formation : ", "Lieu : ", "France", "relations"]]'
+).encode("utf-8")
+
+def pack_blocks(results) -> bytes:
+    comp = zlib.compressobj(ARCHIVE_LEVEL, zdict=ARCHIVE_ZDICT)
+    payload = json.dumps([list(r) for r in results], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return ARCHIVE_FORMAT + comp.compress(payload) + comp.flush()
+
+def unpack_blocks(blob: bytes) -> list:
+    if blob[:1] != ARCHIVE_FORMAT:
+        raise ValueError(f"format d'archive inconnu: {blob[:1]!r}")
+    decomp = zlib.decompressobj(zdict=ARCHIVE_ZDICT)
+    data = decomp.decompress(blob[1:]) + decomp.flush()
+    return [tuple(r) for r in json.loads(data)]
+
+class SerpArchive:
+    """Blocs extraits par requête normalisée (même clé que le cache), partagé entre workers."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stored = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS serp_archive ("
+            " query TEXT PRIMARY KEY,"
+            " engine TEXT,"
+            " fetched_at REAL NOT NULL,"
+            " blocks BLOB NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def put(self, query: str, results, engine: str = None, replace: bool = True):
+        """`replace=False` : n'archive que si la requête est absente (résultats servis par le cache,
+        sans moteur ni heure de recherche connus)."""
+        blob = pack_blocks(results)
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        with self._lock:
+            cur = self._conn.execute(
+                f"{verb} INTO serp_archive(query, engine, fetched_at, blocks) VALUES (?, ?, ?, ?)",
+                (normalize_query(query), engine, time.time(), blob)
+            )
+            self._conn.commit()
+            self.stored += cur.rowcount > 0
+
+    def get(self, query: str):
+        """[(url, titre, extrait), ...] dans l'ordre de la page, ou None si jamais archivée."""
+        with self._lock:
+            row = self._conn.execute("SELECT blocks FROM serp_archive WHERE query = ?",
+                                     (normalize_query(query),)).fetchone()
+        return None if row is None else unpack_blocks(row[0])
+
+    def records(self, query: str) -> list:
+        """Blocs détaillés : [{"rank", "url", "title", "snippet", "engine", "fetched_at"}, ...]."""
+        with self._lock:
+            row = self._conn.execute("SELECT engine, fetched_at, blocks FROM serp_archive WHERE query = ?",
+                                     (normalize_query(query),)).fetchone()
+        if row is None:
+            return []
+        engine, fetched_at, blob = row
+        return [{"rank": rank, "url": url, "title": title, "snippet": snippet, "engine": engine,
+                 "fetched_at": fetched_at}
+                for rank, (url, title, snippet) in enumerate(unpack_blocks(blob), start=1)]
+
+    def stats(self):
+        """(requêtes archivées, octets compressés)."""
+        with self._lock:
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(blocks)), 0) "
+                                             "FROM serp_archive").fetchone()
+        return count, size
+
+    def summary(self) -> str:
+        count, size = self.stats()
+        return f"Archive: {self.stored} pages ajoutees, {count} au total ({size / 2 ** 20:.1f} Mo)"
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
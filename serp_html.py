@@ -0,0 +1,218 @@
+import re
+from html.parser import HTMLParser
+
+# ========= Parsing HTML des pages de résultats (sans navigateur) =========
+# Mini-DOM + sous-ensemble CSS suffisant pour les cascades RESULT_*_SELECTORS :
+# tag, .classe, #id, [attr], [attr="v"], [attr*="v"], [attr^="v"], [attr$="v"], [attr~="v"],
+# combinateur descendant (espace) et listes séparées par des virgules.
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+             "param", "source", "track", "wbr"}
+RAW_TEXT_TAGS = {"script", "style", "template", "noscript"}
+
+class Node:
+    __slots__ = ("tag", "attrs", "children", "parent")
+
+    def __init__(self, tag, attrs=None, parent=None):
+        self.tag = tag
+        self.attrs = attrs or {}
+        self.children = []
+        self.parent = parent
+
+    def get_attribute(self, name):
+        return self.attrs.get(name)
+
+    def classes(self):
+        return (self.attrs.get("class") or "").split()
+
+    def iter_descendants(self):
+        stack = list(reversed([c for c in self.children if isinstance(c, Node)]))
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed([c for c in node.children if isinstance(c, Node)]))
+
+    def text(self) -> str:
+        """Équivalent approximatif de innerText : texte visible, espaces compactés."""
+        parts = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                parts.append(node)
+                continue
+            if node.tag in RAW_TEXT_TAGS:
+                continue
+            if node.tag == "br":
+                parts.append(" ")
+            stack.extend(reversed(node.children))
+        return re.sub(r"\s+", " ", "".join(parts)).strip()
+
+    def query_selector_all(self, selector):
+        groups = parse_selector(selector)
+        return [n for n in self.iter_descendants() if any(_match(n, g, len(g) - 1) for g in groups)]
+
+    def query_selector(self, selector):
+        groups = parse_selector(selector)
+        for n in self.iter_descendants():
+            if any(_match(n, g, len(g) - 1) for g in groups):
+                return n
+        return None
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node("#document")
+        self.stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        parent = self.stack[-1]
+        node = Node(tag, {k: (v if v is not None else "") for k, v in attrs}, parent)
+        parent.children.append(node)
+        if tag not in VOID_TAGS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        parent = self.stack[-1]
+        parent.children.append(Node(tag, {k: (v if v is not None else "") for k, v in attrs}, parent))
+
+    def handle_endtag(self, tag):
+        # balise fermante orpheline ignorée ; sinon on referme tout jusqu'à elle (HTML mal formé)
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                return
+
+    def handle_data(self, data):
+        self.stack[-1].children.append(data)
+
+def parse_html(html: str) -> Node:
+    builder = _TreeBuilder()
+    builder.feed(html or "")
+    builder.close()
+    return builder.root
+
+# ----- Sélecteurs -----
+_COMPOUND_RE = re.compile(
+    r"""(?P<tag>\*|[a-zA-Z][\w-]*)?(?P<rest>(?:\.[\w-]+|\#[\w-]+|\[[^\]]+\])*)"""
+)
+_PART_RE = re.compile(
+    r"""\.(?P<cls>[\w-]+)|\#(?P<id>[\w-]+)|\[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[*^$~]?=)\s*(?P<val>"[^"]*"|'[^']*'|[^\]\s]+)\s*)?\]"""
+)
+_selector_cache = {}
+
+def _split_outside_brackets(s: str, sep: str):
+    parts, buf, depth, quote = [], [], 0, None
+    for ch in s:
+        if quote:
+            buf.append(ch)
+            if ch == quote:
+                quote = None
+            continue
+        if ch in "\"'":
+            quote = ch
+        elif ch == "[":
+            depth += 1
+        elif ch == "]":
+            depth -= 1
+        elif depth == 0 and (ch == sep or (sep == " " and ch.isspace())):
+            if buf:
+                parts.append("".join(buf))
+                buf = []
+            continue
+        buf.append(ch)
+    if buf:
+        parts.append("".join(buf))
+    return parts
+
+def _parse_compound(text: str):
+    m = _COMPOUND_RE.fullmatch(text)
+    if not m:
+        raise ValueError(f"Selecteur non supporte: {text!r}")
+    tag = m.group("tag")
+    conds = []
+    for pm in _PART_RE.finditer(m.group("rest") or ""):
+        if pm.group("cls"):
+            conds.append(("class", pm.group("cls"), None))
+        elif pm.group("id"):
+            conds.append(("attr", "id", ("=", pm.group("id"))))
+        else:
+            val = pm.group("val")
+            if val and val[0] in "\"'":
+                val = val[1:-1]
+            conds.append(("attr", pm.group("attr"), (pm.group("op"), val) if pm.group("op") else None))
+    return (None if tag in (None, "*") else tag.lower()), conds
+
+def parse_selector(selector: str):
+    """Liste de groupes ; un groupe = liste de sélecteurs composés (combinateur descendant)."""
+    parsed = _selector_cache.get(selector)
+    if parsed is None:
+        parsed = [[_parse_compound(c) for c in _split_outside_brackets(group.strip(), " ")]
+                  for group in _split_outside_brackets(selector, ",") if group.strip()]
+        _selector_cache[selector] = parsed
+    return parsed
+
+def _match_compound(node: Node, compound) -> bool:
+    tag, conds = compound
+    if tag and node.tag != tag:
+        return False
+    for kind, name, test in conds:
+        if kind == "class":
+            if name not in node.classes():
+                return False
+            continue
+        value = node.attrs.get(name)
+        if value is None:
+            return False
+        if test is None:
+            continue
+        op, expected = test
+        if op == "=" and value != expected:
+            return False
+        if op == "*=" and (not expected or expected not in value):
+            return False
+        if op == "^=" and (not expected or not value.startswith(expected)):
+            return False
+        if op == "$=" and (not expected or not value.endswith(expected)):
+            return False
+        if op == "~=" and expected not in value.split():
+            return False
+    return True
+
+def _match(node: Node, compounds, idx: int) -> bool:
+    if not _match_compound(node, compounds[idx]):
+        return False
+    if idx == 0:
+        return True
+    anc = node.parent
+    while anc is not None and anc.tag != "#document":
+        if _match(anc, compounds, idx - 1):
+            return True
+        anc = anc.parent
+    return False
+
+# ----- Cascade (même logique que SERP_EXTRACT_JS) -----
+def extract_serp_html(html: str, block_selectors, link_selectors, snippet_selectors, limit: int):
+    """(sélecteur de bloc, nb de blocs, [(url, titre, extrait), ...])."""
+    doc = parse_html(html)
+    for bsel in block_selectors:
+        blocks = doc.query_selector_all(bsel)
+        if not blocks:
+            continue
+        results = []
+        for block in blocks[:limit]:
+            url, title, snippet = None, "", ""
+            for lsel in link_selectors:
+                a = block.query_selector(lsel)
+                if a is not None:
+                    url = a.get_attribute("href")
+                    title = a.text()
+                    break
+            for ssel in snippet_selectors:
+                sn = block.query_selector(ssel)
+                if sn is not None:
+                    snippet = sn.text()
+                    break
+            results.append((url, title, snippet))
+        return bsel, len(blocks), results
+    return None, 0, []
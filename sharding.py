@@ -0,0 +1,48 @@
+import glob
+import hashlib
+import os
+import re
+
+from company_names import company_key
+from run_journal import RunJournal
+
+# ========= Découpage en shards =========
+def shard_of(company_name: str, shard_count: int) -> int:
+    """Shard 0..shard_count-1 d'une entreprise ; hash stable (pas hash(), salé par process).
+    Hash de company_key : les doublons ("ACME", "Acme SAS") tombent dans le même shard."""
+    if shard_count <= 1:
+        return 0
+    digest = hashlib.sha1(company_key(company_name).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+def shard_results_path(excel_path: str, shard_index: int, shard_count: int) -> str:
+    """icpe_details.xlsx -> icpe_details.shard-2-of-4.jsonl (même format que le journal)."""
+    root, _ = os.path.splitext(excel_path)
+    return f"{root}.shard-{shard_index}-of-{shard_count}.jsonl"
+
+_SHARD_COUNT_RE = re.compile(r"\.shard-\d+-of-(\d+)\.jsonl$")
+
+def find_shard_results(excel_path: str, shard_count: int = None):
+    """Fichiers de shards d'un même découpage : `shard_count` donné, ou à défaut celui des fichiers les plus
+    récents. Ceux d'un ancien run à un autre nombre de shards ne sont jamais mélangés (leurs URLs périmées
+    l'emporteraient sur un "pas de résultat" récent)."""
+    root, _ = os.path.splitext(excel_path)
+    count = "*" if shard_count is None else str(int(shard_count))
+    paths = glob.glob(glob.escape(root) + f".shard-*-of-{count}.jsonl")
+    if shard_count is None and paths:
+        latest = max(paths, key=os.path.getmtime)
+        count = _SHARD_COUNT_RE.search(latest).group(1)
+        paths = [p for p in paths if _SHARD_COUNT_RE.search(p).group(1) == count]
+    return sorted(paths)
+
+def collect_shard_results(paths) -> dict:
+    """{(row, col): (entreprise, url|None)} sur tous les shards.
+    Déterministe quel que soit l'ordre des fichiers : une URL l'emporte sur un échec,
+    à égalité la plus petite URL (ordre lexicographique)."""
+    merged = {}
+    for path in sorted(paths):
+        for cell, (company, url) in RunJournal(path).replay().items():
+            prev = merged.get(cell)
+            if prev is None or (url and (not prev[1] or url < prev[1])):
+                merged[cell] = (company, url)
+    return merged
@@ -0,0 +1,385 @@
+import csv
+import os
+import sqlite3
+
+# ========= Stockage de travail =========
+# La feuille de travail (entreprise en A, une colonne d'URLs par intitulé à partir de B) vit dans :
+#  - un xlsx (openpyxl, chargé à la demande : seuls l'import / export et ce stockage y touchent) ;
+#  - une base SQLite indexée par ligne : lecture et écriture d'une ligne à coût constant quelle que soit la taille ;
+#  - un CSV, en import / export seulement (lecture et réécriture complète en streaming, pas de mise à jour).
+# Les numéros de ligne sont ceux de la feuille (en-tête en 1, première entreprise en 2) quel que soit le stockage ;
+# le nom de feuille ne sert qu'au xlsx.
+COMPANY_COLUMN = 1
+RESULT_COLUMN = 2
+COMPANY_HEADER = "entreprise"
+
+STORE_XLSX = "xlsx"
+STORE_SQLITE = "sqlite"
+STORE_CSV = "csv"
+STORE_EXTENSIONS = {
+    ".xlsx": STORE_XLSX, ".xlsm": STORE_XLSX,
+    ".sqlite3": STORE_SQLITE, ".sqlite": STORE_SQLITE, ".db": STORE_SQLITE,
+    ".csv": STORE_CSV,
+}
+WORKING_STORES = (STORE_XLSX, STORE_SQLITE)   # utilisables pour un run (mises à jour par cellule)
+DEFAULT_STORE_EXTENSION = {STORE_XLSX: ".xlsx", STORE_SQLITE: ".sqlite3", STORE_CSV: ".csv"}
+WORKING_EXTENSIONS = tuple(ext for ext, kind in STORE_EXTENSIONS.items() if kind in WORKING_STORES)
+
+def store_kind(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in STORE_EXTENSIONS:
+        raise ValueError(f"stockage inconnu: {os.path.basename(path)!r} "
+                         f"(extensions: {', '.join(sorted(STORE_EXTENSIONS))})")
+    return STORE_EXTENSIONS[ext]
+
+def header_titles(values) -> tuple:
+    """Intitulés d'une ligne d'en-tête (B1, C1...) ; s'arrêtent à la première cellule vide."""
+    titles = []
+    for value in tuple(values)[RESULT_COLUMN - 1:]:
+        if value is None or not str(value).strip():
+            break
+        titles.append(str(value).strip())
+    return tuple(titles)
+
+def padded(values, width: int) -> tuple:
+    return tuple(values)[:width] + (None,) * (width - len(values))
+
+def split_row(values, result_columns: int):
+    """(entreprise, (url B, url C, ...)) à partir des cellules brutes d'une ligne."""
+    values = padded(tuple(values), RESULT_COLUMN - 1 + result_columns)
+    company = values[COMPANY_COLUMN - 1]
+    urls = tuple("" if url is None else str(url) for url in values[RESULT_COLUMN - 1:])
+    return ("" if company is None else str(company)), urls
+
+class XlsxStore:
+    """Classeur openpyxl, chargé à chaque opération (lecture en streaming read_only)."""
+    kind = STORE_XLSX
+
+    def __init__(self, path: str, sheet_name: str):
+        self.path = path
+        self.sheet_name = sheet_name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass
+
+    def _sheet(self, wb):
+        return wb[self.sheet_name] if self.sheet_name in wb.sheetnames else wb.active
+
+    def ensure_exists(self):
+        """Crée le xlsx minimal si absent (A1='entreprise')."""
+        if not os.path.isfile(self.path):
+            import openpyxl
+            wb = openpyxl.Workbook()
+            ws = wb.active
+            ws.title = self.sheet_name
+            ws.cell(row=1, column=COMPANY_COLUMN, value=COMPANY_HEADER)
+            wb.save(self.path)
+            wb.close()
+
+    def header(self):
+        """(A1, (B1, C1, ...)) en lecture seule."""
+        import openpyxl
+        wb = openpyxl.load_workbook(self.path, read_only=True)
+        try:
+            for values in self._sheet(wb).iter_rows(min_row=1, max_row=1, values_only=True):
+                return padded(tuple(values), RESULT_COLUMN)[COMPANY_COLUMN - 1], header_titles(values)
+            return None, ()
+        finally:
+            wb.close()
+
+    def iter_rows(self, max_row: int = None, result_columns: int = 1):
+        import openpyxl
+        wb = openpyxl.load_workbook(self.path, read_only=True)
+        try:
+            for row, values in enumerate(self._sheet(wb).iter_rows(min_row=2, max_row=max_row,
+                                                                   max_col=RESULT_COLUMN - 1 + result_columns,
+                                                                   values_only=True), start=2):
+                company, urls = split_row(values, result_columns)
+                yield row, company, urls
+        finally:
+            wb.close()
+
+    def write_results(self, titles, found: dict):
+        import openpyxl
+        wb = openpyxl.load_workbook(self.path)
+        try:
+            ws = self._sheet(wb)
+            if (ws.cell(row=1, column=COMPANY_COLUMN).value or "").strip().lower() != COMPANY_HEADER:
+                ws.cell(row=1, column=COMPANY_COLUMN, value=COMPANY_HEADER)
+            for i, title in enumerate(titles):
+                ws.cell(row=1, column=RESULT_COLUMN + i, value=title)
+            for (row, col), url in found.items():
+                ws.cell(row=row, column=col, value=url)
+            wb.save(self.path)
+        finally:
+            wb.close()
+
+    def apply_journal(self, journaled: dict) -> int:
+        import openpyxl
+        wb = openpyxl.load_workbook(self.path)
+        try:
+            ws = self._sheet(wb)
+            applied = 0
+            for (row, col), (company, url) in journaled.items():
+                if not url:
+                    continue
+                if (ws.cell(row=row, column=COMPANY_COLUMN).value or "").strip() != company:
+                    continue
+                if ws.cell(row=row, column=col).value != url:
+                    ws.cell(row=row, column=col, value=url)
+                    applied += 1
+            if applied:
+                wb.save(self.path)
+            return applied
+        finally:
+            wb.close()
+
+    def write_grid(self, titles, rows):
+        self.ensure_exists()
+        import openpyxl
+        wb = openpyxl.load_workbook(self.path)
+        try:
+            if self.sheet_name in wb.sheetnames:
+                ws = wb[self.sheet_name]
+            else:
+                ws = wb.active
+                ws.title = self.sheet_name
+
+            ws.cell(row=1, column=COMPANY_COLUMN, value=COMPANY_HEADER)
+            for i, title in enumerate(titles):
+                ws.cell(row=1, column=RESULT_COLUMN + i, value=title)
+            col = RESULT_COLUMN + len(titles)
+            while ws.cell(row=1, column=col).value:   # intitulés retirés depuis le dernier run
+                ws.cell(row=1, column=col, value=None)
+                col += 1
+
+            ws.delete_rows(2, ws.max_row)
+            r = 2
+            for values in rows:
+                ws.cell(row=r, column=COMPANY_COLUMN, value=(values[0] or "").strip())
+                for i, url in enumerate(values[1:len(titles) + 1]):
+                    ws.cell(row=r, column=RESULT_COLUMN + i, value=(url or "").strip())
+                r += 1
+
+            wb.save(self.path)
+        finally:
+            wb.close()
+
+    def create(self, titles, rows):
+        """Nouveau classeur en mode write_only (streaming), remplace le fichier existant."""
+        import openpyxl
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet(self.sheet_name)
+        ws.append([COMPANY_HEADER, *titles])
+        width = 1 + len(titles)
+        for values in rows:
+            ws.append([(v or "").strip() or None for v in padded(tuple(values), width)])
+        wb.save(self.path)
+
+class SqliteStore:
+    """Une ligne de la feuille = une ligne de `companies` (clé = numéro de ligne), une URL = une ligne
+    de `results` (clé = ligne, colonne) : lectures et mises à jour ponctuelles par index."""
+    kind = STORE_SQLITE
+
+    def __init__(self, path: str, sheet_name: str = ""):
+        self.path = path
+        self.sheet_name = sheet_name
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS header (col INTEGER PRIMARY KEY, title TEXT NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS companies (row INTEGER PRIMARY KEY, company TEXT NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " row INTEGER NOT NULL,"
+            " col INTEGER NOT NULL,"
+            " url TEXT NOT NULL,"
+            " PRIMARY KEY (row, col)) WITHOUT ROWID"
+        )
+        self._conn.execute("INSERT OR IGNORE INTO header(col, title) VALUES (?, ?)", (COMPANY_COLUMN, COMPANY_HEADER))
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    def ensure_exists(self):
+        pass   # tables créées à l'ouverture
+
+    def header(self):
+        cols = dict(self._conn.execute("SELECT col, title FROM header"))
+        values = [cols.get(col) for col in range(COMPANY_COLUMN, max(cols, default=COMPANY_COLUMN) + 1)]
+        return cols.get(COMPANY_COLUMN), header_titles(values)
+
+    def _write_header(self, titles, clear_removed: bool):
+        if clear_removed:
+            self._conn.execute("DELETE FROM header WHERE col >= ?", (RESULT_COLUMN,))
+        self._conn.execute("INSERT OR REPLACE INTO header(col, title) VALUES (?, ?)", (COMPANY_COLUMN, COMPANY_HEADER))
+        self._conn.executemany("INSERT OR REPLACE INTO header(col, title) VALUES (?, ?)",
+                               ((RESULT_COLUMN + i, title) for i, title in enumerate(titles)))
+
+    def iter_rows(self, max_row: int = None, result_columns: int = 1):
+        last_column = RESULT_COLUMN + result_columns - 1
+        cursor = self._conn.execute(
+            "SELECT c.row, c.company, r.col, r.url FROM companies c"
+            " LEFT JOIN results r ON r.row = c.row AND r.col BETWEEN ? AND ?"
+            " WHERE c.row <= ? ORDER BY c.row",
+            (RESULT_COLUMN, last_column, max_row if max_row is not None else 2 ** 62),
+        )
+        current, company, urls = None, "", None
+        for row, name, col, url in cursor:
+            if row != current:
+                if current is not None:
+                    yield current, company, tuple(urls)
+                current, company, urls = row, name or "", [""] * result_columns
+            if col is not None:
+                urls[col - RESULT_COLUMN] = url or ""
+        if current is not None:
+            yield current, company, tuple(urls)
+
+    def write_results(self, titles, found: dict):
+        with self._conn:
+            self._write_header(titles, clear_removed=False)
+            self._conn.executemany("INSERT OR REPLACE INTO results(row, col, url) VALUES (?, ?, ?)",
+                                   ((row, col, url) for (row, col), url in found.items()))
+
+    def apply_journal(self, journaled: dict) -> int:
+        applied = 0
+        with self._conn:
+            for (row, col), (company, url) in journaled.items():
+                if not url:
+                    continue
+                stored = self._conn.execute("SELECT company FROM companies WHERE row = ?", (row,)).fetchone()
+                if stored is None or stored[0].strip() != company:
+                    continue
+                current = self._conn.execute("SELECT url FROM results WHERE row = ? AND col = ?",
+                                             (row, col)).fetchone()
+                if current is None or current[0] != url:
+                    self._conn.execute("INSERT OR REPLACE INTO results(row, col, url) VALUES (?, ?, ?)",
+                                       (row, col, url))
+                    applied += 1
+        return applied
+
+    def write_grid(self, titles, rows):
+        with self._conn:
+            self._write_header(titles, clear_removed=True)
+            self._conn.execute("DELETE FROM results")
+            self._conn.execute("DELETE FROM companies")
+            for r, values in enumerate(rows, start=2):
+                self._conn.execute("INSERT INTO companies(row, company) VALUES (?, ?)", (r, (values[0] or "").strip()))
+                for i, url in enumerate(values[1:len(titles) + 1]):
+                    url = (url or "").strip()
+                    if url:
+                        self._conn.execute("INSERT INTO results(row, col, url) VALUES (?, ?, ?)",
+                                           (r, RESULT_COLUMN + i, url))
+
+    def create(self, titles, rows):
+        self.write_grid(titles, rows)
+
+class CsvStore:
+    """entreprise, intitulé 1, intitulé 2... ; en-tête facultatif (première cellule 'entreprise').
+    Import / export en streaming : pas de mise à jour par cellule, donc pas de run directement dessus."""
+    kind = STORE_CSV
+
+    def __init__(self, path: str, sheet_name: str = ""):
+        self.path = path
+        self.sheet_name = sheet_name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass
+
+    def ensure_exists(self):
+        if not os.path.isfile(self.path):
+            self.create((), ())
+
+    def _records(self):
+        with open(self.path, newline="", encoding="utf-8-sig") as fh:
+            yield from csv.reader(fh)
+
+    @staticmethod
+    def _is_header(rec) -> bool:
+        return bool(rec) and rec[0].strip().lower() == COMPANY_HEADER
+
+    def header(self):
+        for rec in self._records():
+            return (rec[0].strip(), header_titles(rec)) if self._is_header(rec) else (None, ())
+        return None, ()
+
+    def iter_rows(self, max_row: int = None, result_columns: int = 1):
+        row = 1
+        for i, rec in enumerate(self._records()):
+            if i == 0 and self._is_header(rec):
+                continue
+            row += 1
+            if max_row is not None and row > max_row:
+                break
+            company, urls = split_row(rec, result_columns)
+            yield row, company, urls
+
+    def _read_only(self, *args):
+        raise ValueError("CSV: import / export seulement (convertir en .xlsx ou .sqlite3 pour un run)")
+
+    write_results = apply_journal = _read_only
+
+    def write_grid(self, titles, rows):
+        """Réécriture complète (fichier temporaire puis remplacement)."""
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", newline="", encoding="utf-8") as fh:
+                out = csv.writer(fh)
+                out.writerow([COMPANY_HEADER, *titles])
+                width = 1 + len(titles)
+                for values in rows:
+                    out.writerow([(v or "").strip() for v in padded(tuple(values), width)])
+            os.replace(tmp, self.path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def create(self, titles, rows):
+        self.write_grid(titles, rows)
+
+STORES = {STORE_XLSX: XlsxStore, STORE_SQLITE: SqliteStore, STORE_CSV: CsvStore}
+
+def open_store(path: str, sheet_name: str):
+    """Stockage choisi d'après l'extension ; à fermer (with open_store(...) as store)."""
+    return STORES[store_kind(path)](path, sheet_name)
+
+def create_store(path: str, sheet_name: str, titles, rows):
+    """Nouveau stockage (remplace l'existant) rempli en streaming : rows = [(entreprise, url B, ...), ...]."""
+    with open_store(path, sheet_name) as store:
+        store.create(tuple(titles), rows)
+
+def convert_store(src_path: str, dst_path: str, sheet_name: str) -> int:
+    """Copie en streaming d'un stockage à l'autre (xlsx <-> SQLite <-> CSV) ; renvoie le nombre de lignes."""
+    if os.path.abspath(src_path) == os.path.abspath(dst_path):
+        raise ValueError("source et destination identiques")
+    count = 0
+    with open_store(src_path, sheet_name) as src:
+        _, titles = src.header()
+
+        def rows():
+            nonlocal count
+            for _, company, urls in src.iter_rows(result_columns=max(1, len(titles))):
+                count += 1
+                yield (company, *urls)
+
+        create_store(dst_path, sheet_name, titles, rows())
+    return count